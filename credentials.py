@@ -30,6 +30,13 @@ class Credentials:
             except FileNotFoundError:
                 cls.__DATA__ = {}
 
+    @classmethod
+    def forget_loaded(cls):
+        """ drops the credentials loaded by this process, they are read from the files again when needed """
+        cls.__DATA__ = None
+        for sub_class in cls.__subclasses__():
+            sub_class.forget_loaded()
+
     @classmethod
     def _load_data(cls):
         with open(PathManager.join_path(f'{cls.__name__}.pickle'), 'rb') as f:
@@ -1,33 +1,34 @@
+import html
 import os
 import sys
 import importlib
 import webbrowser
 from logging.handlers import RotatingFileHandler
 
+from helpers.startup_profiler import StartupProfiler
 from PyQt5 import QtCore
-################################################################################
-# DO NOT REMOVE! THIS NEEDS TO BE IMPORTED BEFORE QApplication-Start           #
-# DO NOT REMOVE! Even if your IDE tells you this is 'unused', it is necessary! #
-from PyQt5.QtWebEngineWidgets import QWebEngineView                            #
-################################################################################
 from PyQt5.QtGui import QIcon, QFont, QScreen
-from PyQt5.QtCore import QSettings, QObject, QVariant, pyqtSlot, Qt, QRect
+from PyQt5.QtCore import QSettings, QObject, QVariant, pyqtSlot, Qt, QRect, QCoreApplication
 from PyQt5.QtWidgets import *
 from threading import Lock
-from typing import List, Type, Dict, cast
+from typing import List, Type, Dict, Union, cast
 
 import signal
 
+from helpers.frame_scheduler import FrameScheduler
+from helpers.metrics import Metrics
+from helpers.signal_wakeup import SignalWakeup
+from helpers.tracing import Tracer
 from helpers.tools import tup2str
-from widgets.base import BaseWidget
-from widgets.calendar.calendar_widget import CalendarWidget
+from widgets.base import BaseWidget, BlurredBackground
 from helpers.tools import PathManager
-from widgets.music import MusicWidget
-from widgets.network import NetworkWidget
+from widgets.registry import WidgetRegistry
 import logging
 
 from widgets.tool_widgets.onboarding import OnboardingDialog
 
+StartupProfiler.mark('core modules imported')
+
 
 class Application(QApplication):
     def event(self, e):
@@ -35,6 +36,9 @@ class Application(QApplication):
 
 
 class DesktopWidgetsCore(QObject):
+    # QtWebEngine needs shared contexts before the QApplication exists.
+    # setting them here (instead of importing QtWebEngineWidgets) lets widgets import it when they are activated
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = Application([])
     app.setStyleSheet("QToolTip {opacity: 200;}")
     app.setFont(QFont('Calibri'))
@@ -94,18 +98,40 @@ class DesktopWidgetsCore(QObject):
         self.get_screen_config(app)
         self.check_widget_positions()
 
+    @pyqtSlot(bool)
+    def screen_saver_active_changed(self, active: bool):
+        self.log(f'screen saver {"active" if active else "inactive"}')
+        if active:
+            FrameScheduler.shared().suspend('screen saver')
+        else:
+            FrameScheduler.shared().resume('screen saver')
+            # the wallpaper may have changed while the session was locked
+            BlurredBackground.wallpaper_changed()
+
+    def watch_session_lock(self):
+        try:
+            from PyQt5.QtDBus import QDBusConnection
+        except ImportError:
+            return
+        bus = QDBusConnection.sessionBus()
+        if bus.isConnected():
+            bus.connect('org.freedesktop.ScreenSaver', '/org/freedesktop/ScreenSaver', 'org.freedesktop.ScreenSaver',
+                        'ActiveChanged', self.screen_saver_active_changed)
+
     def __init__(self, config='default', available_widgets=None):
         super(DesktopWidgetsCore, self).__init__()
         self.onboarding_dialog = None
         signal.signal(signal.SIGINT, lambda *a: DesktopWidgetsCore.app.quit())
-        DesktopWidgetsCore.app.startTimer(200)
+        # wakes the event loop for SIGINT, instead of a timer waking it five times a second
+        SignalWakeup.install()
+        self.watch_session_lock()
         DesktopWidgetsCore.app.setQuitOnLastWindowClosed(False)  # Otherwise DebugWindow kills entire application on close
 
         DesktopWidgetsCore.app.screenRemoved.connect(self.screen_disconnected)
         DesktopWidgetsCore.app.screenAdded.connect(self.screen_connected)
         self.screen_config = self.get_screen_config(DesktopWidgetsCore.app)
         self.widgets = []  # type: List[BaseWidget]
-        self.available_widgets = {}  # type: Dict[str, Type[BaseWidget]]
+        self.available_widgets = []  # type: List[str]
         self.dbg_win = None
         self.tray_icon = QSystemTrayIcon()
         self.tray_icon.setIcon(self.app.style().standardIcon(QStyle.SP_FileDialogListView))
@@ -122,6 +148,24 @@ class DesktopWidgetsCore(QObject):
         self.open_config_action = QAction(DesktopWidgetsCore.app.style().standardIcon(QStyle.SP_DriveFDIcon),
                                           "Open Config", DesktopWidgetsCore.app)
         self.open_config_action.triggered.connect(self.open_config)
+        self.refresh_backgrounds_action = QAction(DesktopWidgetsCore.app.style().standardIcon(QStyle.SP_BrowserReload),
+                                                  "Refresh Backgrounds", DesktopWidgetsCore.app)
+        self.refresh_backgrounds_action.triggered.connect(BlurredBackground.wallpaper_changed)
+        self.record_metrics_action = QAction("Record Performance Metrics", DesktopWidgetsCore.app)
+        self.record_metrics_action.setCheckable(True)
+        self.record_metrics_action.setChecked(Metrics.enabled)
+        self.record_metrics_action.toggled.connect(Metrics.set_enabled)
+        self.show_metrics_action = QAction("Show Performance Metrics", DesktopWidgetsCore.app)
+        self.show_metrics_action.triggered.connect(self.show_metrics)
+        self.export_metrics_action = QAction("Export Performance Metrics", DesktopWidgetsCore.app)
+        self.export_metrics_action.triggered.connect(self.export_metrics)
+        self.metrics_box = None
+        self.record_traces_action = QAction("Record Update Traces", DesktopWidgetsCore.app)
+        self.record_traces_action.setCheckable(True)
+        self.record_traces_action.setChecked(Tracer.enabled)
+        self.record_traces_action.toggled.connect(Tracer.set_enabled)
+        self.export_trace_action = QAction("Export Update Trace", DesktopWidgetsCore.app)
+        self.export_trace_action.triggered.connect(self.export_trace)
 
         self.tray_menu_actions = {}
         self.tray_menu = QMenu()
@@ -129,6 +173,15 @@ class DesktopWidgetsCore(QObject):
         self.tray_menu.addAction(self.raise_action)
         # self.tray_menu.addAction(self.debug_widgets_action)
         self.tray_menu.addAction(self.open_config_action)
+        self.tray_menu.addAction(self.refresh_backgrounds_action)
+        self.debug_menu = QMenu('Debug')
+        self.debug_menu.addAction(self.record_metrics_action)
+        self.debug_menu.addAction(self.show_metrics_action)
+        self.debug_menu.addAction(self.export_metrics_action)
+        self.debug_menu.addSeparator()
+        self.debug_menu.addAction(self.record_traces_action)
+        self.debug_menu.addAction(self.export_trace_action)
+        self.tray_menu.addMenu(self.debug_menu)
         self.tray_menu.addAction(self.quit_action)
         self.tray_icon.setContextMenu(self.tray_menu)
         self.tray_icon.show()
@@ -145,7 +198,7 @@ class DesktopWidgetsCore(QObject):
 
         if self.settings.childGroups().__contains__(self.__class__.__name__):
             # self.debug('waiting for read-lock')
-            with self.settings_lock:
+            with self.settings_lock, StartupProfiler.measure('restore settings'):
                 self.settings.beginGroup(self.__class__.__name__)
                 active_widgets = self.settings.value('active_widgets')
                 if active_widgets is None:
@@ -157,43 +210,53 @@ class DesktopWidgetsCore(QObject):
                 self.log('no active widgets found. activate from tray.')
                 OnboardingDialog.highlight_tray_icon(self.tray_icon, loop_count=10)
             for w in active_widgets:
-                if w in self.available_widgets.keys():
-                    self.activate_widget(self.available_widgets[w])
+                if w in self.available_widgets:
+                    self.activate_widget(w)
                 else:
                     self.log('%s was not activated, because it is not registered' % w)
         else:
             self.show_onboarding_dialog()
         self.check_widget_positions()
+        StartupProfiler.mark('core ready')
+        StartupProfiler.schedule_report(lambda path: self.log(f'startup profile written to {path}'))
 
     def show_onboarding_dialog(self):
-        self.onboarding_dialog = OnboardingDialog(None, flags=Qt.WindowCloseButtonHint | Qt.Window)
+        self.onboarding_dialog = OnboardingDialog(self.available_widgets, None,
+                                                  flags=Qt.WindowCloseButtonHint | Qt.Window)
         self.onboarding_dialog.highlight_tray_icon(self.tray_icon, loop_count=-1)
         self.onboarding_dialog.widget_class_activated.connect(self.activate_widget)
         self.onboarding_dialog.show()
 
     def open_widget(self):
         action = self.sender()
-        widget_class = action.property('widget_class')
-        self.activate_widget(widget_class)
+        widget_name = action.property('widget_name')
+        self.activate_widget(widget_name)
         # self.tray_menu.removeAction(action)
 
-    def register_widget(self, widget_class: Type[BaseWidget]):
-        if widget_class not in self.available_widgets:
-            self.available_widgets[widget_class.__name__] = widget_class
-            open_action = QAction(QIcon(),
-                                  "Open %s" % widget_class.__name__, DesktopWidgetsCore.app)
-            open_action.setProperty('widget_class', widget_class)
-            open_action.triggered.connect(self.open_widget)
-            self.tray_menu_actions[widget_class] = {'open': open_action}
-            self.tray_menu.addAction(open_action)
-
-    def activate_widget(self, widget_class: Type[BaseWidget]):
-        self.log('# adding %s...' % widget_class.__name__, level=logging.INFO)
-        widget_class = getattr(importlib.import_module(widget_class.__module__), widget_class.__name__)
-        widget = widget_class()
+    def add_open_action(self, widget_name: str):
+        open_action = QAction(QIcon(), "Open %s" % widget_name, DesktopWidgetsCore.app)
+        open_action.setProperty('widget_name', widget_name)
+        open_action.triggered.connect(self.open_widget)
+        self.tray_menu_actions[widget_name] = {'open': open_action}
+        self.tray_menu.addAction(open_action)
+
+    def register_widget(self, widget: Union[str, Type[BaseWidget]]):
+        """ widgets are registered by name, their modules are imported on activation """
+        widget_name = widget if isinstance(widget, str) else widget.__name__
+        if widget_name not in self.available_widgets:
+            self.available_widgets.append(widget_name)
+            self.add_open_action(widget_name)
+
+    def activate_widget(self, widget: Union[str, Type[BaseWidget]]):
+        widget_name = widget if isinstance(widget, str) else widget.__name__
+        self.log('# adding %s...' % widget_name, level=logging.INFO)
+        widget_class = WidgetRegistry.load(widget_name)
+        with StartupProfiler.measure(f'construct {widget_name}'):
+            widget = widget_class()
+        StartupProfiler.watch_first_paint(widget)
         try:
-            open_action = self.tray_menu_actions[widget_class]['open']
-            self.tray_menu_actions[widget_class].pop('open', None)
+            open_action = self.tray_menu_actions[widget_name]['open']
+            self.tray_menu_actions[widget_name].pop('open', None)
             self.tray_menu.removeAction(open_action)
         except KeyError:
             pass
@@ -206,16 +269,17 @@ class DesktopWidgetsCore(QObject):
 
         if self.settings.childGroups().__contains__(widget.__class__.__name__):
             # self.debug('waiting for read-lock')
-            with self.settings_lock:
-                self.settings.beginGroup(widget.__class__.__name__)
-                widget_settings = dict()
-                for key in self.settings.allKeys():
-                    widget_settings[key] = self.settings.value(key)
-                self.settings.endGroup()
-                self.settings.sync()
-            # self.debug('released read-lock')
-            for key in widget_settings:
-                widget.apply_settings(key, widget_settings[key])
+            with StartupProfiler.measure(f'restore settings {widget_name}'):
+                with self.settings_lock:
+                    self.settings.beginGroup(widget.__class__.__name__)
+                    widget_settings = dict()
+                    for key in self.settings.allKeys():
+                        widget_settings[key] = self.settings.value(key)
+                    self.settings.endGroup()
+                    self.settings.sync()
+                # self.debug('released read-lock')
+                for key in widget_settings:
+                    widget.apply_settings(key, widget_settings[key])
 
         # else:
         #     widget.show()
@@ -230,7 +294,8 @@ class DesktopWidgetsCore(QObject):
         widget.context_menu.addAction(widget.hide_action)
         widget.context_menu.addAction(widget.close_action)
         widget.context_menu.addAction(self.quit_action)
-        widget.start()
+        with StartupProfiler.measure(f'start {widget_name}'):
+            widget.start()
         widget.show()
         widget.activateWindow()
         widget.raise_()
@@ -244,7 +309,7 @@ class DesktopWidgetsCore(QObject):
         self.sender().close()
         importlib.reload(sys.modules[self.sender().__module__])
         # noinspection PyTypeChecker
-        self.activate_widget(self.sender().__class__)
+        self.activate_widget(self.sender().__class__.__name__)
 
     @pyqtSlot()
     def remove_widget(self):
@@ -252,12 +317,7 @@ class DesktopWidgetsCore(QObject):
         self.widgets.remove(widget)
         self.tray_menu.removeAction(widget.show_action)
         self.tray_menu.removeAction(widget.hide_action)
-        widget_class = widget.__class__
-        open_action = QAction(QIcon(),
-                              "Open %s" % widget_class.__name__, DesktopWidgetsCore.app)
-        open_action.setProperty('widget_class', widget_class)
-        open_action.triggered.connect(self.open_widget)
-        self.tray_menu.addAction(open_action)
+        self.add_open_action(widget.__class__.__name__)
 
         self.update_settings('active_widgets', [w.__class__.__name__ for w in self.widgets], sender=self)
 
@@ -336,6 +396,27 @@ class DesktopWidgetsCore(QObject):
         logging.getLogger(self.__class__.__name__).log(level=logging.ERROR, msg='imported %s' % getattr(importlib.import_module('subwidgets.dbgwin'), 'DebugWindow'))
         self.dbg_win = window_class(self.widgets, parent=None)
 
+    def show_metrics(self):
+        if self.metrics_box is None:
+            self.metrics_box = QMessageBox(QMessageBox.NoIcon, 'Performance Metrics', '')
+            self.metrics_box.setWindowModality(Qt.NonModal)
+        text = f'<pre>{html.escape(Metrics.summary())}</pre>'
+        if not Metrics.enabled:
+            text = 'Metrics are not being recorded at the moment.' + text
+        self.metrics_box.setText(text)
+        self.metrics_box.show()
+        self.metrics_box.raise_()
+
+    def export_metrics(self):
+        paths = Metrics.export()
+        self.log(f'exported metrics to {", ".join(paths)}')
+        self.tray_icon.showMessage('Performance Metrics', f'exported to {paths[0]}', QSystemTrayIcon.Information)
+
+    def export_trace(self):
+        path = Tracer.export()
+        self.log(f'exported trace to {path}')
+        self.tray_icon.showMessage('Update Trace', f'exported to {path}', QSystemTrayIcon.Information)
+
     def open_config(self):
         webbrowser.open(self.settings.fileName())
 
@@ -398,9 +479,9 @@ if __name__ == '__main__':
     faulthandler.enable(open('crash.log', 'a'), all_threads=True)
 
     core = DesktopWidgetsCore(available_widgets=[
-        MusicWidget,
-        CalendarWidget,
-        NetworkWidget,
+        'MusicWidget',
+        'CalendarWidget',
+        'NetworkWidget',
         # 'ClockWidget',
     ]
                          )
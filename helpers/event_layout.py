@@ -0,0 +1,182 @@
+import heapq
+from bisect import bisect_right
+from typing import List, Tuple, Callable, Any, Iterable, Dict
+
+from PyQt5.QtCore import QRect, Qt
+
+
+class EventSlot:
+    """ where an event sits inside its overlap group: first column, number of columns it spans """
+
+    def __init__(self, item: Any, begin: float, end: float, column: int, span: int = 1):
+        self.item = item
+        self.begin = begin
+        self.end = end
+        self.column = column
+        self.span = span
+
+    def __repr__(self):
+        return f'EventSlot({self.item!r}, {self.begin}-{self.end}, column={self.column}, span={self.span})'
+
+
+class EventGroup:
+    """ events connected by overlaps. groups are laid out independently of each other """
+
+    def __init__(self, slots: List[EventSlot], columns: int):
+        self.slots = slots
+        self.columns = columns
+
+
+class EventLayout:
+    """
+    sweep-line layout of overlapping events. anything with 'begin' and 'end' can be laid out,
+    hours for the day columns, day indices for the all-day row.
+    events are placed into the first free column (same result as the former column scan),
+    then expanded to the right over the columns they do not collide with.
+    placing is O(n log n). expanding does a binary search per column an event grows into, plus one for the column
+    that stops it: O(n log n) for the usual narrow groups, O(n * columns * log n) when events span many columns.
+    only geometry is computed, applying it is up to the caller.
+    """
+
+    @staticmethod
+    def intervals(items: Iterable[Any], moved: Dict[Any, Tuple[float, float]] = None) -> List[Tuple[float, float, Any]]:
+        """ (begin, end, item) sorted by time, 'moved' overrides the interval of single items """
+        intervals = []
+        for item in items:
+            begin, end = moved[item] if moved and item in moved else (item.begin, item.end)
+            intervals.append((begin, end, item))
+        return sorted(intervals, key=lambda i: (i[0], i[1]))
+
+    @staticmethod
+    def groups(items: Iterable[Any], moved: Dict[Any, Tuple[float, float]] = None) -> List[EventGroup]:
+        return EventLayout.place(EventLayout.intervals(items, moved))
+
+    @staticmethod
+    def place(intervals: List[Tuple[float, float, Any]]) -> List[EventGroup]:
+        """ lays out time-sorted (begin, end, item) tuples """
+        groups = []
+        slots = []  # type: List[EventSlot]
+        active = []  # type: List[Tuple[float, int, int]]  # heap of (end, order, column)
+        free = []  # type: List[int]
+        columns = 0
+        for order, (begin, end, item) in enumerate(intervals):
+            while active and active[0][0] <= begin:
+                heapq.heappush(free, heapq.heappop(active)[2])
+            if not active and slots:
+                # nothing overlaps anymore, the current group is complete
+                groups.append(EventLayout._expand(slots, columns))
+                slots, free, columns = [], [], 0
+            if free:
+                column = heapq.heappop(free)
+            else:
+                column = columns
+                columns += 1
+            heapq.heappush(active, (end, order, column))
+            slots.append(EventSlot(item, begin, end, column))
+        if slots:
+            groups.append(EventLayout._expand(slots, columns))
+        return groups
+
+    @staticmethod
+    def _expand(slots: List[EventSlot], columns: int) -> EventGroup:
+        # the events of a column never overlap and arrive sorted, so begins and ends are both ascending
+        begins = [[] for _ in range(columns)]  # type: List[List[float]]
+        ends = [[] for _ in range(columns)]  # type: List[List[float]]
+        for slot in slots:
+            begins[slot.column].append(slot.begin)
+            ends[slot.column].append(slot.end)
+        for slot in slots:
+            begin, end = slot.begin, slot.end
+            for column in range(slot.column + 1, columns):
+                idx = bisect_right(ends[column], begin)
+                if idx < len(ends[column]) and begins[column][idx] < end:
+                    break
+                slot.span += 1
+        return EventGroup(slots, columns)
+
+    @staticmethod
+    def vertical_rects(groups: List[EventGroup], col_width: float, col_height: float,
+                       start_hour: float, end_hour: float,
+                       col_rescale_func: Callable = None) -> List[Tuple[Any, QRect]]:
+        """ boxes of the events inside a day column, side by side where they overlap """
+        hour_height = col_height / (end_hour - start_hour)
+        rects = []
+        for group in groups:
+            if col_rescale_func is not None:
+                col_width, col_height = col_rescale_func(group.columns)
+            for slot in group.slots:
+                start_y = int(max(0, slot.begin - start_hour) * hour_height)
+                rects.append((slot.item, QRect(int(col_width * slot.column / group.columns),
+                                               start_y,
+                                               int(col_width * slot.span / group.columns - 1),
+                                               min(int((slot.end - max(slot.begin, start_hour)) * hour_height),
+                                                   int(col_height - start_y)))))
+        return rects
+
+    @staticmethod
+    def horizontal_rects(groups: List[EventGroup], col_height: float, rect_func: Callable,
+                         col_rescale_func: Callable = None) -> List[Tuple[Any, QRect]]:
+        """
+        boxes of the events in the all-day row, stacked where they overlap.
+        rect_func gives the unstacked box of a slot (it has 'begin' and 'end' like the event)
+        """
+        rects = []
+        for group in groups:
+            if col_rescale_func is not None:
+                _, col_height = col_rescale_func(group.columns)
+            for slot in group.slots:
+                rect = rect_func(slot)  # type: QRect
+                rect.setTop(int(col_height * slot.column / group.columns + rect.top()))
+                rect.setHeight(int(col_height * slot.span / group.columns - 1))
+                rects.append((slot.item, rect))
+        return rects
+
+    @staticmethod
+    def rects(items: Iterable[Any], col_width: float, col_height: float, start_hour: float, end_hour: float,
+              direction=Qt.Vertical, rect_func: Callable = None,
+              col_rescale_func: Callable = None, groups: List[EventGroup] = None) -> List[Tuple[Any, QRect]]:
+        if groups is None:
+            groups = EventLayout.groups(items)
+        if direction == Qt.Vertical:
+            return EventLayout.vertical_rects(groups, col_width, col_height, start_hour, end_hour,
+                                              col_rescale_func)
+        if rect_func is None:
+            return []
+        return EventLayout.horizontal_rects(groups, col_height, rect_func, col_rescale_func)
+
+
+class ColumnLayout:
+    """
+    incremental layout of one column. the overlap groups of the last pass are kept,
+    a pass only places the groups whose events or times changed and reuses the others,
+    so dragging an event re-lays out the group it leaves and the one it joins.
+    """
+
+    def __init__(self):
+        self._groups = {}  # type: Dict[tuple, EventGroup]
+        self.changed = []  # type: List[EventGroup]
+
+    def invalidate(self):
+        self._groups = {}
+
+    def groups(self, items: Iterable[Any], moved: Dict[Any, Tuple[float, float]] = None) -> List[EventGroup]:
+        groups, cached, self.changed = [], {}, []
+        intervals = EventLayout.intervals(items, moved)
+        first, last_end = 0, None
+        for idx, (begin, end, _) in enumerate(intervals + [(None, None, None)]):
+            if idx < len(intervals) and (last_end is None or begin < last_end):
+                last_end = end if last_end is None else max(last_end, end)
+                continue
+            members = intervals[first:idx]
+            if members:
+                # items compare by identity, a group is only reused for the very same events at the same times
+                key = tuple(members)
+                group = self._groups.get(key)
+                if group is None:
+                    group = EventLayout.place(members)[0]
+                    self.changed.append(group)
+                cached[key] = group
+                groups.append(group)
+            first, last_end = idx, end
+        self._groups = cached
+        return groups
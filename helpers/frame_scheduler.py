@@ -0,0 +1,139 @@
+import math
+import time
+from typing import Callable, Dict, List, Union
+
+from PyQt5 import sip
+from PyQt5.QtCore import QRect, QTimer
+from PyQt5.QtGui import QRegion
+from PyQt5.QtWidgets import QWidget
+
+from helpers.metrics import Metrics, MetricStage
+
+
+class _Ticker:
+    def __init__(self, widget: QWidget, interval_ms: int, callback: Callable[[], None], run_hidden: bool):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.callback = callback
+        self.run_hidden = run_hidden
+        self.due = FrameScheduler.next_boundary(interval_ms)
+
+
+class FrameScheduler:
+    """
+    one place for periodic widget work and repaints.
+    update requests are collected as dirty regions per widget and flushed together once per frame,
+    tickers replace the per-widget timers and share one timer that only wakes up for the next due ticker.
+    ticks are aligned to multiples of their interval on the clock, tickers due within the slack run
+    in the same wakeup. hidden widgets, and widgets clipped away completely, neither tick nor repaint,
+    nothing ticks while suspended (e.g. the session is locked).
+    """
+    FRAME_INTERVAL_MS = 16
+    TIMER_SLACK_MS = 50
+
+    __SHARED__ = None  # type: Union[None, FrameScheduler]
+
+    def __init__(self):
+        self._dirty = {}  # type: Dict[QWidget, Union[None, QRegion]]
+        self._tickers = []  # type: List[_Ticker]
+        self._frame_timer = QTimer()
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(FrameScheduler.FRAME_INTERVAL_MS)
+        self._frame_timer.timeout.connect(self.flush)
+        self._tick_timer = QTimer()
+        self._tick_timer.setSingleShot(True)
+        self._tick_timer.timeout.connect(self._tick)
+        self._suspended = set()
+        self.skipped = 0
+
+    @classmethod
+    def shared(cls) -> "FrameScheduler":
+        if cls.__SHARED__ is None:
+            cls.__SHARED__ = FrameScheduler()
+        return cls.__SHARED__
+
+    @staticmethod
+    def next_boundary(interval_ms: int) -> float:
+        """ the monotonic time of the next multiple of the interval on the wall clock """
+        wall = time.time()
+        boundary = (math.floor(wall * 1000 / interval_ms) + 1) * interval_ms / 1000
+        return time.monotonic() + boundary - wall
+
+    @staticmethod
+    def is_painted(widget: QWidget) -> bool:
+        return not sip.isdeleted(widget) and widget.isVisible() and not widget.window().isMinimized() \
+            and not widget.visibleRegion().isEmpty()
+
+    def request_update(self, widget: QWidget, rect: QRect = None):
+        """ marks rect (everything if None) of the widget dirty, it is repainted with the next frame """
+        if widget in self._dirty:
+            region = self._dirty[widget]
+            if region is not None:
+                self._dirty[widget] = None if rect is None else region.united(rect)
+        else:
+            self._dirty[widget] = None if rect is None else QRegion(rect)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def flush(self):
+        dirty, self._dirty = self._dirty, {}
+        with Metrics.measure(self.__class__.__name__, MetricStage.UPDATE):
+            for widget, region in dirty.items():
+                if not self.is_painted(widget):
+                    # shown again, qt paints it completely anyway
+                    self.skipped += 1
+                    continue
+                if region is None:
+                    widget.update()
+                else:
+                    widget.update(region)
+
+    def add_ticker(self, widget: QWidget, interval_ms: int, callback: Callable[[], None], run_hidden: bool = False):
+        """ calls back every interval_ms while the widget is shown, or always with run_hidden """
+        self.remove_ticker(widget, callback)
+        self._tickers.append(_Ticker(widget, interval_ms, callback, run_hidden))
+        self._schedule_tick()
+
+    def remove_ticker(self, widget: QWidget, callback: Callable[[], None] = None):
+        self._tickers = [t for t in self._tickers
+                         if not (t.widget is widget and (callback is None or t.callback == callback))]
+        self._schedule_tick()
+
+    @property
+    def suspended(self) -> bool:
+        return bool(self._suspended)
+
+    def suspend(self, reason: str):
+        self._suspended.add(reason)
+        self._schedule_tick()
+
+    def resume(self, reason: str):
+        """ overdue tickers run once right away """
+        self._suspended.discard(reason)
+        self._schedule_tick()
+
+    def _schedule_tick(self):
+        if not self._tickers or self._suspended:
+            self._tick_timer.stop()
+            return
+        wait = min(t.due for t in self._tickers) - time.monotonic()
+        self._tick_timer.start(max(0, math.ceil(wait * 1000)))
+
+    def _tick(self):
+        now = time.monotonic()
+        for ticker in list(self._tickers):
+            if ticker.due > now + FrameScheduler.TIMER_SLACK_MS / 1000:
+                continue
+            if sip.isdeleted(ticker.widget):
+                self._tickers.remove(ticker)
+                continue
+            # skipped ticks are not made up for, the next one brings the widget up to date
+            ticker.due = FrameScheduler.next_boundary(ticker.interval_ms)
+            if ticker.due - now < FrameScheduler.TIMER_SLACK_MS / 1000:
+                # woken early within the slack, the boundary just ahead is this one
+                ticker.due += ticker.interval_ms / 1000
+            if ticker.run_hidden or self.is_painted(ticker.widget):
+                ticker.callback()
+            else:
+                self.skipped += 1
+        self._schedule_tick()
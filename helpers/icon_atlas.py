@@ -0,0 +1,201 @@
+import logging
+import math
+import os
+from threading import RLock
+from typing import Dict, Set, Tuple, Union
+
+from PyQt5.QtCore import Qt, QBuffer, QIODevice, QRectF, QByteArray
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtSvg import QSvgRenderer
+
+from helpers.settings_storage import DeferredSave, SettingsStorage
+from helpers.tools import PathManager
+
+SheetKey = Tuple[str, int, float]
+
+
+class _AtlasSheet:
+    """ square cells of one (folder, size, device pixel ratio), packed row by row into a single image """
+
+    def __init__(self, cell_size: int, columns: int, cells: Dict[str, int] = None, image: QImage = None):
+        self.cell_size = cell_size
+        self.columns = columns
+        self.cells = cells if cells is not None else {}  # type: Dict[str, int]
+        self.image = image if image is not None else self._empty_image(1)
+
+    def _empty_image(self, rows: int) -> QImage:
+        image = QImage(self.cell_size * self.columns, self.cell_size * rows, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        return image
+
+    def cell_rect(self, idx: int) -> Tuple[int, int, int, int]:
+        return (idx % self.columns) * self.cell_size, (idx // self.columns) * self.cell_size, \
+            self.cell_size, self.cell_size
+
+    def add(self, name: str, cell: QImage) -> int:
+        idx = len(self.cells)
+        rows = self.image.height() // self.cell_size
+        if idx >= rows * self.columns:
+            grown = self._empty_image(rows * 2)
+            painter = QPainter(grown)
+            painter.drawImage(0, 0, self.image)
+            painter.end()
+            self.image = grown
+        x, y, _, _ = self.cell_rect(idx)
+        painter = QPainter(self.image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(x, y, cell)
+        painter.end()
+        self.cells[name] = idx
+        return idx
+
+    def get(self, name: str) -> Union[None, QImage]:
+        if name not in self.cells:
+            return None
+        return self.image.copy(*self.cell_rect(self.cells[name]))
+
+
+class IconAtlas:
+    """
+    rasterizes icons once per (folder, file, size, device pixel ratio) into packed atlas images.
+    the atlas is persisted in the storage, so icons seen before are never rendered again.
+    new icons only mark their sheet dirty, dirty sheets are encoded and saved together after SAVE_DELAY seconds
+    and when the application quits.
+    images and data-uris may be requested from any thread, pixmaps only from the gui-thread.
+    """
+    VERSION = 1
+    COLUMNS = 16
+    STORAGE_NAME = 'icon_atlas'
+    SAVE_DELAY = 10.0
+
+    __SHARED__ = None  # type: Union[None, IconAtlas]
+
+    def __init__(self, storage_name: str = STORAGE_NAME):
+        self.storage_name = storage_name
+        self._lock = RLock()
+        self._sheets = {}  # type: Dict[SheetKey, _AtlasSheet]
+        self._pixmaps = {}  # type: Dict[Tuple[SheetKey, str], QPixmap]
+        self._data_uris = {}  # type: Dict[Tuple[SheetKey, str], str]
+        self.rasterized = 0
+        stored = SettingsStorage.load_or_default(storage_name, {})
+        # encoded sheets as last loaded or saved, sheets not used in this session are written back unchanged
+        self._stored = stored.get('sheets', {}) if stored.get('version') == IconAtlas.VERSION else {}
+        self._dirty = set()  # type: Set[SheetKey]
+        self._deferred_save = DeferredSave(self.save, IconAtlas.SAVE_DELAY)
+
+    @classmethod
+    def shared(cls) -> "IconAtlas":
+        if cls.__SHARED__ is None:
+            cls.__SHARED__ = IconAtlas()
+        return cls.__SHARED__
+
+    @staticmethod
+    def _split(path: str) -> Tuple[str, str]:
+        folder, name = os.path.split(os.path.abspath(path))
+        base = PathManager.__BASE_PATH__
+        if base is not None:
+            base = os.path.abspath(base)
+            if os.path.commonpath([base, folder]) == base:
+                folder = os.path.relpath(folder, base)
+        return folder, name
+
+    def _get_sheet(self, key: SheetKey) -> _AtlasSheet:
+        if key not in self._sheets:
+            cell_size = int(math.ceil(key[1] * key[2]))
+            stored = self._stored.get(key)
+            sheet = None
+            if stored is not None:
+                image = QImage.fromData(QByteArray(stored['png']), 'PNG')
+                if not image.isNull():
+                    image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+                    sheet = _AtlasSheet(cell_size, IconAtlas.COLUMNS, stored['cells'], image)
+            self._sheets[key] = sheet if sheet is not None else _AtlasSheet(cell_size, IconAtlas.COLUMNS)
+        return self._sheets[key]
+
+    @staticmethod
+    def _rasterize(path: str, cell_size: int) -> Union[None, QImage]:
+        cell = QImage(cell_size, cell_size, QImage.Format_ARGB32_Premultiplied)
+        cell.fill(Qt.transparent)
+        if path.lower().endswith('.svg'):
+            renderer = QSvgRenderer(path)
+            if not renderer.isValid():
+                return None
+            size = renderer.defaultSize()
+            width, height = max(size.width(), 1), max(size.height(), 1)
+            scale = cell_size / max(width, height)
+            painter = QPainter(cell)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            renderer.render(painter, QRectF((cell_size - width * scale) / 2, (cell_size - height * scale) / 2,
+                                            width * scale, height * scale))
+            painter.end()
+        else:
+            image = QImage(path)
+            if image.isNull():
+                return None
+            image = image.scaled(cell_size, cell_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            painter = QPainter(cell)
+            painter.drawImage((cell_size - image.width()) // 2, (cell_size - image.height()) // 2, image)
+            painter.end()
+        return cell
+
+    def image(self, path: str, size: int, dpr: float = 1.0) -> Union[None, QImage]:
+        """ returns the rasterized icon at path, None if it can not be read """
+        folder, name = self._split(path)
+        key = (folder, size, float(dpr))
+        with self._lock:
+            sheet = self._get_sheet(key)
+            image = sheet.get(name)
+            if image is None:
+                cell = self._rasterize(path, sheet.cell_size)
+                if cell is None:
+                    logging.getLogger(self.__class__.__name__).log(logging.WARNING, f'could not rasterize {path}')
+                    return None
+                self.rasterized += 1
+                sheet.add(name, cell)
+                self._dirty.add(key)
+                self._deferred_save.request()
+                image = sheet.get(name)
+        image.setDevicePixelRatio(dpr)
+        return image
+
+    def pixmap(self, path: str, size: int, dpr: float = 1.0) -> QPixmap:
+        folder, name = self._split(path)
+        cache_key = ((folder, size, float(dpr)), name)
+        if cache_key not in self._pixmaps:
+            image = self.image(path, size, dpr)
+            if image is None:
+                return QPixmap()
+            self._pixmaps[cache_key] = QPixmap.fromImage(image)
+        return self._pixmaps[cache_key]
+
+    def data_uri(self, path: str, size: int, dpr: float = 1.0) -> Union[None, str]:
+        folder, name = self._split(path)
+        cache_key = ((folder, size, float(dpr)), name)
+        with self._lock:
+            if cache_key not in self._data_uris:
+                image = self.image(path, size, dpr)
+                if image is None:
+                    return None
+                self._data_uris[cache_key] = f'data:image/png;base64,{self._encode(image).toBase64().data().decode()}'
+            return self._data_uris[cache_key]
+
+    @staticmethod
+    def _encode(image: QImage) -> QByteArray:
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, 'PNG')
+        return buffer.data()
+
+    def save(self):
+        """ encodes the dirty sheets and writes the atlas, the lock is only held to take a copy """
+        with self._lock:
+            dirty = {key: (dict(self._sheets[key].cells), QImage(self._sheets[key].image)) for key in self._dirty}
+            self._dirty = set()
+        if not dirty:
+            return
+        sheets = {key: {'cells': cells, 'png': bytes(self._encode(image))} for key, (cells, image) in dirty.items()}
+        with self._lock:
+            self._stored.update(sheets)
+            stored = dict(self._stored)
+        SettingsStorage.save({'version': IconAtlas.VERSION, 'sheets': stored}, self.storage_name)
@@ -0,0 +1,144 @@
+import copy
+import hashlib
+import logging
+import os
+import time
+from threading import Lock
+from typing import Dict, Tuple, Union
+
+from helpers.settings_storage import DeferredSave, SettingsStorage
+from helpers.tools import PathManager
+
+
+class MapImageEntry:
+    """ index entry of a cached map image. failed lookups are kept without a file and expire sooner """
+
+    def __init__(self, content_type: Union[None, str], size: int, fetched: float):
+        self.content_type = content_type
+        self.size = size
+        self.fetched = fetched
+        self.used = fetched
+
+    @property
+    def negative(self) -> bool:
+        return self.content_type is None
+
+
+class MapImageCache:
+    """
+    size-bounded lru cache of static map images on disk, below storage/map_images.
+    images are keyed by the normalized location, the image size and the zoom level.
+    entries expire after TTL, failed lookups after NEGATIVE_TTL, the least recently used
+    images are deleted once the files exceed MAX_BYTES.
+    images are written right away, the index (with the last use of every entry) is saved at most every SAVE_DELAY
+    seconds and when the application quits.
+    """
+    TTL = 30 * 24 * 3600
+    NEGATIVE_TTL = 24 * 3600
+    MAX_BYTES = 20 * 1024 * 1024
+    SAVE_DELAY = 10.0
+
+    def __init__(self, storage_name: str = 'map_image_cache', max_bytes: int = MAX_BYTES):
+        self.storage_name = storage_name
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._index = SettingsStorage.load_or_default(storage_name, {})  # type: Dict[str, MapImageEntry]
+        self._deferred_save = DeferredSave(self.save, MapImageCache.SAVE_DELAY)
+        self._remove_orphans()
+
+    @staticmethod
+    def normalize(location: str) -> str:
+        return ' '.join(location.split()).lower()
+
+    @staticmethod
+    def key(location: str, size: int, zoom: int) -> str:
+        return hashlib.sha1(f'{MapImageCache.normalize(location)}|{size}|{zoom}'.encode()).hexdigest()
+
+    def directory(self) -> str:
+        PathManager.make_path('storage')
+        PathManager.make_path(os.path.join('storage', 'map_images'))
+        return PathManager.join_path('storage', 'map_images')
+
+    def _remove_orphans(self):
+        """ images written after the last save of the index are unknown after a crash """
+        directory = PathManager.join_path('storage', 'map_images')
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if name not in self._index:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory(), key)
+
+    def _expired(self, entry: MapImageEntry, now: float) -> bool:
+        return now - entry.fetched > (MapImageCache.NEGATIVE_TTL if entry.negative else MapImageCache.TTL)
+
+    def __contains__(self, item: Tuple[str, int, int]) -> bool:
+        entry = self._index.get(self.key(*item))
+        return entry is not None and not self._expired(entry, time.time())
+
+    def get(self, location: str, size: int, zoom: int) -> Union[None, Tuple[Union[None, str], bytes]]:
+        """ (content type, image) or (None, b'') for a cached failure, None if there is nothing valid cached """
+        key = self.key(location, size, zoom)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, time.time()):
+                self._remove(key)
+                return None
+            entry.used = time.time()
+            self._deferred_save.request()
+            if entry.negative:
+                return None, b''
+            try:
+                with open(self._path(key), 'rb') as f:
+                    return entry.content_type, f.read()
+            except IOError:
+                self._remove(key)
+                return None
+
+    def put(self, location: str, size: int, zoom: int, content_type: Union[None, str], data: bytes = b''):
+        """ stores an image, or a failed lookup with content_type None """
+        key = self.key(location, size, zoom)
+        with self._lock:
+            if content_type is not None:
+                with open(self._path(key), 'wb') as f:
+                    f.write(data)
+            self._index[key] = MapImageEntry(content_type, len(data) if content_type is not None else 0, time.time())
+            self._evict()
+        self._deferred_save.request()
+
+    def save(self):
+        with self._lock:
+            index = {key: copy.copy(entry) for key, entry in self._index.items()}
+        SettingsStorage.save(index, self.storage_name)
+
+    def _remove(self, key: str):
+        self._deferred_save.request()
+        entry = self._index.pop(key, None)
+        if entry is not None and not entry.negative:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, e in self._index.items() if self._expired(e, now)]:
+            self._remove(key)
+        total = sum(e.size for e in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda i: i[1].used):
+            if total <= self.max_bytes:
+                break
+            total -= entry.size
+            self._remove(key)
+        logging.getLogger(self.__class__.__name__).log(logging.DEBUG, f'{len(self._index)} entries, {total} bytes')
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.size for e in self._index.values())
@@ -0,0 +1,233 @@
+import bisect
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from functools import wraps
+from threading import Lock, local
+from typing import Dict, Tuple, List, Union, Callable
+
+from helpers.tools import PathManager
+from helpers.tracing import Tracer
+
+
+class MetricStage:
+    FETCH = 'fetch'
+    PARSE = 'parse'
+    EXPAND = 'expand'
+    DIFF = 'diff'
+    LAYOUT = 'layout'
+    PAINT = 'paint'
+    RENDER = 'render'
+    UPDATE = 'update'
+
+
+class LatencyHistogram:
+    """ fixed, logarithmic buckets in milliseconds. cheap to record and to compare between runs """
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+    def __init__(self):
+        self.buckets = [0] * len(LatencyHistogram.BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.buckets[bisect.bisect_left(LatencyHistogram.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms < self.min_ms:
+            self.min_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """ upper bound of the bucket holding the p-th percentile, capped by the largest value seen """
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(LatencyHistogram.BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'total_ms': round(self.total_ms, 3),
+                'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+                'min_ms': round(self.min_ms, 3) if self.count else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'p50_ms': self.percentile(50),
+                'p95_ms': self.percentile(95),
+                'buckets': {str(bound): n for bound, n in zip(LatencyHistogram.BUCKETS_MS, self.buckets) if n}}
+
+
+class _NullMeasurement:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Measurement:
+    """ records the latency of a stage, and a span of it while tracing """
+
+    def __init__(self, component: str, stage: str):
+        self.key = (component, stage)
+        trace_id = Tracer.paint_trace() if stage == MetricStage.PAINT else None
+        self.span = Tracer.span(f'{component}.{stage}', stage, trace_id)
+        self.start = 0.0
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        Metrics.observe(*self.key, seconds=time.perf_counter() - self.start)
+        self.span.__exit__(*args)
+        return False
+
+
+class Metrics:
+    """
+    in-process registry of counters, gauges and latency histograms, keyed by (component, stage).
+    recording is off by default, then every call returns right after checking 'enabled'.
+    measured stages also show up as spans while the Tracer is enabled.
+    """
+    enabled = os.environ.get('DESKTOP_WIDGETS_METRICS', '') not in ('', '0')
+
+    _lock = Lock()
+    _counters = {}  # type: Dict[Tuple[str, str], int]
+    _gauges = {}  # type: Dict[Tuple[str, str], float]
+    _histograms = {}  # type: Dict[Tuple[str, str], LatencyHistogram]
+    _started = datetime.now()
+    _NULL = _NullMeasurement()
+    # (object, method name, stage) of the timed calls running on this thread
+    _timing = local()
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        cls.enabled = enabled
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters = {}
+            cls._gauges = {}
+            cls._histograms = {}
+            cls._started = datetime.now()
+
+    @classmethod
+    def count(cls, component: str, stage: str, amount: int = 1):
+        if not cls.enabled:
+            return
+        with cls._lock:
+            cls._counters[(component, stage)] = cls._counters.get((component, stage), 0) + amount
+
+    @classmethod
+    def gauge(cls, component: str, stage: str, value: float):
+        if not cls.enabled:
+            return
+        with cls._lock:
+            cls._gauges[(component, stage)] = value
+
+    @classmethod
+    def observe(cls, component: str, stage: str, seconds: float):
+        if not cls.enabled:
+            return
+        with cls._lock:
+            histogram = cls._histograms.get((component, stage))
+            if histogram is None:
+                histogram = cls._histograms[(component, stage)] = LatencyHistogram()
+            histogram.add(seconds * 1000)
+
+    @classmethod
+    def measure(cls, component: str, stage: str) -> Union[_Measurement, _NullMeasurement]:
+        """ context manager recording the latency of its block """
+        if not cls.enabled and not Tracer.enabled:
+            return cls._NULL
+        return _Measurement(component, stage)
+
+    @staticmethod
+    def timed(stage: str) -> Callable:
+        """
+        decorator recording the latency of a method, keyed by the class of its first argument.
+        an overridden method calling the timed method of its base class through super() is recorded once,
+        by the outermost call. put it below @classmethod/@staticmethod.
+        """
+        def decorator(method):
+            @wraps(method)
+            def wrapper(*args, **kwargs):
+                if not Metrics.enabled and not Tracer.enabled:
+                    return method(*args, **kwargs)
+                owner = args[0] if args else None
+                running = getattr(Metrics._timing, 'running', None)
+                if running is None:
+                    running = Metrics._timing.running = set()
+                key = (id(owner), method.__name__, stage)
+                if key in running:
+                    return method(*args, **kwargs)
+                component = owner.__name__ if isinstance(owner, type) else \
+                    owner.__class__.__name__ if owner is not None else method.__qualname__
+                running.add(key)
+                try:
+                    with _Measurement(component, stage):
+                        return method(*args, **kwargs)
+                finally:
+                    running.discard(key)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        with cls._lock:
+            return {'started': cls._started.isoformat(timespec='seconds'),
+                    'taken': datetime.now().isoformat(timespec='seconds'),
+                    'counters': [{'component': c, 'stage': s, 'value': v}
+                                 for (c, s), v in sorted(cls._counters.items())],
+                    'gauges': [{'component': c, 'stage': s, 'value': v}
+                               for (c, s), v in sorted(cls._gauges.items())],
+                    'histograms': [{'component': c, 'stage': s, **h.to_dict()}
+                                   for (c, s), h in sorted(cls._histograms.items())]}
+
+    @classmethod
+    def summary(cls) -> str:
+        snapshot = cls.snapshot()
+        lines = [f'{"component":<28}{"stage":<10}{"count":>7}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}']
+        for h in snapshot['histograms']:
+            lines.append(f'{h["component"]:<28}{h["stage"]:<10}{h["count"]:>7}{h["mean_ms"]:>10.1f}'
+                         f'{h["p50_ms"]:>10.1f}{h["p95_ms"]:>10.1f}{h["max_ms"]:>10.1f}')
+        for kind in ('counters', 'gauges'):
+            if snapshot[kind]:
+                lines.append('')
+                lines.extend(f'{m["component"]:<28}{m["stage"]:<10}{m["value"]:>7}' for m in snapshot[kind])
+        return '\n'.join(lines)
+
+    @classmethod
+    def export(cls, filename: str = None) -> List[str]:
+        """ writes the current snapshot as json and csv into the storage directory, returns both paths """
+        snapshot = cls.snapshot()
+        if filename is None:
+            filename = f'metrics_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        PathManager.make_path('storage')
+        json_path = PathManager.join_path('storage', f'{filename}.json')
+        with open(json_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        csv_path = PathManager.join_path('storage', f'{filename}.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'component', 'stage', 'count', 'value', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+            for m in snapshot['counters']:
+                writer.writerow(['counter', m['component'], m['stage'], '', m['value'], '', '', '', ''])
+            for m in snapshot['gauges']:
+                writer.writerow(['gauge', m['component'], m['stage'], '', m['value'], '', '', '', ''])
+            for h in snapshot['histograms']:
+                writer.writerow(['histogram', h['component'], h['stage'], h['count'], h['total_ms'],
+                                 h['mean_ms'], h['p50_ms'], h['p95_ms'], h['max_ms']])
+        return [json_path, csv_path]
@@ -1,5 +1,9 @@
 import logging
 import pickle
+from threading import Lock, Timer
+from typing import Callable, Union
+
+from PyQt5.QtCore import QCoreApplication
 
 from helpers.tools import PathManager
 
@@ -31,5 +35,50 @@ class SettingsStorage:
             return default
 
 
+class DeferredSave:
+    """
+    batches the saves of something that changes often.
+    request() runs the writer once after delay seconds on a timer thread, no matter how often it was requested
+    in between. pending saves are flushed when the application quits.
+    """
+
+    def __init__(self, writer: Callable[[], None], delay: float):
+        self.writer = writer
+        self.delay = delay
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._timer = None  # type: Union[None, Timer]
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    @property
+    def pending(self) -> bool:
+        return self._timer is not None
+
+    def request(self):
+        with self._lock:
+            if self._timer is None:
+                self._timer = Timer(self.delay, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        with self._write_lock:
+            self.writer()
+
+    def flush(self):
+        """ runs a pending save right away, waits for one that is already running """
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        with self._write_lock:
+            if timer is not None:
+                self.writer()
+
+
 class YamlSettings:
     pass
@@ -0,0 +1,49 @@
+import signal
+import socket
+from typing import Union
+
+from PyQt5.QtCore import QObject, QSocketNotifier
+
+
+class SignalWakeup(QObject):
+    """
+    lets python signal handlers run while qt sleeps in its event loop.
+    python only runs handlers when it gets control back, instead of polling with a timer
+    the signal byte written to the wakeup fd wakes a socket notifier, which hands control to python.
+    """
+    __INSTALLED__ = None  # type: Union[None, SignalWakeup]
+
+    def __init__(self, parent: QObject = None):
+        super(SignalWakeup, self).__init__(parent)
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._previous_fd = signal.set_wakeup_fd(self._writer.fileno(), warn_on_full_buffer=False)
+        self.notifier = QSocketNotifier(self._reader.fileno(), QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self._drain)
+
+    @classmethod
+    def install(cls) -> 'SignalWakeup':
+        if cls.__INSTALLED__ is None:
+            cls.__INSTALLED__ = SignalWakeup()
+        return cls.__INSTALLED__
+
+    @classmethod
+    def uninstall(cls):
+        if cls.__INSTALLED__ is not None:
+            cls.__INSTALLED__.close()
+            cls.__INSTALLED__ = None
+
+    def _drain(self, *args):
+        # the handlers already ran when this slot was entered, only the buffer needs to be emptied
+        try:
+            while self._reader.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        signal.set_wakeup_fd(self._previous_fd)
+        self._reader.close()
+        self._writer.close()
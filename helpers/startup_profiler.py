@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Tuple, Set
+
+from PyQt5.QtCore import QObject, QEvent, QTimer
+
+from helpers.tools import PathManager
+
+
+class _Step:
+    def __init__(self, label: str):
+        self.label = label
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        StartupProfiler.add(self.label, self.start, time.perf_counter())
+        return False
+
+
+class _NullStep:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _FirstPaintFilter(QObject):
+    def __init__(self, label: str, parent: QObject):
+        super().__init__(parent)
+        self.label = label
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Paint:
+            StartupProfiler.mark_once(self.label)
+            watched.removeEventFilter(self)
+            self.deleteLater()
+        return False
+
+
+class StartupProfiler:
+    """
+    records the steps of a start: imports, settings restore, widget construction,
+    first plugin data and first paint of every widget.
+    enabled by '--profile-startup' or DESKTOP_WIDGETS_PROFILE_STARTUP, the report is written to the storage directory.
+    """
+    enabled = '--profile-startup' in sys.argv or \
+        os.environ.get('DESKTOP_WIDGETS_PROFILE_STARTUP', '') not in ('', '0')
+    REPORT_DELAY_SECONDS = 30
+
+    _origin = time.perf_counter()
+    _steps = []  # type: List[Tuple[str, float, float]]
+    _marks = set()  # type: Set[str]
+    _NULL = _NullStep()
+
+    @classmethod
+    def measure(cls, label: str):
+        if not cls.enabled:
+            return cls._NULL
+        return _Step(label)
+
+    @classmethod
+    def add(cls, label: str, start: float, end: float):
+        cls._steps.append((label, start - cls._origin, end - start))
+
+    @classmethod
+    def mark(cls, label: str):
+        """ records a point in time, e.g. when something became visible """
+        if cls.enabled:
+            now = time.perf_counter()
+            cls.add(label, now, now)
+
+    @classmethod
+    def mark_once(cls, label: str):
+        if cls.enabled and label not in cls._marks:
+            cls._marks.add(label)
+            cls.mark(label)
+
+    @classmethod
+    def watch_first_paint(cls, widget: QObject):
+        if cls.enabled:
+            widget.installEventFilter(_FirstPaintFilter(f'first paint {widget.__class__.__name__}', widget))
+
+    @classmethod
+    def report(cls) -> str:
+        lines = [f'{"at ms":>10}{"took ms":>10}  step']
+        for label, offset, duration in sorted(cls._steps, key=lambda s: s[1]):
+            lines.append(f'{offset * 1000:>10.1f}{duration * 1000:>10.1f}  {label}')
+        return '\n'.join(lines)
+
+    @classmethod
+    def write_report(cls) -> str:
+        filename = f'startup_profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        PathManager.make_path('storage')
+        with open(PathManager.join_path('storage', f'{filename}.json'), 'w') as f:
+            json.dump([{'step': label, 'at_ms': round(offset * 1000, 3), 'took_ms': round(duration * 1000, 3)}
+                       for label, offset, duration in sorted(cls._steps, key=lambda s: s[1])], f, indent=2)
+        path = PathManager.join_path('storage', f'{filename}.txt')
+        with open(path, 'w') as f:
+            f.write(cls.report())
+        return path
+
+    @classmethod
+    def schedule_report(cls, callback=None):
+        """ writes the report once the widgets had time to receive their first data """
+        if not cls.enabled:
+            return
+
+        def write():
+            path = cls.write_report()
+            if callback is not None:
+                callback(path)
+        QTimer.singleShot(cls.REPORT_DELAY_SECONDS * 1000, write)
@@ -1,3 +1,4 @@
+import importlib
 import os
 import time
 from pathlib import Path
@@ -9,6 +10,13 @@ from PyQt5.QtGui import QPixmap
 
 DEBUG = False
 
+
+def import_class(path: str) -> type:
+    """ resolves 'package.module.ClassName', importing the module on first use """
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
 def time_method(method):
     def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -25,14 +33,19 @@ class SignalWrapper(object):
     Wrapper class to use for non QObjects
     """
 
+    __WRAPPERS__ = {}
+
     def create_wrapper(self, *args):
-        class Wrapper(QObject):
-            signal = pyqtSignal(*args)
+        # one class per signature, these are created for every thread/task
+        if args not in SignalWrapper.__WRAPPERS__:
+            class Wrapper(QObject):
+                signal = pyqtSignal(*args)
 
-            def __init__(self):
-                super().__init__()
+                def __init__(self):
+                    super().__init__()
 
-        return Wrapper
+            SignalWrapper.__WRAPPERS__[args] = Wrapper
+        return SignalWrapper.__WRAPPERS__[args]
 
     def __init__(self, *args):
         self.wrapped = self.create_wrapper(*args)()
@@ -0,0 +1,170 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Union, Deque, Set
+
+from PyQt5.QtCore import QTimer
+
+from helpers.tools import PathManager
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Span:
+    def __init__(self, name: str, category: str, trace_id: Union[None, int], args: dict):
+        self.name = name
+        self.category = category
+        self.trace_id = trace_id
+        self.args = args
+        self.start = 0.0
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = Tracer.current()
+        Tracer._local.trace_id = self.trace_id
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        Tracer.record(self.name, self.start, time.perf_counter(), self.category, self.trace_id, self.args)
+        Tracer._local.trace_id = self.previous
+        return False
+
+
+class _Activation:
+    def __init__(self, trace_id: Union[None, int]):
+        self.trace_id = trace_id
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = Tracer.current()
+        Tracer._local.trace_id = self.trace_id
+        return self
+
+    def __exit__(self, *args):
+        Tracer._local.trace_id = self.previous
+        return False
+
+
+class Tracer:
+    """
+    span based tracing of plugin updates, from the request over the worker thread and the
+    queued delivery to the gui-thread up to the following paint.
+    the trace id of a refresh travels thread-locally and with the worker-pool tasks,
+    the recorded spans are exported as chrome-trace json (opens in perfetto or chrome://tracing).
+    """
+    enabled = os.environ.get('DESKTOP_WIDGETS_TRACING', '') not in ('', '0')
+    MAX_EVENTS = 100000
+
+    _local = threading.local()
+    _lock = threading.Lock()
+    _events = deque(maxlen=MAX_EVENTS)  # type: Deque[dict]
+    _ids = itertools.count(1)
+    _flows = set()  # type: Set[int]
+    _threads = set()  # type: Set[int]
+    _pending_paint = None  # type: Union[None, int]
+    _paint_clear_scheduled = False
+    _origin = time.perf_counter()
+    _NULL = _NullSpan()
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        cls.enabled = enabled
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._events.clear()
+            cls._flows = set()
+            cls._threads = set()
+
+    @classmethod
+    def new_trace(cls) -> Union[None, int]:
+        return next(cls._ids) if cls.enabled else None
+
+    @classmethod
+    def current(cls) -> Union[None, int]:
+        """ the trace the calling thread is working for """
+        return getattr(cls._local, 'trace_id', None)
+
+    @classmethod
+    def activate(cls, trace_id: Union[None, int]) -> Union[_Activation, _NullSpan]:
+        """ continues a trace in this thread without recording a span """
+        if trace_id is None:
+            return cls._NULL
+        return _Activation(trace_id)
+
+    @classmethod
+    def span(cls, name: str, category: str = '', trace_id: int = None, **args) -> Union[_Span, _NullSpan]:
+        if not cls.enabled:
+            return cls._NULL
+        return _Span(name, category, trace_id if trace_id is not None else cls.current(), args)
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    @classmethod
+    def record(cls, name: str, start: float, end: float, category: str = '',
+               trace_id: int = None, args: dict = None):
+        if not cls.enabled:
+            return
+        pid = os.getpid()
+        tid = threading.get_ident()
+        ts = (start - cls._origin) * 1e6
+        event = {'name': name, 'cat': category or 'span', 'ph': 'X', 'ts': ts, 'dur': (end - start) * 1e6,
+                 'pid': pid, 'tid': tid, 'args': dict(args or {})}
+        with cls._lock:
+            if tid not in cls._threads:
+                cls._threads.add(tid)
+                cls._events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                    'args': {'name': threading.current_thread().name}})
+            if trace_id is not None:
+                event['args']['trace_id'] = trace_id
+                # flow events draw the arrows between the spans of one trace across threads
+                cls._events.append({'name': 'update', 'cat': 'trace', 'ph': 't' if trace_id in cls._flows else 's',
+                                    'id': trace_id, 'bp': 'e', 'ts': ts, 'pid': pid, 'tid': tid})
+                cls._flows.add(trace_id)
+            cls._events.append(event)
+
+    @classmethod
+    def request_paint(cls):
+        """ attributes the next paint pass to the current trace """
+        if cls.enabled and cls.current() is not None:
+            cls._pending_paint = cls.current()
+
+    @classmethod
+    def paint_trace(cls) -> Union[None, int]:
+        """ the trace a paint belongs to, all widgets painted in the same pass share it """
+        if cls._pending_paint is not None and not cls._paint_clear_scheduled:
+            cls._paint_clear_scheduled = True
+            QTimer.singleShot(0, cls._clear_paint)
+        return cls._pending_paint
+
+    @classmethod
+    def _clear_paint(cls):
+        cls._pending_paint = None
+        cls._paint_clear_scheduled = False
+
+    @classmethod
+    def export(cls, filename: str = None) -> str:
+        """ writes the recorded spans as chrome-trace json into the storage directory """
+        if filename is None:
+            filename = f'trace_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        with cls._lock:
+            events = list(cls._events)
+        PathManager.make_path('storage')
+        path = PathManager.join_path('storage', f'{filename}.json')
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
@@ -1,3 +1,6 @@
+from array import array
+from typing import List, Tuple, Any, Dict, Iterable
+
 from PyQt5.QtCore import QRect, QPointF, Qt
 from PyQt5.QtGui import QPainterPath, QPainter, QBrush, QLinearGradient, QPen, QColor
 
@@ -6,11 +9,14 @@ from helpers.widget_helpers import SmoothPath
 
 
 class ValueVisualization:
+    # horizontal pixel rows that share one min/max pair of points
+    LOD_BUCKET_PIXELS = 2
 
     def __init__(self, display_hour_start: int, display_hour_end: int):
         self.displayed_hours = display_hour_end - display_hour_start
         self.path = QPainterPath()
         self.range = (0, 1)
+        self.points = []  # type: List[Tuple[float, float, Any]]
 
     def add_data_point(self, data_point: WeatherDataType, rect: QRect, y):
         raise NotImplementedError()
@@ -27,6 +33,32 @@ class ValueVisualization:
         except TypeError:
             return 0.0
 
+    @classmethod
+    def decimate(cls, points: List[Tuple[float, float, Any]], rect: QRect) -> List[Tuple[float, float, Any]]:
+        """
+        min/max decimation of (x, y, payload) points down to the pixel resolution of rect.
+        keeps the first and last point and the lowest and highest value of every bucket of pixel rows,
+        so peaks survive and the number of points is bounded by the height of rect.
+        """
+        if len(points) <= 2 or len(points) <= rect.height() / cls.LOD_BUCKET_PIXELS:
+            return points
+        keep = {0, len(points) - 1}
+        bucket = None
+        low = high = 0
+        for i, (x, y, _) in enumerate(points):
+            b = int((y - rect.y()) // cls.LOD_BUCKET_PIXELS)
+            if b != bucket:
+                if bucket is not None:
+                    keep.update((low, high))
+                bucket = b
+                low = high = i
+            elif x < points[low][0]:
+                low = i
+            elif x > points[high][0]:
+                high = i
+        keep.update((low, high))
+        return [points[i] for i in sorted(keep)]
+
 
 class PrecipitationVisualization(ValueVisualization):
     def __init__(self, display_hour_start: int, display_hour_end: int):
@@ -53,13 +85,10 @@ class PrecipitationVisualization(ValueVisualization):
 
     def add_data_point(self, data_point: Precipitation, rect: QRect, y):
         x = self.scaled(data_point.get_intensity()['value'], rect.x(), rect.width())
-        point = QPointF(x, y)
+        brush_data = None
         if data_point.get_probability()['value'] is not None:
-            self.brush_data_points.append(BrushDataPoint.from_precipitation(data_point, y))
-        if self.path.elementCount() == 0:
-            self._start_path(point)
-        else:
-            self.path.lineTo(point)
+            brush_data = BrushDataPoint.from_precipitation(data_point, y)
+        self.points.append((x, y, brush_data))
 
     def add_brush_data_point(self):
         raise NotImplementedError()
@@ -68,8 +97,16 @@ class PrecipitationVisualization(ValueVisualization):
         self.path.moveTo(point)
 
     def complete_path(self, painter: QPainter, rect: QRect):
-        if self.path.elementCount() < 1:
+        if not self.points:
             return
+        for x, y, brush_data in self.decimate(self.points, rect):
+            if brush_data is not None:
+                self.brush_data_points.append(brush_data)
+            if self.path.elementCount() == 0:
+                self._start_path(QPointF(x, y))
+            else:
+                self.path.lineTo(QPointF(x, y))
+        self.points = []
 
         # if in last hour -> close day completely up to border, otherwise cut at last data-point
         if ((rect.y()+rect.height()) - self.path.elementAt(self.path.elementCount() - 1).y) < \
@@ -134,11 +171,7 @@ class TemperatureVisualization(ValueVisualization):
 
     def add_data_point(self, data_point: Temperature, rect: QRect, y):
         x = self.scaled(data_point.get_temperature()['value'], rect.x(), rect.width())
-        point = QPointF(x, y)
-        if self.path.elementCount() == 0:
-            self.start_path(point, rect)
-        else:
-            self.path.lineTo(point)
+        self.points.append((x, y, None))
 
     def add_brush_data_point(self):
         raise NotImplementedError()
@@ -154,8 +187,14 @@ class TemperatureVisualization(ValueVisualization):
             self.path.moveTo(point)
 
     def complete_path(self, painter: QPainter, rect: QRect):
-        if self.path.elementCount() < 1:
+        if not self.points:
             return
+        for x, y, _ in self.decimate(self.points, rect):
+            if self.path.elementCount() == 0:
+                self.start_path(QPointF(x, y), rect)
+            else:
+                self.path.lineTo(QPointF(x, y))
+        self.points = []
         # if in last hour -> close day completely up to border, otherwise cut at last data-point
         if ((rect.y()+rect.height()) - self.path.elementAt(self.path.elementCount() - 1).y) < \
                 (float(rect.height())/self.displayed_hours):
@@ -205,6 +244,52 @@ class BrushDataPoint:
         }[precipitation_type]
 
 
+class TemperatureColorLUT:
+    """
+    precomputed temperature -> packed ARGB lookup table, interpolated linearly between the given colors.
+    temperatures outside of the table are clamped to its first/last entry.
+    """
+    RESOLUTION = 0.1
+
+    def __init__(self, colors: Dict[int, QColor], resolution: float = RESOLUTION):
+        self.resolution = resolution
+        self._scale = 1.0 / resolution
+        self.min_temp = min(colors.keys())
+        self.max_temp = max(colors.keys())
+        self.table = array('I')
+        keys = sorted(colors.keys())
+        upper = 1
+        for step in range(int(round((self.max_temp - self.min_temp) / resolution)) + 1):
+            temp = self.min_temp + step * resolution
+            while upper < len(keys) - 1 and temp > keys[upper]:
+                upper += 1
+            low, high = keys[upper - 1], keys[upper]
+            perc = min(max((temp - low) / (high - low), 0.0), 1.0)
+            low_rgba, high_rgba = colors[low].getRgb(), colors[high].getRgb()
+            self.table.append(QColor(*[int(perc * (h - l) + l) for l, h in zip(low_rgba, high_rgba)]).rgba())
+        self._size = len(self.table)
+
+    def index(self, temp: float) -> int:
+        idx = int((temp - self.min_temp) * self._scale + 0.5)
+        if idx < 0:
+            return 0
+        return idx if idx < self._size else self._size - 1
+
+    def rgba(self, temp: float) -> int:
+        return self.table[self.index(temp)]
+
+    def color(self, temp: float) -> QColor:
+        return QColor.fromRgba(self.table[self.index(temp)])
+
+    def colors_for(self, temps: Iterable[float]) -> array:
+        """ maps a whole column of temperatures to packed ARGB values in one call """
+        table = self.table
+        last = self._size - 1
+        min_temp = self.min_temp
+        scale = self._scale
+        return array('I', [table[min(max(int((t - min_temp) * scale + 0.5), 0), last)] for t in temps])
+
+
 class TemperatureGradient(QLinearGradient):
     TEMP_COLORS = {
         -20: QColor(103, 62, 241),  # deep blue
@@ -218,6 +303,9 @@ class TemperatureGradient(QLinearGradient):
         40: QColor(247, 1, 113)   # pink
     }
 
+    LUT = TemperatureColorLUT(TEMP_COLORS)
+    __STOPS__ = {}  # type: Dict[Tuple[float, float], List[Tuple[float, QColor]]]
+
     def __init__(self, start_point, end_point, min_temp=0, max_temp=40):
         super().__init__(start_point, end_point)
         self.min_temp = min_temp
@@ -225,33 +313,24 @@ class TemperatureGradient(QLinearGradient):
         self.re_init()
 
     def re_init(self):
-        self.setColorAt(0.0, self.TEMP_COLORS[min(self.TEMP_COLORS.keys())])
-        self.setColorAt(1.0, self.TEMP_COLORS[max(self.TEMP_COLORS.keys())])
-        for temp, color in self.TEMP_COLORS.items():
-            if self.min_temp <= temp <= self.max_temp:
-                percentage = temp / (self.max_temp - self.min_temp)
-                self.setColorAt(percentage, color)
+        self.setStops(self.get_stops(self.min_temp, self.max_temp))
+
+    @classmethod
+    def get_stops(cls, min_temp, max_temp) -> List[Tuple[float, QColor]]:
+        key = (min_temp, max_temp)
+        if key not in cls.__STOPS__:
+            stops = {
+                0.0: cls.LUT.color(cls.LUT.min_temp),
+                1.0: cls.LUT.color(cls.LUT.max_temp)
+            }
+            for temp in cls.TEMP_COLORS.keys():
+                if min_temp <= temp <= max_temp:
+                    percentage = temp / (max_temp - min_temp)
+                    if 0.0 <= percentage <= 1.0:
+                        stops[percentage] = cls.LUT.color(temp)
+            cls.__STOPS__[key] = sorted(stops.items())
+        return cls.__STOPS__[key]
 
     @staticmethod
     def get_color_for_temperature(temp: float):
-        temp = int(temp)
-        min_temp = min(TemperatureGradient.TEMP_COLORS.keys())
-        max_temp = max(TemperatureGradient.TEMP_COLORS.keys())
-        for t, color in TemperatureGradient.TEMP_COLORS.items():
-            if temp >= t > min_temp:
-                min_temp = t
-            if temp <= t < max_temp:
-                max_temp = t
-        diff = max_temp - min_temp
-        if diff == 0:
-            return TemperatureGradient.TEMP_COLORS[min_temp]
-        perc = (temp-min_temp) / diff
-        min_col = TemperatureGradient.TEMP_COLORS[min_temp]
-        max_col = TemperatureGradient.TEMP_COLORS[max_temp]
-
-        def interpolate(low, high, percentage: float):
-            rng = high-low
-            return (percentage * rng) + low
-
-        return QColor(*[int(interpolate(getattr(min_col, c)(), getattr(max_col, c)(), perc))
-                        for c in ['red', 'green', 'blue']])
+        return TemperatureGradient.LUT.color(temp)
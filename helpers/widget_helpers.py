@@ -1,12 +1,22 @@
+import base64
+import logging
 import math
-from urllib.parse import quote
 
 import requests
-from PyQt5.QtCore import QPointF, Qt, pyqtSignal, QRect, QPoint, QRectF
-from PyQt5.QtGui import QPainterPath, QPainter, QFont, QFontMetrics, QBrush, QTextOption, QColor, QPaintEvent
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Union, Iterable, Tuple
+
+from PyQt5.QtCore import QPointF, Qt, pyqtSignal, QRect, QPoint, QRectF, QSize, QSizeF, QTimer
+from PyQt5.QtGui import QPainterPath, QPainter, QFont, QFontMetrics, QFontMetricsF, QBrush, QTextOption, QColor, \
+    QPaintEvent, QResizeEvent
 from PyQt5.QtWidgets import QWidget, QSizePolicy
 
+from helpers.event_layout import EventLayout, ColumnLayout
+from helpers.map_image_cache import MapImageCache
+from helpers.metrics import Metrics, MetricStage
 from helpers.tools import LRUCache
+from helpers.worker_pool import WorkerPool, TaskPriority, WorkerTask
 
 
 class ResizeHelper:
@@ -174,125 +184,122 @@ class SideGrip(QWidget):
 
 class CalendarHelper:
 
-    #############################################
-    #  Scaling conflicting events in column,    #
-    #  gladly adapted from                      #
-    #  https://stackoverflow.com/a/62812752     #
-    #############################################
-
     @classmethod
+    @Metrics.timed(MetricStage.LAYOUT)
     def scale_events(cls, cal_events, col_width, col_height,
                      start_hour, end_hour,
                      direction=Qt.Vertical,
-                     rect_func=None, col_rescale_func=None):
-        # Based on algorithm described here: http://stackoverflow.com/questions/11311410
-        columns = []
-        last_event_ending = None
-        events = sorted(cal_events, key=lambda x: (x.begin, x.end))
-        # print([e.summary for e in events])
-        for event in events:
-            # Check if a new event group needs to be started
-            if last_event_ending is not None and event.begin >= last_event_ending:
-                # The latest event is later than any of the event in the
-                #   current group. There is no overlap. Output the current
-                #   event group and start a new event group.
-                cls.pack_events(columns, col_width, col_height, start_hour, end_hour,
-                                direction, rect_func, col_rescale_func)
-                columns = []  # This starts new event group.
-                last_event_ending = None
-            # Try to place the event inside the existing columns
-            placed = False
-            for i in range(len(columns)):
-                col = columns[i]
-                if not cls.collides_with(col[-1], event):
-                    col.append(event)
-                    placed = True
-                    break
-
-            # It was not possible to place the event. Add a new column
-            #  for the current event group.
-            if not placed:
-                columns.append([event])
-
-            # Remember the latest event end time of the current group.
-            #  This is later used to determine if a new group starts.
-            if last_event_ending is None or event.end > last_event_ending:
-                last_event_ending = event.end
-        if len(columns) > 0:
-            cls.pack_events(columns, col_width, col_height, start_hour, end_hour, direction,
-                            rect_func, col_rescale_func)
+                     rect_func=None, col_rescale_func=None, layout: ColumnLayout = None):
+        groups = layout.groups(cal_events) if layout is not None else None
+        for event, rect in EventLayout.rects(cal_events, col_width, col_height, start_hour, end_hour,
+                                             direction, rect_func, col_rescale_func, groups):
+            event.setGeometry(rect)
 
     @classmethod
-    def pack_events(cls, columns, col_width, col_height,
-                    start_hour, end_hour,
-                    direction, rect_func=None, col_rescale_func=None):
-        number_of_columns = len(columns)
-        hour_height = (col_height / (end_hour-start_hour))
-        if col_rescale_func is not None:
-            col_width, col_height = col_rescale_func(number_of_columns)
-        for i in range(number_of_columns):
-            current_column = columns[i]
-            for j in range(len(current_column)):
-                event = current_column[j]  # type: QWidget
-                event_column_span = cls.expand_event(event, i, columns)
-                if direction == Qt.Vertical:
-                    left_offset_percentage = (i / number_of_columns)  # percent
-                    width = col_width * event_column_span / number_of_columns-1
-                    start_y = int(max(0, event.begin-start_hour) * hour_height)
-                    event_height = min(int((event.end - max(event.begin, start_hour)) * hour_height), col_height - start_y)
-                    event.setGeometry(int(col_width * left_offset_percentage),
-                                      start_y,
-                                      int(width),
-                                      event_height
-                                      # int((event.end - event.begin) * hour_height)
-                                      )
-                elif direction == Qt.Horizontal:
-                    if rect_func is not None:
-                        rect = rect_func(event)  # type: QRect
-                        top_offset_percentage = (i / number_of_columns)
-                        height = int(col_height * event_column_span / number_of_columns-1)
-                        rect.setTop(int(col_height * top_offset_percentage + rect.top()))
-                        rect.setHeight(height)
-                        event.setGeometry(rect)
+    @Metrics.timed(MetricStage.LAYOUT)
+    def scale_moved_event(cls, layout: ColumnLayout, cal_events, moved_event, begin, end,
+                          col_width, col_height, start_hour, end_hour,
+                          direction=Qt.Vertical,
+                          rect_func=None, col_rescale_func=None):
+        """
+        re-lays out only the groups a dragged event leaves and joins, as if it was at begin-end.
+        returns the box of the dragged event, placing it is left to the caller
+        """
+        layout.groups(cal_events, moved={moved_event: (begin, end)})
+        moved_rect = None
+        for event, rect in EventLayout.rects(cal_events, col_width, col_height, start_hour, end_hour,
+                                             direction, rect_func, col_rescale_func, layout.changed):
+            if event is moved_event:
+                moved_rect = rect
+            else:
+                event.setGeometry(rect)
+        return moved_rect
 
     @classmethod
     def collides_with(cls, a, b):
         return a.end > b.begin and a.begin < b.end
 
-    @classmethod
-    def expand_event(cls, event, col_idx, columns):
-        event_column_span = 0
-        for i in range(col_idx, len(columns)):
-            current_column = columns[i]
-            for j in range(len(current_column)):
-                other_event = current_column[j]
-                if other_event == event:
-                    continue
-                if cls.collides_with(event, other_event):
-                    return event_column_span
-            event_column_span += 1
-        return event_column_span
-
 
 class TextSizeHelper:
-    cache = LRUCache(max_len=500)
+    """
+    fits fonts to rects by a binary search over point sizes.
+    results are cached per width/height bucket (rounded down, so a fit stays valid within its bucket)
+    and survive small resizes. labels are fitted in one batch before the next paint.
+    """
+    cache = LRUCache(max_len=2000)
+    SIZE_BUCKET = 8
+    MIN_POINT_SIZE = 1.0
+    PRECISION = 0.25
+
+    __PENDING__ = []  # type: List[TextLabel]
+    __FIT_SCHEDULED__ = False
+
+    @staticmethod
+    def _text_size(font: QFont, text: str, size: QSizeF, flags: int, tight: bool) -> QSizeF:
+        fm = QFontMetricsF(font)
+        if tight:
+            rect = fm.tightBoundingRect(text)
+            return QSizeF(rect.width() + abs(rect.x()), rect.height())
+        return fm.boundingRect(QRectF(QPointF(0, 0), size), flags, text).size()
+
+    @staticmethod
+    def fit_point_size(font: QFont, text: str, size: QSize, flags: int = 0,
+                       max_point_size: float = None, tight: bool = False) -> float:
+        """ the largest point size up to max_point_size (default: the size of font) that fits text into size """
+        bucket = TextSizeHelper.SIZE_BUCKET
+        width = max(1, size.width() // bucket * bucket)
+        height = max(1, size.height() // bucket * bucket)
+        max_point_size = font.pointSizeF() if max_point_size is None else max_point_size
+        key = (font.key(), flags, tight, width, height, max_point_size, text)
+        if key in TextSizeHelper.cache:
+            return TextSizeHelper.cache[key]
+        target = QSizeF(width, height)
+        probe = QFont(font)
+
+        def fits(point_size: float) -> bool:
+            probe.setPointSizeF(point_size)
+            text_size = TextSizeHelper._text_size(probe, text, target, flags, tight)
+            return text_size.width() <= width and text_size.height() <= height
+
+        low, high = TextSizeHelper.MIN_POINT_SIZE, max(max_point_size, TextSizeHelper.MIN_POINT_SIZE)
+        if fits(high):
+            low = high
+        while high - low > TextSizeHelper.PRECISION:
+            middle = (low + high) / 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle
+        TextSizeHelper.cache[key] = low
+        return low
 
     @staticmethod
     def draw_text_in_rect(painter: QPainter, text: str, rect: QRect, font: QFont, flags: int):
-        key = f"{font.style()}_{font.rawName()}_{rect.width()}_{rect.height()}_{text}"
-        if key in TextSizeHelper.cache.keys():
-            point_size = TextSizeHelper.cache[key]
-            font.setPointSizeF(point_size)
-            painter.setFont(font)
-        else:
-            font_bound_rect = painter.fontMetrics().boundingRect(rect, flags, text)
-            while rect.width() < font_bound_rect.width() or rect.height() < font_bound_rect.height():
-                font.setPointSizeF(font.pointSizeF() * 0.95)
-                painter.setFont(font)
-                font_bound_rect = painter.fontMetrics().boundingRect(rect, flags, text)
-            TextSizeHelper.cache[key] = font.pointSizeF()
+        font.setPointSizeF(TextSizeHelper.fit_point_size(font, text, rect.size(), flags))
+        painter.setFont(font)
         painter.drawText(rect, flags, text)
 
+    @staticmethod
+    def fit_later(label: 'TextLabel'):
+        """ queues a resized label, all queued labels are fitted together """
+        if label not in TextSizeHelper.__PENDING__:
+            TextSizeHelper.__PENDING__.append(label)
+        if not TextSizeHelper.__FIT_SCHEDULED__:
+            TextSizeHelper.__FIT_SCHEDULED__ = True
+            QTimer.singleShot(0, TextSizeHelper.fit_pending)
+
+    @staticmethod
+    def fit_pending():
+        labels, TextSizeHelper.__PENDING__ = TextSizeHelper.__PENDING__, []
+        TextSizeHelper.__FIT_SCHEDULED__ = False
+        with Metrics.measure(TextSizeHelper.__name__, MetricStage.LAYOUT):
+            for label in labels:
+                try:
+                    label.fit()
+                except RuntimeError:
+                    # deleted before it was fitted
+                    pass
+
     @staticmethod
     def draw_text2(painter: QPainter, font: QFont, text: str, color: QColor, rect: QRectF,
                    align: Qt.Alignment = Qt.AlignLeft, angle=0.0):
@@ -320,63 +327,134 @@ class TextLabel(QWidget):
         self.text = text
         self.font = font
         self.color = color
+        self.fitted_font = None  # type: Union[None, QFont]
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
     def setFont(self, font: QFont):
         self.font = font
+        self.fitted_font = None
+        TextSizeHelper.fit_later(self)
 
     def setColor(self, color: QColor):
         self.color = color
 
+    def fit(self):
+        """ the single line of text as large as the label allows """
+        font = QFont(self.font if self.font is not None else QWidget.font(self))
+        font.setPointSizeF(TextSizeHelper.fit_point_size(font, self.text, self.size(), Qt.AlignCenter,
+                                                         max_point_size=max(1, self.height())))
+        self.fitted_font = font
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        TextSizeHelper.fit_later(self)
+
     def paintEvent(self, event: QPaintEvent) -> None:
+        if self.fitted_font is None or self in TextSizeHelper.__PENDING__:
+            # painted before the batch ran, fit everything that is waiting now
+            TextSizeHelper.fit_pending()
         painter = QPainter(self)
-        if self.font is None:
-            self.font = painter.font()
         if self.color is None:
             self.color = painter.brush().color()
-
-        # painter.setPen(Qt.red)
-        # painter.setBrush(QBrush(Qt.red))
-        # painter.drawRect(self.rect())
-
         painter.setPen(self.color)
         painter.setBrush(QBrush(self.color))
-        # TextSizeHelper.draw_text_in_rect(painter, self.text, self.rect(), self.font, Qt.TextWordWrap)
-        TextSizeHelper.draw_text2(painter, self.font, self.text, self.color, QRectF(self.rect()))
+        painter.setFont(self.fitted_font)
+        painter.drawText(self.rect(), Qt.AlignCenter, self.text)
 
 
 class MapImageHelper:
-    __BASE64_MAP_IMAGES__ = {}
+    """
+    static MapQuest maps of event locations as data-uris for the tooltips.
+    images come from the MapImageCache on disk, missing ones are fetched through one pooled session.
+    prefetch() loads the locations of the shown window in the background.
+    """
+    BASE_URL = 'https://www.mapquestapi.com/staticmap/v5/map'
+    MAX_DATA_URIS = 200
+    # the location itself was rejected, everything else (rejected key, rate limit, outage) is retried
+    UNKNOWN_LOCATION_STATUS_CODES = (400, 404, 410)
+
+    __SHARED__ = None  # type: Union[None, MapImageHelper]
+
+    def __init__(self, cache: MapImageCache = None, base_url: str = None, api_key: str = None):
+        self.cache = cache if cache is not None else MapImageCache()
+        self.base_url = base_url if base_url is not None else MapImageHelper.BASE_URL
+        self._api_key = api_key
+        self.session = requests.Session()
+        self.requests_sent = 0
+        self._data_uris = LRUCache(max_len=MapImageHelper.MAX_DATA_URIS)
+        self._lock = Lock()
 
     @classmethod
-    def get_map_image_base_64(cls, location_string, size=250, zoom=10):
-        # return ""
-        if location_string in cls.__BASE64_MAP_IMAGES__:
-            return cls.__BASE64_MAP_IMAGES__[location_string]
-
-        from credentials import MapQuestCredentials
+    def shared(cls) -> 'MapImageHelper':
+        if cls.__SHARED__ is None:
+            cls.__SHARED__ = MapImageHelper()
+        return cls.__SHARED__
+
+    def get_api_key(self) -> str:
+        if self._api_key is None:
+            from credentials import MapQuestCredentials
+            return MapQuestCredentials.get_api_key()
+        return self._api_key
+
+    def get_map_image_base_64(self, location_string: str, size=250, zoom=10) -> str:
+        """ the <img> of the map, '' if there is none (yet) """
+        key = (MapImageCache.normalize(location_string), size, zoom)
+        with self._lock:
+            img = self._data_uris.get(key)
+        if img is not None:
+            return img
+        cached = self.cache.get(location_string, size, zoom)
+        if cached is None:
+            cached = self.fetch(location_string, size, zoom)
+            if cached is None:
+                # not reachable right now, tried again next time
+                return ''
+        content_type, data = cached
+        if content_type is None:
+            # failures stay on disk only, so they expire with the cache entry
+            return ''
+        img = f"<img src='data:{content_type};base64,{base64.b64encode(data).decode()}'>"
+        with self._lock:
+            self._data_uris[key] = img
+        return img
+
+    def fetch(self, location_string: str, size: int, zoom: int) -> Union[None, Tuple[Union[None, str], bytes]]:
         try:
-            encoded = quote(location_string)
-            response = requests.get(f"https://www.mapquestapi.com/staticmap/v5/map?key"
-                                    f"={MapQuestCredentials.get_api_key()}"
-                                    f"&center={encoded}"
-                                    f"&size={size},{size}"
-                                    f"&zoom={zoom}"
-                                    f"&locations={encoded}",
-                                    stream=True)
+            self.requests_sent += 1
+            response = self.session.get(self.base_url, params={'key': self.get_api_key(),
+                                                               'center': location_string,
+                                                               'size': f'{size},{size}',
+                                                               'zoom': zoom,
+                                                               'locations': location_string},
+                                        timeout=10)
         except Exception as e:
-            return
+            logging.getLogger(self.__class__.__name__).log(logging.WARNING, f'map image failed: {e}')
+            return None
         if response.status_code == 200:
-
-            import base64
-
-            uri = ("data:" +
-                   response.headers['Content-Type'] + ";" +
-                   "base64," + base64.b64encode(response.content).decode("utf-8"))
-
-            cls.__BASE64_MAP_IMAGES__[location_string] = f"<img src='{uri}'>"
-
-        else:
-            cls.__BASE64_MAP_IMAGES__[location_string] = ""
-
-        return cls.__BASE64_MAP_IMAGES__[location_string]
\ No newline at end of file
+            content_type = response.headers.get('Content-Type', 'image/jpeg')
+            self.cache.put(location_string, size, zoom, content_type, response.content)
+            return content_type, response.content
+        if response.status_code not in MapImageHelper.UNKNOWN_LOCATION_STATUS_CODES:
+            logging.getLogger(self.__class__.__name__).log(logging.WARNING,
+                                                           f'map image failed: {response.status_code}')
+            return None
+        # unknown locations, expires after MapImageCache.NEGATIVE_TTL
+        self.cache.put(location_string, size, zoom, None)
+        return None, b''
+
+    def prefetch(self, locations: Iterable[str], size=250, zoom=10) -> Union[None, WorkerTask]:
+        """ fetches the maps that are not on disk yet in the background """
+        missing = list(OrderedDict((MapImageCache.normalize(location), location) for location in locations
+                                   if location and (location, size, zoom) not in self.cache).values())
+        if not missing:
+            return None
+        return WorkerPool.shared().submit(self._prefetch, args=(missing, size, zoom), priority=TaskPriority.BACKGROUND,
+                                          owner=MapImageHelper, owner_limit=1)
+
+    def _prefetch(self, locations: List[str], size: int, zoom: int):
+        for location in locations:
+            token = WorkerPool.current_token()
+            if token is not None:
+                token.raise_if_cancelled()
+            if (location, size, zoom) not in self.cache:
+                self.fetch(location, size, zoom)
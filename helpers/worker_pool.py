@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import logging
+import traceback
+from threading import Condition, Event, Thread, local
+from typing import Callable, Dict, List, Union, Hashable
+
+from PyQt5.QtCore import QCoreApplication, QObject, pyqtSignal, pyqtSlot
+
+from helpers.tools import SignalWrapper
+from helpers.tracing import Tracer
+
+
+class TaskCancelledException(Exception):
+    pass
+
+
+class CancellationToken:
+    """
+    cooperative cancellation: queued tasks with a cancelled token are dropped,
+    running ones may poll it and their results are discarded
+    """
+
+    def __init__(self):
+        self._cancelled = Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelledException()
+
+
+class TaskPriority:
+    UI_VISIBLE = 0
+    DEFAULT = 50
+    BACKGROUND = 100
+
+
+class _TaskRelay(QObject):
+    """
+    hands results over to the gui-thread before the task signals are emitted there,
+    so slots connected right after submit() can not miss the result of a fast task
+    """
+    result_ready = pyqtSignal(object, bool)
+
+    def __init__(self, task: "WorkerTask"):
+        super().__init__()
+        self.task = task
+        self.emitted = 0.0
+        self.result_ready.connect(self._deliver)
+
+    def emit(self, result, failed: bool):
+        self.emitted = Tracer.now()
+        self.result_ready.emit(result, failed)
+
+    @pyqtSlot(object, bool)
+    def _deliver(self, result, failed: bool):
+        if self.task.trace_id is not None:
+            # time the result spent waiting in the event queue of the gui-thread
+            Tracer.record('deliver', self.emitted, Tracer.now(), 'queue', self.task.trace_id)
+        if not self.task.cancelled:
+            with Tracer.activate(self.task.trace_id):
+                (self.task.failed if failed else self.task.finished).emit(result)
+
+
+class WorkerTask:
+    def __init__(self, target: Callable, args=(), kwargs=None, priority: int = TaskPriority.DEFAULT,
+                 owner: Hashable = None, owner_limit: int = None, token: CancellationToken = None):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.priority = priority
+        self.owner = owner
+        self.owner_limit = owner_limit
+        self.token = token if token is not None else CancellationToken()
+        self.trace_id = Tracer.current()
+        self.finished = SignalWrapper(object)
+        self.failed = SignalWrapper(Exception)
+        self._relay = _TaskRelay(self)
+        app = QCoreApplication.instance()
+        if app is not None:
+            # results are always delivered through the gui-thread, even for tasks submitted by a worker
+            self._relay.moveToThread(app.thread())
+            self.finished.wrapped.moveToThread(app.thread())
+            self.failed.wrapped.moveToThread(app.thread())
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+
+class WorkerPool:
+    """
+    bounded, prioritized thread pool shared by all plugins and widgets.
+    lower priority values run first, owners can limit how many of their tasks run at the same time.
+    """
+    MAX_WORKERS = 4
+
+    __SHARED__ = None  # type: Union[None, WorkerPool]
+    _current = local()
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._condition = Condition()
+        self._queue = []  # type: List[tuple]
+        self._sequence = itertools.count()
+        self._running = {}  # type: Dict[Hashable, int]
+        self._workers = []  # type: List[Thread]
+        self._idle = 0
+
+    @classmethod
+    def shared(cls) -> "WorkerPool":
+        if cls.__SHARED__ is None:
+            cls.__SHARED__ = WorkerPool()
+        return cls.__SHARED__
+
+    @classmethod
+    def current_token(cls) -> Union[None, CancellationToken]:
+        """ the token of the task running in the calling thread """
+        return getattr(cls._current, 'token', None)
+
+    def submit(self, target: Callable, args=(), kwargs=None, priority: int = TaskPriority.DEFAULT,
+               owner: Hashable = None, owner_limit: int = None, token: CancellationToken = None) -> WorkerTask:
+        task = WorkerTask(target, args, kwargs, priority, owner, owner_limit, token)
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), task))
+            if self._idle == 0 and len(self._workers) < self.max_workers:
+                worker = Thread(target=self._work, name=f'WorkerPool-{len(self._workers)}', daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        return task
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def _next_task(self) -> Union[None, WorkerTask]:
+        skipped = []
+        task = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            candidate = entry[2]
+            if candidate.cancelled:
+                continue
+            if candidate.owner is not None and candidate.owner_limit is not None and \
+                    self._running.get(candidate.owner, 0) >= candidate.owner_limit:
+                skipped.append(entry)
+                continue
+            task = candidate
+            break
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return task
+
+    def _work(self):
+        while True:
+            with self._condition:
+                task = self._next_task()
+                while task is None:
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                    task = self._next_task()
+                if task.owner is not None:
+                    self._running[task.owner] = self._running.get(task.owner, 0) + 1
+            self._run(task)
+            with self._condition:
+                if task.owner is not None:
+                    self._running[task.owner] -= 1
+                    if not self._running[task.owner]:
+                        del self._running[task.owner]
+                # tasks held back by an owner limit may be runnable now
+                self._condition.notify_all()
+
+    def _run(self, task: WorkerTask):
+        WorkerPool._current.token = task.token
+        try:
+            with Tracer.span(getattr(task.target, '__qualname__', 'task'), 'worker', task.trace_id):
+                result = task.target(*task.args, **task.kwargs)
+            if not task.cancelled:
+                task._relay.emit(result, False)
+        except TaskCancelledException:
+            pass
+        except Exception as e:
+            logging.getLogger(self.__class__.__name__).log(
+                logging.ERROR, f'task {task.target} failed: {e}\n'
+                               f'{"".join(traceback.format_exception(None, e, e.__traceback__))}')
+            if not task.cancelled:
+                task._relay.emit(e, True)
+        finally:
+            WorkerPool._current.token = None
+            # avoid keeping the arguments alive with the task object
+            del task.target, task.args, task.kwargs
@@ -2,23 +2,103 @@ import logging
 import time
 import traceback
 from datetime import datetime
-from typing import Union
+from threading import Lock
+from typing import Union, Iterable, List, Set, Hashable
 
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from helpers.tools import SignalingThread
+from helpers.metrics import Metrics, MetricStage
+from helpers.tracing import Tracer
+from helpers.worker_pool import WorkerPool, WorkerTask, TaskPriority, TaskCancelledException, CancellationToken
 from termcolor import colored
 
 
+class KeyChanges:
+    """ keys of a snapshot that were added, changed or removed since the previous snapshot """
+
+    def __init__(self, added: Iterable[Hashable] = (), changed: Iterable[Hashable] = (),
+                 removed: Iterable[Hashable] = ()):
+        self.added = set(added)  # type: Set[Hashable]
+        self.changed = set(changed)  # type: Set[Hashable]
+        self.removed = set(removed)  # type: Set[Hashable]
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def merge(self, newer: "KeyChanges") -> "KeyChanges":
+        """ combines these changes with the ones that happened after them """
+        merged = KeyChanges(self.added, self.changed, self.removed)
+        for key in newer.added:
+            if key in merged.removed:
+                merged.removed.discard(key)
+                merged.changed.add(key)
+            else:
+                merged.added.add(key)
+        for key in newer.changed:
+            if key not in merged.added:
+                merged.changed.add(key)
+        for key in newer.removed:
+            if key in merged.added:
+                merged.added.discard(key)
+            else:
+                merged.changed.discard(key)
+                merged.removed.add(key)
+        return merged
+
+    @staticmethod
+    def merge_all(changes: Iterable[Union[None, "KeyChanges"]]) -> Union[None, "KeyChanges"]:
+        """ None stands for 'everything may have changed' and wins over any delta """
+        merged = KeyChanges()
+        for c in changes:
+            if c is None:
+                return None
+            merged = merged.merge(c)
+        return merged
+
+    def __repr__(self):
+        return f'KeyChanges(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})'
+
+
+class DataDelta:
+    """
+    a versioned snapshot as published by a plugin.
+    'changes' relate the snapshot to the one of 'base_version', None means it has to be taken as a whole.
+    """
+
+    def __init__(self, version: int, snapshot: object, changes: Union[None, KeyChanges] = None,
+                 base_version: Union[None, int] = None):
+        self.version = version
+        self.snapshot = snapshot
+        self.changes = changes if base_version is not None else None
+        self.base_version = base_version if changes is not None else None
+
+    @property
+    def is_full(self) -> bool:
+        return self.changes is None
+
+    def __repr__(self):
+        return f'DataDelta(version={self.version}, base={self.base_version}, changes={self.changes})'
+
+
 class BasePlugin(QObject):
 
     plugin_log = pyqtSignal(str, int)
     new_data_available = pyqtSignal(object)
+    data_changed = pyqtSignal(object)
     threaded_exception = pyqtSignal(Exception)
 
+    UPDATE_PRIORITY = TaskPriority.UI_VISIBLE
+
     def __init__(self):
         super(BasePlugin, self).__init__()
-        self.update_thread = None
+        self.update_task = None  # type: Union[None, WorkerTask]
+        self.update_generation = 0
+        self.update_key = None
+        self.follow_up_update = None
+        self.data_version = 0
+        self.published_key = None
+        self._change_log_lock = Lock()
+        self._change_log = []  # type: List[tuple]
         self.last_update = datetime.now()
         self.currently_updating = False
 
@@ -28,19 +108,100 @@ class BasePlugin(QObject):
     def quit(self):
         pass
 
+    def get_update_key(self, *args, **kwargs) -> object:
+        """
+        identifies what an update request is for.
+        a request with the same key as the running one joins it, any other key supersedes it.
+        """
+        return args, kwargs
+
     def update_async(self, *args, **kwargs) -> None:
-        if not self.currently_updating:
-            self.currently_updating = True
-            self.update_thread = SignalingThread(target=self._update_sync, args=args, kwargs=kwargs)
-            self.update_thread.finished.connect(self._new_data_ready)
-            self.update_thread.setDaemon(True)
-            self.update_thread.start()
-
-    def _new_data_ready(self, results) -> None:
-        self.currently_updating = False
-        if isinstance(results, Exception):
+        key = self.get_update_key(*args, **kwargs)
+        if self.update_task is not None:
+            if key == self.update_key:
+                return
+            # the newest request wins, whatever the old one still delivers is discarded
+            self.log_debug(f'superseding update {self.update_generation}')
+            self.update_task.cancel()
+            Metrics.count(self.__class__.__name__, 'superseded')
+        self.update_generation += 1
+        self.update_key = key
+        self.currently_updating = True
+        generation = self.update_generation
+        # follow-ups continue the trace of the update that scheduled them
+        trace_id = Tracer.current() if Tracer.current() is not None else Tracer.new_trace()
+        with Tracer.span(f'{self.__class__.__name__}.update_async', 'plugin', trace_id, generation=generation):
+            self.update_task = WorkerPool.shared().submit(self._update_sync, args=args, kwargs=kwargs,
+                                                          priority=self.UPDATE_PRIORITY,
+                                                          owner=self, owner_limit=1)
+        self.update_task.finished.connect(lambda results: self._new_data_ready(results, generation))
+        self.update_task.failed.connect(lambda exception: self._new_data_ready(exception, generation))
+
+    def schedule_follow_up(self, *args, **kwargs) -> None:
+        """ requests another update as soon as the current one has delivered (callable from the update thread) """
+        self.follow_up_update = (WorkerPool.current_token(), args, kwargs)
+
+    def report_changes(self, changes: Union[None, KeyChanges]) -> None:
+        """
+        tells which keys the running update touched (callable from the update thread).
+        updates that never report anything are always published as full snapshots.
+        """
+        with self._change_log_lock:
+            self._change_log.append((WorkerPool.current_token(), changes))
+
+    def take_reported_changes(self, token: Union[None, CancellationToken]) -> List[Union[None, KeyChanges]]:
+        """
+        collects the changes reported by the update of 'token' and by superseded ones,
+        whose state changes would otherwise never be published.
+        """
+        with self._change_log_lock:
+            taken = [c for t, c in self._change_log if t is token or (t is not None and t.cancelled)]
+            self._change_log = [(t, c) for t, c in self._change_log
+                                if not (t is token or (t is not None and t.cancelled))]
+        return taken
+
+    def publish(self, snapshot: object, changes: Union[None, KeyChanges] = None, key: object = None) -> None:
+        """
+        hands a new snapshot to all listeners. the changes are only passed on as a delta if they
+        relate to the previously published snapshot, i.e. it was published for the same update key.
+        """
+        base_version = self.data_version
+        self.data_version += 1
+        if snapshot is None or key is None or key != self.published_key:
+            changes = None
+        self.published_key = key if snapshot is not None else None
+        with Tracer.span(f'{self.__class__.__name__}.new_data_available', 'plugin', version=self.data_version):
+            self.new_data_available.emit(snapshot)
+            self.data_changed.emit(DataDelta(self.data_version, snapshot, changes, base_version))
+
+    @staticmethod
+    def raise_if_superseded() -> None:
+        """ lets long running updates give up early once a newer request came in """
+        token = WorkerPool.current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+
+    def _new_data_ready(self, results, generation: int = None) -> None:
+        if generation is not None and generation != self.update_generation:
+            self.log_debug(f'discarding result of superseded update {generation}')
             return
-        self.new_data_available.emit(results)
+        token = self.update_task.token if self.update_task is not None else None
+        key = self.update_key
+        self.update_task = None
+        self.update_key = None
+        self.currently_updating = False
+        follow_up, self.follow_up_update = self.follow_up_update, None
+        reported = self.take_reported_changes(token)
+        changes = KeyChanges.merge_all(reported) if reported else None
+        if not isinstance(results, Exception):
+            self.publish(results, changes, key)
+        else:
+            # a failed update may have changed parts of the state, the next snapshot has to be taken as a whole
+            self.published_key = None
+        if follow_up is not None and self.update_task is None:
+            token, args, kwargs = follow_up
+            if token is None or not token.cancelled:
+                self.update_async(*args, **kwargs)
 
     def _update_sync(self, *args, **kwargs) -> object:
         """
@@ -49,17 +210,28 @@ class BasePlugin(QObject):
         """
         try:
             start = time.time()
-            result = self.update_synchronously(*args, **kwargs)
+            with Tracer.span(f'{self.__class__.__name__}.update_sync', 'plugin'):
+                result = self.execute_update(*args, **kwargs)
+            Metrics.observe(self.__class__.__name__, MetricStage.UPDATE, time.time() - start)
             self.log(f'returned after {time.time() - start:.2f} seconds')
             self.last_update = datetime.now()
             return result
-        except NotImplementedError as ne:
-            raise ne
+        except (NotImplementedError, TaskCancelledException) as e:
+            raise e
         except Exception as e:
+            token = WorkerPool.current_token()
+            if token is not None and token.cancelled:
+                self.log_debug('superseded update failed:', e)
+                return e
+            Metrics.count(self.__class__.__name__, 'errors')
             self.log_error(self, 'CAUGHT EXCEPTION IN UPDATE SYNC:', e, type(e))
             self.threaded_exception.emit(e)
             return e
 
+    def execute_update(self, *args, **kwargs) -> Union[object, None]:
+        """ runs the update on the worker thread, plugins may hand it off elsewhere """
+        return self.update_synchronously(*args, **kwargs)
+
     def update_synchronously(self, *args, **kwargs) -> Union[object, None]:
         """
         synchronous update method for the plugin.
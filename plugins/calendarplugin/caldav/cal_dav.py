@@ -14,7 +14,9 @@ from requests.exceptions import SSLError
 
 from credentials import CalDAVCredentials, CredentialsNotValidException, CredentialType
 from helpers.settings_storage import SettingsStorage
+from helpers.metrics import Metrics, MetricStage
 from helpers.tools import time_method
+from plugins.base import KeyChanges
 from plugins.calendarplugin.caldav.conversions import CalDavConversions
 from plugins.calendarplugin.caldav.caldav_calendar import CalDavCalendar
 from plugins.calendarplugin.calendar_plugin import CalendarPlugin, Calendar, Event, CalendarData, EventInstance
@@ -22,6 +24,7 @@ import caldav
 
 
 class CalDavPlugin(CalendarPlugin):
+    SUPPORTS_WORKER_PROCESS = True
 
     def __init__(self):
         super().__init__()
@@ -84,29 +87,38 @@ class CalDavPlugin(CalendarPlugin):
 
         SettingsStorage.save(self.caldav_calendars, 'caldav_cals')
 
+    @Metrics.timed(MetricStage.FETCH)
     def sync_calendars(self):
         self.log_info('SYNC_CALENDARS!')
+        changes = []
         if not self.caldav_calendars:
             self.get_calendars()
+            changes.append(None)
         try:
             for cal in self.caldav_calendars.values():
                 self.log_info(f'syncing {cal.id()}')
-                cal.sync_metadata()
+                changes.append(cal.sync_metadata())
 
             SettingsStorage.save(self.caldav_calendars, 'caldav_cals')
         except Exception as e:
             self.log_error(e)
+            changes.append(None)
+        self.report_changes(KeyChanges.merge_all(changes))
 
     def update_synchronously(self, days_in_future: int, days_in_past: int,
                              cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH, *args, **kwargs) -> Union[CalendarData, None]:
         self.log_info('GOT TO MAIN METHOD', cache_mode, args, kwargs)
         if cache_mode == CalendarPlugin.CacheMode.FORCE_REFRESH or not self.caldav_calendars:
             self.sync_calendars()
-        elif cache_mode == CalendarPlugin.CacheMode.REFRESH_LATER:
-            self.log_info('REFRESHING_LATER...')
-            self.currently_updating = False
-            self.update_async(days_in_future=days_in_future, days_in_past=days_in_past, *args, **kwargs,
-                              cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH)
+        else:
+            # served from the stored calendars, nothing changed since the last sync
+            self.report_changes(KeyChanges())
+            if cache_mode == CalendarPlugin.CacheMode.REFRESH_LATER:
+                self.log_info('REFRESHING_LATER...')
+                self.schedule_follow_up(days_in_future=days_in_future, days_in_past=days_in_past, *args, **kwargs,
+                                        cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH)
+        # expanding is wasted work for a window that is not shown anymore
+        self.raise_if_superseded()
         return CalendarData(
             events=self.expand_events(start=datetime.datetime.now().replace(tzinfo=tzlocal()) -
                                       datetime.timedelta(days=days_in_past),
@@ -117,11 +129,15 @@ class CalDavPlugin(CalendarPlugin):
         )
 
     def quit(self):
-        pass
+        self.set_worker_process_enabled(False)
+
+    def reload_state(self):
+        self.caldav_calendars = SettingsStorage.load_or_default('caldav_cals', {})
 
     def create_event(self, event: Event,
                      days_in_future: int, days_in_past: int) -> Union[Event, List[EventInstance]]:
         self.log_warn('CREATE EVENT', event)
+        self.ensure_local_state()
         try:
             event_to_create = CalDavConversions.caldav_event_from_event(
                 event, self.caldav_calendars[event.calendar.id].caldav_cal)
@@ -138,6 +154,7 @@ class CalDavPlugin(CalendarPlugin):
 
     def delete_event(self, event: Event) -> bool:
         self.log('trying to delete %r' % event)
+        self.ensure_local_state()
         try:
             event_to_delete = CalDavConversions.caldav_event_from_event(
                 event, self.caldav_calendars[event.calendar.id].caldav_cal)
@@ -176,6 +193,7 @@ class CalDavPlugin(CalendarPlugin):
     def update_event(self, event: Event,
                      days_in_future: int, days_in_past: int,
                      moved_from_calendar: Union[Calendar, None] = None) -> Union[Event, List[EventInstance]]:
+        self.ensure_local_state()
         try:
 
             if moved_from_calendar is not None:
@@ -216,8 +234,10 @@ class CalDavPlugin(CalendarPlugin):
 
     def save_data(self):
         SettingsStorage.save(self.caldav_calendars, 'caldav_cals')
+        self.local_state_changed()
 
     @time_method
+    @Metrics.timed(MetricStage.EXPAND)
     def expand_events(self, start: datetime.datetime, end: datetime.datetime) -> \
             Dict[str, Union[Event, List[EventInstance]]]:
 
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 
 import caldav
 from PyQt5.QtGui import QColor
@@ -6,6 +6,8 @@ from caldav import CalendarObjectResource
 from urllib3.exceptions import NewConnectionError
 
 from plugins.calendarplugin.caldav.conversions import CalDavConversions, CalDavObjectUpdate
+from helpers.metrics import Metrics, MetricStage
+from plugins.base import KeyChanges
 from plugins.calendarplugin.calendar_plugin import Event, Calendar, CalendarAccessRole
 
 
@@ -21,7 +23,9 @@ class CalDavCalendar:
     def id(self):
         return str(self.caldav_cal.url)
 
-    def add_objects_from_collection(self, objects):
+    @Metrics.timed(MetricStage.PARSE)
+    def add_objects_from_collection(self, objects) -> List[str]:
+        event_ids = []
         for caldav_object in objects:
             try:
                 if caldav_object and caldav_object.vobject_instance:
@@ -31,6 +35,7 @@ class CalDavCalendar:
                                                                               self.calendar)
                         self.events[event.id] = event
                         self.ical_events[event.id] = caldav_object.icalendar_instance
+                        event_ids.append(event.id)
                     elif hasattr(caldav_object.vobject_instance, 'vtodo'):
                         print(f'GOT TODO: {caldav_object.vobject_instance.vtodo.summary.value}, discard for now')
                     elif hasattr(caldav_object.vobject_instance, 'vjournal'):
@@ -45,6 +50,7 @@ class CalDavCalendar:
             except AttributeError as e:
                 print(f'{caldav_object} is weird: {caldav_object.vobject_instance} {e}')
                 raise e
+        return event_ids
 
     def register_update(self, url):
         if self.sync_objects:
@@ -70,7 +76,8 @@ class CalDavCalendar:
         # make sure objects is a list, and not `dict.values`. necessary for pickle.dump
         self.sync_objects.objects = list(self.sync_objects._objects_by_url.values())
 
-    def sync_metadata(self) -> CalDavObjectUpdate:
+    def sync_metadata(self) -> Union[None, KeyChanges]:
+        """ returns the ids of the events that changed, or None if all of them were (re)loaded """
         try:
             if self.sync_objects is None:
                 self.sync_objects = self.caldav_cal.objects(load_objects=False)
@@ -79,29 +86,34 @@ class CalDavCalendar:
                 events = self.caldav_cal.calendar_multiget([o.url for o in self.sync_objects.objects])
                 # print(events)
                 self.add_objects_from_collection(events)
-
-                return CalDavObjectUpdate(self.sync_objects, [])
+                return None
             else:
                 ret = self.sync_objects.sync()
                 self.sanitize_objects()
                 print('sync done')
                 updates = CalDavObjectUpdate(*ret)
                 updated_events = self.caldav_cal.calendar_multiget([o.url for o in updates.updates])
-                self.add_objects_from_collection(updated_events)
+                known = set(self.events)
+                changes = KeyChanges()
+                for event_id in self.add_objects_from_collection(updated_events):
+                    (changes.changed if event_id in known else changes.added).add(event_id)
                 for cd_event in updates.deletes:
 
                     print(f'GOT DELETE {cd_event}')
                     try:
                         uid = cd_event.url.path.replace(self.caldav_cal.url.path, '').replace('.ics', '')
-                        self.events.pop(uid, None)
+                        if self.events.pop(uid, None) is not None:
+                            changes.removed.add(uid)
                         self.ical_events.pop(uid, None)
                         print(f'successfully deleted {uid}')
                     except AttributeError as e:
                         print(f'{cd_event} is weird: {cd_event.vobject_instance} {e}')
+                return changes
         except NewConnectionError as e:
             print(e)
         except ConnectionError as ce:
             print(ce)
+        return KeyChanges()
 
     def fetch_properties(self):
         props = {"name": caldav.dav.DisplayName(),
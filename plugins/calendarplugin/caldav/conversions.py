@@ -15,6 +15,7 @@ from PyQt5.QtGui import QColor
 from dateutil import rrule
 from vobject.icalendar import RecurringComponent
 
+from helpers.metrics import Metrics, MetricStage
 from plugins.calendarplugin.calendar_plugin import Event, Calendar, Alarm, CalendarAccessRole, Todo, EventInstance
 
 
@@ -223,6 +224,7 @@ class CalDavConversions:
                               ) for instance in cls.expand_ical_event(ical_event, start, end)]
 
     @classmethod
+    @Metrics.timed(MetricStage.EXPAND)
     def expand_events(cls, event_dict, ical_event_dict, start: datetime.datetime, end: datetime.datetime) -> \
             Dict[str, Union[Event, List[EventInstance]]]:
         event_list = {}
@@ -256,6 +258,7 @@ class CalDavConversions:
             return cls.event_from_recurring_component(expandable_event, event.calendar)
 
     @classmethod
+    @Metrics.timed(MetricStage.PARSE)
     def load_all_from_ical_text(cls, ical_string: str, uri: str, calendar_id: str = None,
                                 calendar_name: str = None, fg_color=None, bg_color=None) -> Tuple[Calendar,
                                                                                            Dict[str, Event],
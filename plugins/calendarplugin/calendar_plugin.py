@@ -7,7 +7,9 @@ import dateutil.rrule
 from PyQt5.QtGui import QColor
 from dateutil.tz import tzlocal
 
+from credentials import NoCredentialsSetException, CredentialsNotValidException
 from plugins.base import BasePlugin
+from plugins.calendarplugin.worker_process import CalendarWorkerProcess
 
 
 class CalendarAccessRole(Enum):
@@ -184,6 +186,63 @@ class CalendarPlugin(BasePlugin):
         REFRESH_LATER = 2,
         ALLOW_CACHE = 3
 
+    # plugins that can be created without arguments and keep their state in the settings-storage
+    SUPPORTS_WORKER_PROCESS = False
+
+    def __init__(self):
+        super().__init__()
+        self.worker_process = None  # type: Union[None, CalendarWorkerProcess]
+        self.worker_state_outdated = False
+        self.worker_credentials_outdated = False
+        self.local_state_outdated = False
+
+    def set_worker_process_enabled(self, enabled: bool):
+        """ expands and parses the calendars in a separate process, so the gui-process does not stutter """
+        if enabled and self.worker_process is None:
+            if not self.SUPPORTS_WORKER_PROCESS:
+                self.log_warn(f'{self.__class__.__name__} can not run in a worker process')
+                return
+            self.worker_process = CalendarWorkerProcess(self)
+            self.worker_state_outdated = False
+        elif not enabled and self.worker_process is not None:
+            self.worker_process.quit()
+            self.worker_process = None
+
+    def execute_update(self, *args, **kwargs) -> Union[CalendarData, None]:
+        if self.worker_process is None:
+            self.ensure_local_state()
+            return self.update_synchronously(*args, **kwargs)
+        if self.worker_state_outdated:
+            self.worker_state_outdated = False
+            self.worker_process.reload()
+        if self.worker_credentials_outdated:
+            self.worker_credentials_outdated = False
+            self.worker_process.reload_credentials()
+        try:
+            result = self.worker_process.update(*args, **kwargs)
+        except (NoCredentialsSetException, CredentialsNotValidException):
+            # the user is asked for them in this process, the worker has to read them again afterwards
+            self.worker_credentials_outdated = True
+            raise
+        # the worker has synced and saved its calendars, the ones of this process are behind now
+        self.local_state_outdated = True
+        return result
+
+    def reload_state(self):
+        """ re-reads the plugin state from the settings-storage """
+        pass
+
+    def ensure_local_state(self):
+        if self.local_state_outdated:
+            self.local_state_outdated = False
+            self.reload_state()
+
+    def local_state_changed(self):
+        # the widget applied the local change itself, the next snapshot is published as a whole
+        self.published_key = None
+        if self.worker_process is not None:
+            self.worker_state_outdated = True
+
     def update_async(self, days_in_future: int = None, days_in_past: int = None,
                      cache_mode=CacheMode.FORCE_REFRESH, *args, **kwargs) -> None:
         if days_in_future is None:
@@ -196,6 +255,11 @@ class CalendarPlugin(BasePlugin):
         super().update_async(cache_mode=cache_mode, days_in_future=days_in_future, days_in_past=days_in_past,
                              *args, **kwargs)
 
+    def get_update_key(self, days_in_future: int = None, days_in_past: int = None, *args, **kwargs) -> object:
+        # the cache-mode does not matter, any result for the same window will do.
+        # the window moves with the date, so snapshots of different days are not related by deltas
+        return days_in_future, days_in_past, date.today()
+
     def update_synchronously(self, days_in_future: int, days_in_past: int,
                              *args, **kwargs) -> Union[CalendarData, None]:
         raise NotImplementedError()
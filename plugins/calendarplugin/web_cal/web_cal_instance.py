@@ -6,6 +6,7 @@ from PyQt5.QtGui import QColor
 from dateutil.tz import tzlocal
 from icalendar import Calendar as iCalendar
 
+from helpers.metrics import Metrics, MetricStage
 from helpers.settings_storage import SettingsStorage
 from plugins.calendarplugin.caldav.conversions import CalDavConversions
 from plugins.calendarplugin.calendar_plugin import CalendarPlugin, Calendar, EventInstance, Event, \
@@ -57,6 +58,7 @@ class WebCalPluginInstance(ReadOnlyWebCalPlugin):
         self.calendar, self.events, self.ical_events = SettingsStorage.load_or_default(
             f'web_cal_{self.name}', (None, {}, {}))
 
+    @Metrics.timed(MetricStage.FETCH)
     def get_data(self) -> str:
         return requests.get(self.url).text
 
@@ -77,9 +79,8 @@ class WebCalPluginInstance(ReadOnlyWebCalPlugin):
                 return None
         elif cache_mode == CalendarPlugin.CacheMode.REFRESH_LATER:
             self.log_info('REFRESHING_LATER...')
-            self.currently_updating = False
-            self.update_async(days_in_future=days_in_future, days_in_past=days_in_past, *args, **kwargs,
-                              cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH)
+            self.schedule_follow_up(days_in_future=days_in_future, days_in_past=days_in_past, *args, **kwargs,
+                                    cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH)
         if not self.calendar:
             return None
 
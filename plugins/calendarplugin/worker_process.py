@@ -0,0 +1,148 @@
+import importlib
+import logging
+import multiprocessing
+import pickle
+from threading import Lock
+from typing import Union
+
+from credentials import Credentials
+from helpers.tools import PathManager
+
+
+def _pack_exception(e: Exception) -> tuple:
+    # several exceptions of this project do not pass their arguments to Exception.__init__,
+    # so they are rebuilt from their state instead of being pickled
+    state = (e.__class__, e.args, dict(e.__dict__))
+    try:
+        pickle.loads(pickle.dumps(state))
+        return state
+    except Exception:
+        return RuntimeError, (f'{e.__class__.__name__}: {e}',), {}
+
+
+def _unpack_exception(state: tuple) -> Exception:
+    cls, args, attributes = state
+    e = cls.__new__(cls)
+    e.args = args
+    e.__dict__.update(attributes)
+    return e
+
+
+def _worker_main(module_name: str, class_name: str, base_path: str, connection):
+    """ entry point of the worker process """
+    plugin_class = getattr(importlib.import_module(module_name), class_name)
+    # set after the import, importing a package may define its own base path
+    PathManager.__BASE_PATH__ = base_path
+    plugin = plugin_class()
+    plugin.plugin_log.connect(lambda msg, level: connection.send(('log', msg, level)))
+    plugin.setup()
+    while True:
+        try:
+            command, args, kwargs = connection.recv()
+        except EOFError:
+            break
+        if command == 'quit':
+            break
+        try:
+            if command == 'reload':
+                plugin.reload_state()
+                plugin.take_reported_changes(None)
+                result = None
+            elif command == 'reload_credentials':
+                Credentials.forget_loaded()
+                result = None
+            elif command == 'update':
+                plugin.follow_up_update = None
+                result = plugin.update_synchronously(*args, **kwargs)
+            else:
+                raise ValueError(f'unknown command {command}')
+            follow_up = plugin.follow_up_update[1:] if plugin.follow_up_update is not None else None
+            connection.send(('result', result, follow_up, plugin.take_reported_changes(None)))
+        except Exception as e:
+            connection.send(('error', _pack_exception(e)))
+    plugin.quit()
+    connection.close()
+
+
+class CalendarWorkerProcess:
+    """
+    runs the updates of a calendar plugin in a long-lived child process.
+    the child holds its own instance of the plugin class, so the parsed calendars stay resident there
+    and only the already windowed CalendarData is sent back to the gui process.
+    """
+    START_METHOD = 'spawn'
+    QUIT_TIMEOUT_SECONDS = 5
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self._lock = Lock()
+        self._process = None  # type: Union[None, multiprocessing.Process]
+        self._connection = None
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _ensure_running(self):
+        if self.is_running():
+            return
+        context = multiprocessing.get_context(CalendarWorkerProcess.START_METHOD)
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(target=_worker_main,
+                                        args=(self.plugin.__class__.__module__, self.plugin.__class__.__name__,
+                                              PathManager.__BASE_PATH__, child_connection),
+                                        name=f'{self.plugin.__class__.__name__}Worker',
+                                        daemon=True)
+        self._process.start()
+        child_connection.close()
+
+    def request(self, command: str, *args, **kwargs) -> object:
+        with self._lock:
+            self._ensure_running()
+            try:
+                self._connection.send((command, args, kwargs))
+                while True:
+                    message = self._connection.recv()
+                    if message[0] == 'log':
+                        self.plugin.plugin_log.emit(message[1], message[2])
+                    elif message[0] == 'error':
+                        raise _unpack_exception(message[1])
+                    else:
+                        if message[2] is not None:
+                            self.plugin.schedule_follow_up(*message[2][0], **message[2][1])
+                        for changes in message[3]:
+                            self.plugin.report_changes(changes)
+                        return message[1]
+            except (EOFError, OSError) as e:
+                # the worker died, a new one will be started with the next request
+                logging.getLogger(self.__class__.__name__).log(logging.ERROR, f'worker process failed: {e}')
+                self._stop()
+                raise
+
+    def update(self, *args, **kwargs) -> object:
+        return self.request('update', *args, **kwargs)
+
+    def reload(self) -> None:
+        self.request('reload')
+
+    def reload_credentials(self) -> None:
+        """ the credentials were entered again in the gui process """
+        self.request('reload_credentials')
+
+    def _stop(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._process is not None:
+            self._process.join(CalendarWorkerProcess.QUIT_TIMEOUT_SECONDS)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    def quit(self):
+        with self._lock:
+            if self.is_running():
+                try:
+                    self._connection.send(('quit', (), {}))
+                except OSError:
+                    pass
+            self._stop()
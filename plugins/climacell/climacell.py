@@ -2,7 +2,7 @@ import copy
 import json
 import warnings
 from collections import OrderedDict, defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Union
 
 import dateutil.parser
@@ -31,6 +31,28 @@ PREDEF_LOCS = {
 LOC = 'HH'
 
 
+_UTC = timezone.utc
+_LOCAL_TZ = tzlocal()
+
+
+def parse_timestamp_v4(time_str: Union[str, None]) -> Union[datetime, None]:
+    """
+    parses the fixed "YYYY-MM-DDTHH:MM:SSZ" timestamps of the v4 api without going through dateutil.
+    anything else is handed to the generic parser.
+    returns local time truncated to minutes
+    """
+    if time_str is None:
+        return None
+    if len(time_str) == 20 and time_str[19] == 'Z' and time_str[10] == 'T':
+        try:
+            utc_time = datetime(int(time_str[0:4]), int(time_str[5:7]), int(time_str[8:10]),
+                                int(time_str[11:13]), int(time_str[14:16]), tzinfo=_UTC)
+            return utc_time.astimezone(_LOCAL_TZ)
+        except ValueError:
+            pass
+    return dateutil.parser.parse(time_str).astimezone(_LOCAL_TZ).replace(microsecond=0, second=0)
+
+
 class ClimacellPlugin(WeatherPlugin):
     MAPPING = {
         'temp': TemperatureParameters.TEMPERATURE,
@@ -110,52 +132,60 @@ class ClimacellPlugin(WeatherPlugin):
         'sunsetTime': SunTimeParameters.SET,
         'weatherCode': WeatherDescriptionParameters.CODE
     }
+    WEATHER_CODES_v4 = {
+        6201: WeatherCode.FREEZING_RAIN_HEAVY,
+        6001: WeatherCode.FREEZING_RAIN,
+        6200: WeatherCode.FREEZING_RAIN_LIGHT,
+        6000: WeatherCode.FREEZING_DRIZZLE,
+        7101: WeatherCode.ICE_PELLETS_HEAVY,
+        7000: WeatherCode.ICE_PELLETS,
+        7102: WeatherCode.ICE_PELLETS_LIGHT,
+        5101: WeatherCode.SNOW_HEAVY,
+        5000: WeatherCode.SNOW,
+        5100: WeatherCode.SNOW_LIGHT,
+        5001: WeatherCode.FLURRIES,
+        8000: WeatherCode.THUNDERSTORM,
+        4201: WeatherCode.RAIN_HEAVY,
+        4001: WeatherCode.RAIN,
+        4200: WeatherCode.RAIN_LIGHT,
+        4000: WeatherCode.DRIZZLE,
+        2100: WeatherCode.FOG_LIGHT,
+        2000: WeatherCode.FOG,
+        1001: WeatherCode.CLOUDY,
+        1102: WeatherCode.MOSTLY_CLOUDY,
+        1101: WeatherCode.PARTLY_CLOUDY,
+        1100: WeatherCode.MOSTLY_CLEAR,
+        1000: WeatherCode.CLEAR,
+    }
+    PRECIPITATION_TYPES_v4 = {
+        0: PrecipitationType.NONE,
+        1: PrecipitationType.RAIN,
+        2: PrecipitationType.SNOW,
+        3: PrecipitationType.FREEZING_RAIN,
+        4: PrecipitationType.ICE_PELLETS,
+    }
+    # lookup arrays indexed directly by the integer codes of the v4 api
+    WEATHER_CODE_LUT_v4 = [None] * (max(WEATHER_CODES_v4) + 1)
+    for _code, _weather_code in WEATHER_CODES_v4.items():
+        WEATHER_CODE_LUT_v4[_code] = _weather_code
+    PRECIPITATION_TYPE_LUT_v4 = [PrecipitationType.NONE] * (max(PRECIPITATION_TYPES_v4) + 1)
+    for _code, _precipitation_type in PRECIPITATION_TYPES_v4.items():
+        PRECIPITATION_TYPE_LUT_v4[_code] = _precipitation_type
+    del _code, _weather_code, _precipitation_type
+
     CONVERSION_FUNCTIONS_v4 = {
         PrecipitationParameters.TYPE:
-            lambda type_str: defaultdict(lambda: PrecipitationType.NONE, {
-                1: PrecipitationType.RAIN,
-                2: PrecipitationType.SNOW,
-                4: PrecipitationType.ICE_PELLETS,
-                3: PrecipitationType.FREEZING_RAIN,
-                0: PrecipitationType.NONE,
-                None: PrecipitationType.NONE
-            })[type_str],
+            lambda code: ClimacellPlugin.PRECIPITATION_TYPE_LUT_v4[code]
+            if type(code) is int and 0 <= code < len(ClimacellPlugin.PRECIPITATION_TYPE_LUT_v4)
+            else PrecipitationType.NONE,
         WeatherDescriptionParameters.CODE:
-            lambda type_str: {
-                6201: WeatherCode.FREEZING_RAIN_HEAVY,
-                6001: WeatherCode.FREEZING_RAIN,
-                6200: WeatherCode.FREEZING_RAIN_LIGHT,
-                6000: WeatherCode.FREEZING_DRIZZLE,
-                7101: WeatherCode.ICE_PELLETS_HEAVY,
-                7000: WeatherCode.ICE_PELLETS,
-                7102: WeatherCode.ICE_PELLETS_LIGHT,
-                5101: WeatherCode.SNOW_HEAVY,
-                5000: WeatherCode.SNOW,
-                5100: WeatherCode.SNOW_LIGHT,
-                5001: WeatherCode.FLURRIES,
-                8000: WeatherCode.THUNDERSTORM,
-                4201: WeatherCode.RAIN_HEAVY,
-                4001: WeatherCode.RAIN,
-                4200: WeatherCode.RAIN_LIGHT,
-                4000: WeatherCode.DRIZZLE,
-                2100: WeatherCode.FOG_LIGHT,
-                2000: WeatherCode.FOG,
-                1001: WeatherCode.CLOUDY,
-                1102: WeatherCode.MOSTLY_CLOUDY,
-                1101: WeatherCode.PARTLY_CLOUDY,
-                1100: WeatherCode.MOSTLY_CLEAR,
-                1000: WeatherCode.CLEAR,
-                None: None
-            }[type_str],
+            lambda code: (ClimacellPlugin.WEATHER_CODE_LUT_v4[code] or code)
+            if type(code) is int and 0 <= code < len(ClimacellPlugin.WEATHER_CODE_LUT_v4)
+            else code,
         SunTimeParameters.RISE:
-            lambda time_str:
-            dateutil.parser.parse(time_str).
-                astimezone(tzlocal()).replace(microsecond=0, second=0) if time_str is not None else None,
+            lambda time_str: parse_timestamp_v4(time_str),
         SunTimeParameters.SET:
-            lambda time_str:
-            dateutil.parser.parse(time_str).
-                astimezone(tzlocal()).replace(microsecond=0, second=0) if time_str is not None else None,
-
+            lambda time_str: parse_timestamp_v4(time_str),
     }
 
     def quit(self):
@@ -446,37 +476,44 @@ class ClimacellPlugin(WeatherPlugin):
             # self.location = self._get_location()
 
     def _get_reports_v4(self, data, interval_name):
-        data_input = {}
         for timeline in data:
             if timeline['timestep'] == interval_name:
-                data_input = timeline
-                break
+                return self._decode_timeline_v4(timeline)
+        return OrderedDict()
+
+    @staticmethod
+    def _decode_timeline_v4(timeline) -> OrderedDict:
+        """
+        decodes all intervals of a v4 timeline in a single pass.
+        the field plan (target object class, parameter name and converter) is resolved once per field name
+        instead of once per interval and value.
+        """
+        plans = {}
+        conversions = ClimacellPlugin.CONVERSION_FUNCTIONS_v4
         reports = OrderedDict()
-        for row in data_input['intervals']:
-            data = {}
-            time_str = row['startTime']
-            utc_time = dateutil.parser.parse(time_str)
-            local_time = utc_time.astimezone(tzlocal()).replace(microsecond=0, second=0)
-            timestamp = local_time
+        for row in timeline['intervals']:
+            timestamp = parse_timestamp_v4(row['startTime'])
+            params = {}
             for key, value in row['values'].items():
                 try:
-                    param_type = ClimacellPlugin.MAPPING_v4[key]
-                    data[param_type] = {'value': value}
-                    if param_type in ClimacellPlugin.CONVERSION_FUNCTIONS_v4.keys():
-                        data[param_type]['value'] = \
-                            ClimacellPlugin.CONVERSION_FUNCTIONS_v4[param_type](data[param_type]['value'])
-
+                    obj_class, param_name, conversion = plans[key]
                 except KeyError:
-                    pass
-            object_map = defaultdict(dict)
-
-            for key, item in data.items():
-                object_map[key.__OBJ_CLASS__][key.name] = item
-            objs = {}
-            for key, item in object_map.items():
-                objs[key] = key(**item)
-            report = SingleReport(timestamp, objs)
-            reports[timestamp] = report
+                    param_type = ClimacellPlugin.MAPPING_v4.get(key)
+                    if param_type is None:
+                        plans[key] = obj_class, param_name, conversion = None, None, None
+                    else:
+                        plans[key] = obj_class, param_name, conversion = \
+                            param_type.__OBJ_CLASS__, param_type.name, conversions.get(param_type)
+                if obj_class is None:
+                    continue
+                if conversion is not None:
+                    value = conversion(value)
+                try:
+                    params[obj_class][param_name] = {'value': value}
+                except KeyError:
+                    params[obj_class] = {param_name: {'value': value}}
+            reports[timestamp] = SingleReport(timestamp, {obj_class: obj_class(**obj_params)
+                                                          for obj_class, obj_params in params.items()})
         return reports
 
     def _get_reports(self, function):
@@ -0,0 +1,114 @@
+import json
+import logging
+from threading import Lock
+from typing import Dict, Iterable, Tuple, Union, List
+
+import requests
+
+from helpers.settings_storage import SettingsStorage
+
+Coordinates = Tuple[float, float]
+
+
+class GeocodeCache:
+    """
+    persistent mapping of normalized location strings to coordinates.
+    failed lookups are stored as None, so a location string is only ever sent to the geocoder once.
+    """
+
+    def __init__(self, storage_name: str = 'geocode_cache'):
+        self.storage_name = storage_name
+        self._lock = Lock()
+        self._entries = SettingsStorage.load_or_default(storage_name, {})  # type: Dict[str, Union[None, Coordinates]]
+
+    @staticmethod
+    def normalize(location: str) -> str:
+        return ' '.join(location.split()).lower()
+
+    def __contains__(self, location: str) -> bool:
+        return self.normalize(location) in self._entries
+
+    def get(self, location: str) -> Union[None, Coordinates]:
+        return self._entries.get(self.normalize(location))
+
+    def update(self, results: Dict[str, Union[None, Coordinates]]):
+        with self._lock:
+            for location, coordinates in results.items():
+                self._entries[self.normalize(location)] = coordinates
+            SettingsStorage.save(self._entries, self.storage_name)
+
+
+class MapQuestGeocoder:
+    """
+    forward geocoding through the MapQuest batch api, backed by a GeocodeCache
+    """
+    BASE_URL = 'https://www.mapquestapi.com/geocoding/v1'
+    MAX_BATCH_SIZE = 100
+    # results of this quality are MapQuest's fallback for locations it does not know
+    REJECTED_QUALITIES = ['COUNTRY', 'STATE']
+
+    def __init__(self, cache: GeocodeCache = None, base_url: str = None, api_key: str = None):
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.base_url = base_url if base_url is not None else MapQuestGeocoder.BASE_URL
+        self._api_key = api_key
+        self.session = requests.Session()
+        self.requests_sent = 0
+
+    def get_api_key(self) -> str:
+        if self._api_key is None:
+            from credentials import MapQuestCredentials
+            return MapQuestCredentials.get_api_key()
+        return self._api_key
+
+    def geocode(self, locations: Iterable[str]) -> Dict[str, Union[None, Coordinates]]:
+        locations = list(locations)
+        results = {}
+        missing = []
+        missing_keys = set()
+        for location in locations:
+            if not location or location in results:
+                continue
+            if location in self.cache:
+                results[location] = self.cache.get(location)
+            elif GeocodeCache.normalize(location) not in missing_keys:
+                missing.append(location)
+                missing_keys.add(GeocodeCache.normalize(location))
+        for i in range(0, len(missing), MapQuestGeocoder.MAX_BATCH_SIZE):
+            batch = missing[i:i + MapQuestGeocoder.MAX_BATCH_SIZE]
+            try:
+                batch_results = self._geocode_batch(batch)
+            except (requests.RequestException, ValueError, KeyError) as e:
+                # keep the unresolved ones out of the cache, they will be retried next time
+                logging.getLogger(self.__class__.__name__).log(logging.WARNING, f'geocoding failed: {e}')
+                break
+            self.cache.update(batch_results)
+            results.update(batch_results)
+        for location in locations:
+            if location and location not in results and location in self.cache:
+                # spelling variants of a location that was just resolved
+                results[location] = self.cache.get(location)
+        return results
+
+    def _geocode_batch(self, batch: List[str]) -> Dict[str, Union[None, Coordinates]]:
+        self.requests_sent += 1
+        response = self.session.post(f'{self.base_url}/batch',
+                                     params={'key': self.get_api_key()},
+                                     json={'locations': batch,
+                                           'options': {'maxResults': 1, 'thumbMaps': False}},
+                                     timeout=10)
+        if response.status_code != 200:
+            raise requests.RequestException(response.text, response=response)
+        results = {}
+        for location, result in zip(batch, json.loads(response.text)['results']):
+            results[location] = self._parse_result(result)
+        return results
+
+    @staticmethod
+    def _parse_result(result: dict) -> Union[None, Coordinates]:
+        if not result.get('locations'):
+            return None
+        best = result['locations'][0]
+        if best.get('geocodeQuality') in MapQuestGeocoder.REJECTED_QUALITIES:
+            return None
+        lat_lng = best['latLng']
+        return lat_lng['lat'], lat_lng['lng']
@@ -5,10 +5,15 @@ from typing import Union
 import requests
 
 from credentials import MapQuestCredentials
+from plugins.location.geocoding import MapQuestGeocoder
 from plugins.location.location_plugin import LocationPlugin
 
 
 class MapQuestLocationPlugin(LocationPlugin):
+    def __init__(self):
+        super().__init__()
+        self.geocoder = None
+
     def update_synchronously(self, *args) -> Union[str, None]:
         pass
 
@@ -16,7 +21,9 @@ class MapQuestLocationPlugin(LocationPlugin):
         pass
 
     def geocode(self, loc_str):
-        pass
+        if self.geocoder is None:
+            self.geocoder = MapQuestGeocoder()
+        return self.geocoder.geocode([loc_str]).get(loc_str)
 
     def reverse_geocode(self, lat, long):
         api_key = self.get_api_key()
@@ -1,13 +1,11 @@
 
-import time
 import sys
 import socket
 from typing import Union
-from collections import deque
-from threading import Thread
 from PyQt5.QtCore import QFileInfo, pyqtSignal
 from PyQt5.QtWidgets import QFileIconProvider
 
+from helpers.worker_pool import WorkerPool, TaskPriority, CancellationToken
 from plugins.base import BasePlugin
 import psutil
 
@@ -24,36 +22,40 @@ class NetworkPlugin(BasePlugin):
 
     found_hostname = pyqtSignal(str, str)
 
+    MAX_PARALLEL_LOOKUPS = 2
+
     def __init__(self):
         super(NetworkPlugin, self).__init__()
         self.oldConns = None
         self.icons = dict()
         self.known_hosts = dict()
         self.empty_icon = QIcon()
-        self.need_lookup = deque()
-        self.running = True
+        self.pending_lookups = set()
         self.denied_access = []
-        self.lookupThread = Thread(target=self.look_it_up, daemon=True)
-        self.lookupThread.start()
+        self.lookup_token = CancellationToken()
 
     def quit(self):
-        self.running = False
+        self.lookup_token.cancel()
 
-    def look_it_up(self):
-        while self.running:
-            while self.need_lookup:
-                r_add = self.need_lookup.popleft()
-                if r_add in self.known_hosts:
-                    continue
-                try:
-                    r_host = socket.gethostbyaddr(r_add)[0]
-                    self.known_hosts[r_add] = r_host
-                    self.log_info('FOUND HOST:', r_add, r_host)
-                    self.found_hostname.emit(r_add, r_host)
-                except socket.herror as e:
-                    self.log_error(r_add, e)
-                    self.known_hosts[r_add] = r_add
-            time.sleep(0.1)
+    def request_lookup(self, r_add):
+        if r_add in self.known_hosts or r_add in self.pending_lookups:
+            return
+        self.pending_lookups.add(r_add)
+        WorkerPool.shared().submit(self.look_it_up, args=[r_add], priority=TaskPriority.BACKGROUND,
+                                   owner=(self, 'lookup'), owner_limit=self.MAX_PARALLEL_LOOKUPS,
+                                   token=self.lookup_token)
+
+    def look_it_up(self, r_add):
+        try:
+            r_host = socket.gethostbyaddr(r_add)[0]
+            self.known_hosts[r_add] = r_host
+            self.log_info('FOUND HOST:', r_add, r_host)
+            self.found_hostname.emit(r_add, r_host)
+        except (socket.herror, socket.gaierror) as e:
+            self.log_error(r_add, e)
+            self.known_hosts[r_add] = r_add
+        finally:
+            self.pending_lookups.discard(r_add)
 
     def get_file_icon(self, path):
         provider = QFileIconProvider()
@@ -85,8 +87,7 @@ class NetworkPlugin(BasePlugin):
                 remote_host_name = self.known_hosts[remote_host[0]]
             else:
                 remote_host_name = remote_host[0]
-                if not remote_host[0] in self.need_lookup:
-                    self.need_lookup.append(remote_host[0])
+                self.request_lookup(remote_host[0])
             p_data = None
 
             if con.pid is None:
@@ -0,0 +1,116 @@
+import logging
+from typing import Iterable, Type, Union, Dict, List
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from helpers.worker_pool import WorkerPool, WorkerTask, TaskPriority
+from plugins.location.geocoding import MapQuestGeocoder, Coordinates
+from plugins.weather.weather_plugin import WeatherPlugin, WeatherReport
+from plugins.weather.weather_service import WeatherService
+
+
+class EventLocationWeather(QObject):
+    """
+    weather for the locations of calendar events.
+    location strings are geocoded once, snapped to a grid cell and all cells of the visible window
+    are fetched in one pass through the WeatherService.
+    """
+    weather_updated = pyqtSignal()
+
+    GRID_CELL_DEGREES = 0.1  # ~10km
+    MAX_CELLS_PER_PASS = 10
+
+    def __init__(self, backend_class: Type[WeatherPlugin], geocoder: MapQuestGeocoder = None):
+        super().__init__()
+        self.service = WeatherService.shared(backend_class)
+        self.service.locations_updated.connect(self._locations_updated)
+        self.geocoder = geocoder
+        self.home_cell = None  # type: Union[None, Coordinates]
+        self._cells = {}  # type: Dict[str, Coordinates]
+        self._geocode_task = None  # type: Union[None, WorkerTask]
+        self._queued_locations = None  # type: Union[None, List[str]]
+
+    @classmethod
+    def snap(cls, coordinates: Coordinates) -> Coordinates:
+        step = cls.GRID_CELL_DEGREES
+        return round(round(coordinates[0] / step) * step, 6), round(round(coordinates[1] / step) * step, 6)
+
+    @staticmethod
+    def _as_location(cell: Coordinates) -> dict:
+        return {'lat': cell[0], 'long': cell[1]}
+
+    def set_home_location(self, location: Union[None, dict]):
+        """ events in the cell of the widget's own location use the widget's report """
+        self.home_cell = self.snap((location['lat'], location['long'])) if location else None
+
+    def update_window(self, locations: Iterable[str]):
+        locations = sorted({location for location in locations if location})
+        if self._geocode_task is not None:
+            self._queued_locations = locations
+            return
+        if not locations:
+            self._cells.clear()
+            self.service.release_window(self)
+            return
+        if self.geocoder is None:
+            self.geocoder = MapQuestGeocoder()
+        self._geocode_task = WorkerPool.shared().submit(self._geocode, args=[locations],
+                                                        priority=TaskPriority.BACKGROUND)
+        self._geocode_task.finished.connect(self._geocoded)
+
+    def _geocode(self, locations: List[str]) -> Union[None, Dict[str, Union[None, Coordinates]]]:
+        try:
+            return self.geocoder.geocode(locations)
+        except Exception as e:
+            logging.getLogger(self.__class__.__name__).log(logging.WARNING, f'could not geocode event locations: {e}')
+            return None
+
+    @pyqtSlot(object)
+    def _geocoded(self, results: Union[None, Dict[str, Union[None, Coordinates]]]):
+        self._geocode_task = None
+        if results is not None:
+            self._set_window(results)
+        if self._queued_locations is not None:
+            queued, self._queued_locations = self._queued_locations, None
+            self.update_window(queued)
+
+    def _set_window(self, results: Dict[str, Union[None, Coordinates]]):
+        # only the current window is kept
+        self._cells.clear()
+        cells = []
+        for location, coordinates in results.items():
+            if coordinates is None:
+                continue
+            cell = self.snap(coordinates)
+            self._cells[location] = cell
+            if cell != self.home_cell and cell not in cells:
+                cells.append(cell)
+        # cells that left the window are released, even when the new window has none
+        self.service.update_locations([self._as_location(cell)
+                                       for cell in cells[:EventLocationWeather.MAX_CELLS_PER_PASS]], owner=self)
+
+    @pyqtSlot(list)
+    def _locations_updated(self, keys: list):
+        own_keys = {WeatherService.location_key(self._as_location(cell)) for cell in self._cells.values()}
+        if own_keys.intersection(keys):
+            self.weather_updated.emit()
+
+    def quit(self):
+        self._queued_locations = None
+        if self._geocode_task is not None:
+            self._geocode_task.cancel()
+            self._geocode_task = None
+        self.service.release_window(self)
+
+    def cell_for(self, location: str) -> Union[None, Coordinates]:
+        return self._cells.get(location)
+
+    def report_for(self, location: str) -> Union[None, WeatherReport]:
+        """
+        returns the report of the grid cell of the given location string,
+        None if it is unknown, not fetched yet or lies in the home cell
+        """
+        cell = self.cell_for(location)
+        if cell is None or cell == self.home_cell:
+            return None
+        return self.service.get_report(self._as_location(cell))
@@ -1,6 +1,7 @@
 import copy
 import logging
 import bisect
+import uuid
 from datetime import datetime, timedelta
 from typing import Union
 try:
@@ -36,6 +37,15 @@ class WeatherReport:
         self._location = location
         self._merged = None
         self._updated = updated
+        self._version = uuid.uuid4().hex
+
+    @property
+    def version(self) -> str:
+        """ identifies this report for caches, unlike id() it is never reused and survives pickling """
+        if getattr(self, '_version', None) is None:
+            # pickled before reports had versions
+            self._version = uuid.uuid4().hex
+        return self._version
 
     def get_location_name(self) -> str:
         return self._location
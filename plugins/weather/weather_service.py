@@ -0,0 +1,299 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Hashable, List, Set, Tuple, Type, Union
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot, pyqtSignal
+
+from credentials import NoCredentialsSetException, CredentialsNotValidException
+from helpers.worker_pool import WorkerPool, WorkerTask, TaskPriority
+from plugins.base import APILimitExceededException
+from plugins.weather.weather_plugin import WeatherPlugin, WeatherReport
+
+LocationKey = Union[None, Tuple[float, float]]
+
+
+class _SharedLocation:
+    def __init__(self, key: LocationKey, backend: WeatherPlugin):
+        self.key = key
+        self.backend = backend
+        self.subscribers = []  # type: List[SharedWeatherPlugin]
+        self.requesters = []  # type: List[SharedWeatherPlugin]
+        self.report = None  # type: Union[None, WeatherReport]
+        self.updated = None  # type: Union[None, datetime]
+        self.in_flight = False
+
+
+class WeatherService(QObject):
+    """
+    process-wide weather data service.
+    keeps one backend plugin per (rounded) location and hands the same WeatherReport to all subscribers of it.
+    backends only live while a subscriber or the window of a batch owner still uses their location.
+    """
+    locations_updated = pyqtSignal(list)
+
+    LOCATION_PRECISION = 2  # decimal places of lat/long, ~1km
+    MIN_REFRESH_SECONDS = 60
+    MAX_REPORT_AGE_SECONDS = 3600
+    # batch passes leave this many requests of the hourly quota for the widgets' own locations
+    RESERVED_HOURLY_REQUESTS = 5
+    BATCH_REQUEST_INTERVAL_SECONDS = 1.0
+
+    __SERVICES__ = {}  # type: Dict[str, WeatherService]
+
+    def __init__(self, backend_class: Type[WeatherPlugin]):
+        super().__init__()
+        self.backend_class = backend_class
+        self._locations = {}  # type: Dict[LocationKey, _SharedLocation]
+        self._backends = {}  # type: Dict[WeatherPlugin, _SharedLocation]
+        self._windows = {}  # type: Dict[Hashable, Set[LocationKey]]
+        self._batch_task = None  # type: Union[None, WorkerTask]
+
+    @classmethod
+    def shared(cls, backend_class: Type[WeatherPlugin]) -> "WeatherService":
+        name = f'{backend_class.__module__}.{backend_class.__name__}'
+        if name not in cls.__SERVICES__:
+            cls.__SERVICES__[name] = WeatherService(backend_class)
+        return cls.__SERVICES__[name]
+
+    @classmethod
+    def location_key(cls, location: Union[None, dict]) -> LocationKey:
+        if not location:
+            return None
+        return round(float(location['lat']), cls.LOCATION_PRECISION), \
+            round(float(location['long']), cls.LOCATION_PRECISION)
+
+    def _get_or_create(self, key: LocationKey) -> _SharedLocation:
+        if key not in self._locations:
+            backend = self.backend_class()
+            if key is not None:
+                backend.set_location({'lat': key[0], 'long': key[1]})
+            backend.new_data_available.connect(self._backend_data_ready)
+            backend.threaded_exception.connect(self._backend_exception)
+            backend.plugin_log.connect(self._backend_log)
+            backend.setup()
+            shared = _SharedLocation(key, backend)
+            self._locations[key] = shared
+            self._backends[backend] = shared
+        return self._locations[key]
+
+    def subscribe(self, subscriber: "SharedWeatherPlugin", location: Union[None, dict]) -> None:
+        key = self.location_key(location)
+        current = self._find(subscriber)
+        if current is not None:
+            if current.key == key:
+                return
+            self.unsubscribe(subscriber)
+        shared = self._get_or_create(key)
+        shared.subscribers.append(subscriber)
+        if shared.report is not None:
+            subscriber.last_update = shared.updated
+
+    def unsubscribe(self, subscriber: "SharedWeatherPlugin") -> None:
+        shared = self._find(subscriber)
+        if shared is None:
+            return
+        shared.subscribers.remove(subscriber)
+        if subscriber in shared.requesters:
+            shared.requesters.remove(subscriber)
+        self._release_unused()
+
+    def _release_unused(self):
+        """ quits the backends of locations nobody subscribed to and no window contains anymore """
+        used = set().union(*self._windows.values())
+        for key, shared in list(self._locations.items()):
+            if shared.subscribers or key in used:
+                continue
+            self._locations.pop(key)
+            self._backends.pop(shared.backend, None)
+            shared.backend.quit()
+
+    def release_window(self, owner: Hashable) -> None:
+        """ forgets the locations last passed to update_locations by owner """
+        if self._windows.pop(owner, None) is not None:
+            self._release_unused()
+
+    def _find(self, subscriber: "SharedWeatherPlugin") -> Union[None, _SharedLocation]:
+        for shared in self._locations.values():
+            if subscriber in shared.subscribers:
+                return shared
+        return None
+
+    def get_backend(self, subscriber: "SharedWeatherPlugin") -> Union[None, WeatherPlugin]:
+        shared = self._find(subscriber)
+        return shared.backend if shared is not None else None
+
+    def get_report(self, location: Union[None, dict]) -> Union[None, WeatherReport]:
+        shared = self._locations.get(self.location_key(location))
+        return shared.report if shared is not None else None
+
+    def request_update(self, subscriber: "SharedWeatherPlugin") -> None:
+        shared = self._find(subscriber)
+        if shared is None:
+            return
+        if subscriber not in shared.requesters:
+            shared.requesters.append(subscriber)
+        if shared.in_flight:
+            # somebody already asked for this location, the result will be handed out to everybody
+            return
+        if shared.report is not None and \
+                (datetime.now() - shared.updated).total_seconds() < WeatherService.MIN_REFRESH_SECONDS:
+            QTimer.singleShot(0, lambda: self._deliver(shared, shared.report))
+            return
+        shared.in_flight = True
+        shared.backend.update_async()
+
+    def update_locations(self, locations: List[dict], owner: Hashable = None) -> None:
+        """
+        fetches all given locations in one background pass.
+        locations with a recent report or an update in flight are skipped.
+        with an owner, the locations replace its previous window, locations that dropped out of it are released.
+        """
+        if owner is not None:
+            self._windows[owner] = {self.location_key(location) for location in locations}
+            self._release_unused()
+        pending = []
+        now = datetime.now()
+        for location in locations:
+            shared = self._get_or_create(self.location_key(location))
+            if shared.in_flight or shared in pending:
+                continue
+            if shared.updated is not None and \
+                    (now - shared.updated).total_seconds() < WeatherService.MAX_REPORT_AGE_SECONDS:
+                continue
+            shared.in_flight = True
+            pending.append(shared)
+        if not pending:
+            return
+        self._batch_task = WorkerPool.shared().submit(self._update_batch, args=[pending],
+                                                      priority=TaskPriority.BACKGROUND)
+        self._batch_task.finished.connect(self._batch_ready)
+
+    @staticmethod
+    def _remaining_hourly_requests(backend: WeatherPlugin) -> Union[None, int]:
+        try:
+            return int(getattr(backend, 'remaining_requests')['hour']['remaining'])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def _update_batch(self, pending: List[_SharedLocation]) -> List[Tuple[_SharedLocation, Union[None, WeatherReport]]]:
+        results = []
+        for i, shared in enumerate(pending):
+            if i > 0:
+                remaining = self._remaining_hourly_requests(pending[i - 1].backend)
+                if remaining is not None and remaining <= WeatherService.RESERVED_HOURLY_REQUESTS:
+                    shared.backend.log_warn(f'skipping {len(pending) - i} locations, '
+                                            f'only {remaining} requests left this hour')
+                    results.extend((skipped, None) for skipped in pending[i:])
+                    break
+                time.sleep(WeatherService.BATCH_REQUEST_INTERVAL_SECONDS)
+            try:
+                results.append((shared, shared.backend.update_synchronously()))
+                shared.backend.last_update = datetime.now()
+            except (APILimitExceededException, NoCredentialsSetException, CredentialsNotValidException) as e:
+                shared.backend.log_warn(f'stopping batch update: {e}')
+                results.extend((skipped, None) for skipped in pending[i:])
+                break
+            except Exception as e:
+                shared.backend.log_error(f'batch update for {shared.key} failed:', e)
+                results.append((shared, None))
+        return results
+
+    @pyqtSlot(object)
+    def _batch_ready(self, results: List[Tuple[_SharedLocation, Union[None, WeatherReport]]]):
+        updated = []
+        for shared, report in results:
+            shared.in_flight = False
+            if report is None or self._locations.get(shared.key) is not shared:
+                # released while the batch was running
+                continue
+            shared.report = report
+            shared.updated = shared.backend.last_update
+            updated.append(shared.key)
+            if shared.subscribers:
+                self._deliver(shared, report)
+        if updated:
+            self.locations_updated.emit(updated)
+
+    def _deliver(self, shared: _SharedLocation, report: Union[None, WeatherReport]):
+        shared.requesters.clear()
+        for subscriber in list(shared.subscribers):
+            if shared.updated is not None:
+                # no report yet, subscribers keep the datetime they started with
+                subscriber.last_update = shared.updated
+            subscriber.publish(report)
+
+    @pyqtSlot(object)
+    def _backend_data_ready(self, report: Union[None, WeatherReport]):
+        # noinspection PyTypeChecker
+        shared = self._backends.get(self.sender())
+        if shared is None:
+            return
+        shared.in_flight = False
+        if report is not None:
+            shared.report = report
+            shared.updated = shared.backend.last_update
+        self._deliver(shared, report)
+
+    @pyqtSlot(Exception)
+    def _backend_exception(self, exception: Exception):
+        # noinspection PyTypeChecker
+        shared = self._backends.get(self.sender())
+        if shared is None:
+            return
+        shared.in_flight = False
+        receivers = list(shared.requesters) if shared.requesters else shared.subscribers[:1]
+        shared.requesters.clear()
+        for subscriber in receivers:
+            subscriber.threaded_exception.emit(exception)
+
+    @pyqtSlot(str, int)
+    def _backend_log(self, msg: str, level: int):
+        # noinspection PyTypeChecker
+        shared = self._backends.get(self.sender())
+        if shared is None:
+            logging.getLogger(self.__class__.__name__).log(level, msg)
+            return
+        for subscriber in shared.subscribers[:1]:
+            subscriber.plugin_log.emit(msg, level)
+
+
+class SharedWeatherPlugin(WeatherPlugin):
+    """
+    per-widget handle on the WeatherService.
+    behaves like a regular WeatherPlugin, but all handles for the same location share one backend and one report.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.service = None  # type: Union[None, WeatherService]
+        self.location = None
+
+    def set_backend(self, backend_class: Type[WeatherPlugin]):
+        if self.service is not None:
+            self.service.unsubscribe(self)
+        self.service = WeatherService.shared(backend_class)
+        self.service.subscribe(self, self.location)
+
+    def setup(self):
+        pass
+
+    def quit(self):
+        if self.service is not None:
+            self.service.unsubscribe(self)
+
+    def set_location(self, location):
+        self.location = location
+        if self.service is not None:
+            self.service.subscribe(self, location)
+
+    def get_report(self) -> Union[None, WeatherReport]:
+        return self.service.get_report(self.location) if self.service is not None else None
+
+    def update_async(self, *args, **kwargs) -> None:
+        if self.service is None:
+            raise RuntimeError(f'{self.__class__.__name__} has no backend set')
+        self.service.request_update(self)
+
+    def update_synchronously(self, *args, **kwargs) -> Union[WeatherReport, None]:
+        return self.service.get_backend(self).update_synchronously(*args, **kwargs)
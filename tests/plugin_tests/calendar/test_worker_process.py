@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from credentials import Credentials, CredentialsNotValidException, CalDAVCredentials, CredentialType, \
+    NoCredentialsSetException
+from helpers.tools import PathManager
+from plugins.calendarplugin.calendar_plugin import CalendarPlugin, CalendarData
+from tests.plugin_tests.calendar.data_generator import CalendarPluginDataGenerator
+
+
+class ResidentCalendarPlugin(CalendarPlugin):
+    """ parses its calendar once per process and returns windowed events with the pid it ran in """
+    SUPPORTS_WORKER_PROCESS = True
+
+    def __init__(self):
+        super().__init__()
+        self.events = None
+        self.parsed = 0
+
+    def setup(self):
+        pass
+
+    def quit(self):
+        self.set_worker_process_enabled(False)
+
+    def reload_state(self):
+        self.events = None
+
+    def update_synchronously(self, days_in_future: int, days_in_past: int,
+                             cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH, *args, **kwargs):
+        if days_in_future < 0:
+            raise CredentialsNotValidException(CalDAVCredentials, CredentialType.PASSWORD)
+        password = CalDAVCredentials._try_get(CredentialType.PASSWORD) if kwargs.get('needs_password') else None
+        if self.events is None:
+            self.parsed += 1
+            now = datetime.now()
+            self.events = [CalendarPluginDataGenerator.generate_event(start=now + timedelta(days=d, hours=1))
+                           for d in range(-30, 30)]
+        if cache_mode == CalendarPlugin.CacheMode.REFRESH_LATER:
+            self.schedule_follow_up(days_in_future=days_in_future, days_in_past=days_in_past,
+                                    cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH)
+        start = datetime.now() - timedelta(days=days_in_past)
+        end = datetime.now() + timedelta(days=days_in_future)
+        return CalendarData(calendars={}, colors={'pid': os.getpid(), 'parsed': self.parsed, 'password': password},
+                            events={e.id: e for e in self.events if start <= e.start <= end})
+
+
+class TestCalendarWorkerProcess(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.base_path = PathManager.__BASE_PATH__
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        PathManager.__BASE_PATH__ = self.tmp_dir.name
+        self.plugin = ResidentCalendarPlugin()
+        self.plugin.set_worker_process_enabled(True)
+
+    def tearDown(self) -> None:
+        self.plugin.quit()
+        Credentials.forget_loaded()
+        PathManager.__BASE_PATH__ = self.base_path
+        self.tmp_dir.cleanup()
+
+    def test_updates_run_in_resident_worker(self):
+        data = self.plugin.execute_update(days_in_future=2, days_in_past=1)
+        self.assertNotEqual(data.colors['pid'], os.getpid())
+        self.assertEqual(len(data.events), 3)
+        data = self.plugin.execute_update(days_in_future=5, days_in_past=5,
+                                          cache_mode=CalendarPlugin.CacheMode.REFRESH_LATER)
+        self.assertEqual(len(data.events), 10)
+        self.assertEqual(data.colors['parsed'], 1)
+        self.assertIsNotNone(self.plugin.follow_up_update)
+        self.assertEqual(self.plugin.follow_up_update[2]['cache_mode'], CalendarPlugin.CacheMode.FORCE_REFRESH)
+        self.assertIsNone(self.plugin.events)
+
+        # local changes make the worker re-read its state
+        self.plugin.local_state_changed()
+        data = self.plugin.execute_update(days_in_future=2, days_in_past=1)
+        self.assertEqual(data.colors['parsed'], 2)
+
+    def test_exceptions_are_passed_on(self):
+        with self.assertRaises(CredentialsNotValidException) as context:
+            self.plugin.execute_update(days_in_future=-1, days_in_past=1)
+        self.assertEqual(context.exception.credential_type, CredentialType.PASSWORD)
+        self.assertIs(context.exception.credentials, CalDAVCredentials)
+
+        self.plugin.set_worker_process_enabled(False)
+        data = self.plugin.execute_update(days_in_future=2, days_in_past=1)
+        self.assertEqual(data.colors['pid'], os.getpid())
+
+    def test_entered_credentials_reach_the_worker(self):
+        with self.assertRaises(NoCredentialsSetException):
+            self.plugin.execute_update(days_in_future=2, days_in_past=1, needs_password=True)
+
+        # entered in the gui process after the prompt
+        CalDAVCredentials._check_data()
+        CalDAVCredentials.set_credentials(CredentialType.PASSWORD, 'secret')
+        data = self.plugin.execute_update(days_in_future=2, days_in_past=1, needs_password=True)
+        self.assertEqual(data.colors['password'], 'secret')
+        self.assertNotEqual(data.colors['pid'], os.getpid())
@@ -0,0 +1,70 @@
+import json
+import tempfile
+import unittest
+
+from helpers.tools import PathManager
+from plugins.location.geocoding import GeocodeCache, MapQuestGeocoder
+from plugins.weather.event_weather import EventLocationWeather
+from tests.plugin_tests.stand_in_server import StandInServer
+
+KNOWN_LOCATIONS = {
+    'hamburg': {'latLng': {'lat': 53.550341, 'lng': 10.000654}, 'geocodeQuality': 'CITY'},
+    'jungfernstieg 1, hamburg': {'latLng': {'lat': 53.553, 'lng': 9.9925}, 'geocodeQuality': 'ADDRESS'},
+    'germany': {'latLng': {'lat': 51.16, 'lng': 10.45}, 'geocodeQuality': 'COUNTRY'},
+}
+
+
+def geocoding_responder(method, path, query, body):
+    if method != 'POST' or path != '/geocoding/v1/batch' or query.get('key') != ['test-key']:
+        return StandInServer.json_response({'info': 'bad request'}, status=400)
+    results = []
+    for location in json.loads(body)['locations']:
+        known = KNOWN_LOCATIONS.get(GeocodeCache.normalize(location))
+        results.append({'providedLocation': {'location': location}, 'locations': [known] if known else []})
+    return StandInServer.json_response({'results': results})
+
+
+class TestGeocoding(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.base_path = PathManager.__BASE_PATH__
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        PathManager.__BASE_PATH__ = self.tmp_dir.name
+        self.server = StandInServer(geocoding_responder).start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        PathManager.__BASE_PATH__ = self.base_path
+        self.tmp_dir.cleanup()
+
+    def create_geocoder(self) -> MapQuestGeocoder:
+        return MapQuestGeocoder(GeocodeCache('test_geocode_cache'),
+                                base_url=f'{self.server.url}/geocoding/v1', api_key='test-key')
+
+    def test_batch_and_persistent_cache(self):
+        locations = ['Hamburg', 'Jungfernstieg 1, Hamburg', '  hamburg', 'Atlantis', 'Germany']
+        results = self.create_geocoder().geocode(locations)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(json.loads(self.server.requests[0][3])['locations']), 4)
+        self.assertEqual(results['Hamburg'], (53.550341, 10.000654))
+        self.assertEqual(results['  hamburg'], results['Hamburg'])
+        self.assertIsNone(results['Atlantis'])
+        self.assertIsNone(results['Germany'])
+
+        # a new geocoder reads the cache from disk, nothing (not even the misses) is requested again
+        results = self.create_geocoder().geocode(locations + ['HAMBURG'])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(results['HAMBURG'], (53.550341, 10.000654))
+        self.assertIsNone(results['Atlantis'])
+
+    def test_failed_requests_are_not_cached(self):
+        geocoder = MapQuestGeocoder(GeocodeCache('test_geocode_cache'),
+                                    base_url=f'{self.server.url}/geocoding/v1', api_key='wrong-key')
+        self.assertEqual(geocoder.geocode(['Hamburg']), {})
+        self.assertNotIn('Hamburg', geocoder.cache)
+
+    def test_grid_cells(self):
+        results = self.create_geocoder().geocode(['Hamburg', 'Jungfernstieg 1, Hamburg'])
+        self.assertEqual(EventLocationWeather.snap(results['Hamburg']),
+                         EventLocationWeather.snap(results['Jungfernstieg 1, Hamburg']))
+        self.assertEqual(EventLocationWeather.snap(results['Hamburg']), (53.6, 10.0))
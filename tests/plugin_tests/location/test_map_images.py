@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+import unittest
+
+from helpers.map_image_cache import MapImageCache
+from helpers.tools import PathManager
+from helpers.widget_helpers import MapImageHelper
+from tests.plugin_tests.stand_in_server import StandInServer
+from tests.widget_tests import base
+
+KNOWN_LOCATIONS = {'hamburg': b'\x89PNG hamburg', 'berlin': b'\x89PNG berlin' * 100, 'bremen': b'\x89PNG bremen'}
+
+
+def map_responder(method, path, query, body):
+    if query.get('key') != ['test-key']:
+        return 401, 'text/plain', b'unauthorized'
+    if path != '/staticmap/v5/map':
+        return 400, 'text/plain', b'bad request'
+    image = KNOWN_LOCATIONS.get(MapImageCache.normalize(query['center'][0]))
+    if image is None:
+        return 404, 'text/plain', b'not found'
+    return 200, 'image/png', image
+
+
+class TestMapImages(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.base_path = PathManager.__BASE_PATH__
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        PathManager.__BASE_PATH__ = self.tmp_dir.name
+        self.server = StandInServer(map_responder).start()
+        self.helpers = []
+
+    def tearDown(self) -> None:
+        # pending index saves belong into the temporary storage
+        for helper in self.helpers:
+            helper.cache._deferred_save.flush()
+        self.server.stop()
+        PathManager.__BASE_PATH__ = self.base_path
+        self.tmp_dir.cleanup()
+
+    def create_helper(self, max_bytes: int = MapImageCache.MAX_BYTES, path: str = '/staticmap/v5/map',
+                      storage_name: str = 'test_map_image_cache', api_key: str = 'test-key') -> MapImageHelper:
+        helper = MapImageHelper(MapImageCache(storage_name, max_bytes=max_bytes),
+                                base_url=f'{self.server.url}{path}', api_key=api_key)
+        self.helpers.append(helper)
+        return helper
+
+    def test_persistent_cache(self):
+        helper = self.create_helper()
+        img = helper.get_map_image_base_64('Hamburg')
+        self.assertTrue(img.startswith("<img src='data:image/png;base64,"))
+        self.assertEqual(len(self.server.requests), 1)
+
+        # a new helper reads the image from disk once the index was saved
+        helper.cache._deferred_save.flush()
+        self.assertEqual(self.create_helper().get_map_image_base_64('  HAMBURG'), img)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_failures_expire(self):
+        helper = self.create_helper()
+        self.assertEqual(helper.get_map_image_base_64('Atlantis'), '')
+        helper.cache._deferred_save.flush()
+        self.assertEqual(self.create_helper().get_map_image_base_64('Atlantis'), '')
+        self.assertEqual(len(self.server.requests), 1)
+
+        entry = next(iter(helper.cache._index.values()))
+        entry.fetched -= MapImageCache.NEGATIVE_TTL + 1
+        self.assertNotIn(('Atlantis', 250, 10), helper.cache)
+        self.assertEqual(helper.get_map_image_base_64('Atlantis'), '')
+        self.assertEqual(len(self.server.requests), 2)
+
+        # rejected requests keep no image
+        broken = self.create_helper(path='/map', storage_name='test_broken_cache')
+        self.assertEqual(broken.get_map_image_base_64('Hamburg'), '')
+        self.assertEqual(broken.cache.total_bytes, 0)
+
+    def test_rejected_key_is_not_cached(self):
+        helper = self.create_helper(api_key='expired-key')
+        self.assertEqual(helper.get_map_image_base_64('Hamburg'), '')
+        self.assertNotIn(('Hamburg', 250, 10), helper.cache)
+        self.assertEqual(len(helper.cache._index), 0)
+
+        # a renewed key is used right away
+        helper._api_key = 'test-key'
+        self.assertTrue(helper.get_map_image_base_64('Hamburg').startswith("<img src='data:image/png;base64,"))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_least_recently_used_are_evicted(self):
+        helper = self.create_helper(max_bytes=len(KNOWN_LOCATIONS['berlin']) + 20)
+        helper.get_map_image_base_64('Hamburg')
+        time.sleep(0.01)
+        helper.get_map_image_base_64('Bremen')
+        time.sleep(0.01)
+        helper.cache.get('Hamburg', 250, 10)
+        time.sleep(0.01)
+        helper.get_map_image_base_64('Berlin')
+        self.assertIn(('Hamburg', 250, 10), helper.cache)
+        self.assertNotIn(('Bremen', 250, 10), helper.cache)
+        self.assertLessEqual(helper.cache.total_bytes, helper.cache.max_bytes)
+
+    def test_prefetch_in_background(self):
+        helper = self.create_helper()
+        task = helper.prefetch(['Hamburg', 'hamburg', 'Berlin', 'Atlantis', ''])
+        self.assertIsNotNone(task)
+        end = time.time() + 5
+        while len(self.server.requests) < 3 and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertIsNone(helper.prefetch(['Hamburg', 'Berlin', 'Atlantis']))
+        helper.get_map_image_base_64('Berlin')
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_recency_is_persisted(self):
+        helper = self.create_helper()
+        helper.get_map_image_base_64('Hamburg')
+        helper.get_map_image_base_64('Bremen')
+        time.sleep(0.01)
+        helper.cache.get('Hamburg', 250, 10)
+        self.assertTrue(helper.cache._deferred_save.pending)
+        helper.cache._deferred_save.flush()
+
+        cache = MapImageCache('test_map_image_cache')
+        key = MapImageCache.key
+        self.assertGreater(cache._index[key('Hamburg', 250, 10)].used, cache._index[key('Bremen', 250, 10)].used)
+
+        # an image whose index entry was never saved is removed
+        with open(os.path.join(cache.directory(), 'orphan'), 'wb') as f:
+            f.write(b'lost')
+        MapImageCache('test_map_image_cache')
+        self.assertFalse(os.path.exists(os.path.join(cache.directory(), 'orphan')))
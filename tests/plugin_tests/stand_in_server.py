@@ -0,0 +1,58 @@
+import json
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from typing import Callable, Tuple, List
+from urllib.parse import urlparse, parse_qs
+
+
+class StandInServer:
+    """
+    local http server standing in for a web api.
+    every request is recorded and answered by the given responder: (method, path, query, body) -> (status, type, data)
+    """
+
+    def __init__(self, responder: Callable[[str, str, dict, bytes], Tuple[int, str, bytes]]):
+        self.responder = responder
+        self.requests = []  # type: List[Tuple[str, str, dict, bytes]]
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, method):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server.requests.append((method, url.path, query, body))
+                status, content_type, data = server.responder(method, url.path, query, body)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def start(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @staticmethod
+    def json_response(data: object, status: int = 200) -> Tuple[int, str, bytes]:
+        return status, 'application/json', json.dumps(data).encode()
@@ -0,0 +1,131 @@
+import threading
+import time
+import unittest
+
+from plugins.base import BasePlugin, KeyChanges
+from tests.widget_tests import base
+
+
+class SlowPlugin(BasePlugin):
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.runs = []
+
+    def setup(self, *args):
+        pass
+
+    def update_synchronously(self, window, follow_up=False, *args, **kwargs):
+        self.runs.append(window)
+        self.gate.wait(5)
+        if follow_up:
+            self.schedule_follow_up(window)
+        self.raise_if_superseded()
+        return window
+
+
+class ChangingPlugin(BasePlugin):
+    """ keeps a dict of items and reports which of them an update touched """
+
+    def __init__(self):
+        super().__init__()
+        self.items = {}
+
+    def setup(self, *args):
+        pass
+
+    def update_synchronously(self, window, add=(), remove=(), *args, **kwargs):
+        changes = KeyChanges()
+        for key in add:
+            (changes.changed if key in self.items else changes.added).add(key)
+            self.items[key] = window
+        for key in remove:
+            if self.items.pop(key, None) is not None:
+                changes.removed.add(key)
+        self.report_changes(changes)
+        return dict(self.items)
+
+    def get_update_key(self, window, *args, **kwargs) -> object:
+        return window
+
+
+class TestPluginUpdates(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.plugin = SlowPlugin()
+        self.received = []
+        self.plugin.new_data_available.connect(self.received.append)
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_newest_request_wins(self):
+        self.plugin.update_async('week 1')
+        self.wait_for(lambda: self.plugin.runs)
+        self.plugin.update_async('week 2')
+        self.plugin.update_async('week 3')
+        self.plugin.gate.set()
+        self.wait_for(lambda: self.received)
+        time.sleep(0.1)
+        self.app.processEvents()
+        self.assertEqual(self.received, ['week 3'])
+        self.assertNotIn('week 2', self.plugin.runs)
+        self.assertFalse(self.plugin.currently_updating)
+
+    def test_same_window_joins(self):
+        self.plugin.update_async('week 1')
+        self.plugin.update_async('week 1')
+        self.plugin.gate.set()
+        self.wait_for(lambda: self.received)
+        self.assertEqual(self.plugin.runs, ['week 1'])
+
+    def test_follow_up(self):
+        self.plugin.gate.set()
+        self.plugin.update_async('week 1', follow_up=True)
+        self.wait_for(lambda: len(self.received) == 2)
+        self.assertEqual(self.plugin.runs, ['week 1', 'week 1'])
+
+
+class TestPluginDeltas(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.plugin = ChangingPlugin()
+        self.deltas = []
+        self.plugin.data_changed.connect(self.deltas.append)
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def update(self, *args, **kwargs):
+        count = len(self.deltas)
+        self.plugin.update_async(*args, **kwargs)
+        self.wait_for(lambda: len(self.deltas) > count)
+        return self.deltas[-1]
+
+    def test_merge(self):
+        merged = KeyChanges.merge_all([KeyChanges(added=['a', 'b'], removed=['c']),
+                                       KeyChanges(changed=['a'], added=['c'], removed=['b'])])
+        self.assertEqual((merged.added, merged.changed, merged.removed), ({'a'}, {'c'}, set()))
+        self.assertIsNone(KeyChanges.merge_all([KeyChanges(added=['a']), None]))
+
+    def test_deltas_follow_snapshots(self):
+        first = self.update('week 1', add=['a', 'b'])
+        self.assertTrue(first.is_full)
+        delta = self.update('week 1', add=['b', 'c'], remove=['a'])
+        self.assertEqual(delta.base_version, first.version)
+        self.assertEqual((delta.changes.added, delta.changes.changed, delta.changes.removed),
+                         ({'c'}, {'b'}, {'a'}))
+        self.assertEqual(set(delta.snapshot), {'b', 'c'})
+        # a snapshot for another window is not related to the previous one
+        self.assertTrue(self.update('week 2', add=['d']).is_full)
@@ -0,0 +1,85 @@
+import csv
+import json
+import tempfile
+import unittest
+
+from helpers.metrics import Metrics, MetricStage
+from helpers.tools import PathManager
+
+
+class Parser:
+
+    @classmethod
+    @Metrics.timed(MetricStage.PARSE)
+    def parse(cls, text):
+        return text.split()
+
+
+class Painter:
+
+    @Metrics.timed(MetricStage.PAINT)
+    def paint(self):
+        pass
+
+
+class ClockPainter(Painter):
+
+    @Metrics.timed(MetricStage.PAINT)
+    def paint(self):
+        super().paint()
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.enabled = Metrics.enabled
+        Metrics.reset()
+
+    def tearDown(self) -> None:
+        Metrics.set_enabled(self.enabled)
+        Metrics.reset()
+
+    def test_disabled_records_nothing(self):
+        Metrics.set_enabled(False)
+        Parser.parse('a b')
+        Metrics.count('Parser', 'calls')
+        with Metrics.measure('Parser', MetricStage.LAYOUT):
+            pass
+        snapshot = Metrics.snapshot()
+        self.assertEqual((snapshot['counters'], snapshot['histograms']), ([], []))
+
+    def test_recording_and_export(self):
+        Metrics.set_enabled(True)
+        for _ in range(3):
+            self.assertEqual(Parser.parse('a b'), ['a', 'b'])
+        Metrics.count('Parser', 'calls', 2)
+        Metrics.gauge('Parser', 'events', 7)
+        with Metrics.measure('Parser', MetricStage.LAYOUT):
+            pass
+        snapshot = Metrics.snapshot()
+        histograms = {(h['component'], h['stage']): h for h in snapshot['histograms']}
+        self.assertEqual(histograms[('Parser', MetricStage.PARSE)]['count'], 3)
+        self.assertEqual(histograms[('Parser', MetricStage.LAYOUT)]['count'], 1)
+        self.assertEqual(snapshot['counters'], [{'component': 'Parser', 'stage': 'calls', 'value': 2}])
+        self.assertIn('Parser', Metrics.summary())
+
+        base_path = PathManager.__BASE_PATH__
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            PathManager.__BASE_PATH__ = tmp_dir
+            try:
+                json_path, csv_path = Metrics.export('metrics_test')
+                with open(json_path) as f:
+                    self.assertEqual(len(json.load(f)['histograms']), 2)
+                with open(csv_path) as f:
+                    self.assertEqual([row['kind'] for row in csv.DictReader(f)],
+                                     ['counter', 'gauge', 'histogram', 'histogram'])
+            finally:
+                PathManager.__BASE_PATH__ = base_path
+
+    def test_super_calls_are_recorded_once(self):
+        Metrics.set_enabled(True)
+        ClockPainter().paint()
+        Painter().paint()
+        histograms = {(h['component'], h['stage']): h for h in Metrics.snapshot()['histograms']}
+        self.assertEqual(histograms[('ClockPainter', MetricStage.PAINT)]['count'], 1)
+        self.assertEqual(histograms[('Painter', MetricStage.PAINT)]['count'], 1)
@@ -0,0 +1,79 @@
+import json
+import tempfile
+import time
+import unittest
+
+from PyQt5.QtWidgets import QWidget
+
+from helpers.metrics import Metrics, MetricStage
+from helpers.tools import PathManager
+from helpers.tracing import Tracer
+from plugins.base import BasePlugin
+from tests.widget_tests import base
+
+
+class EchoPlugin(BasePlugin):
+
+    def setup(self, *args):
+        pass
+
+    def update_synchronously(self, value, *args, **kwargs):
+        return value
+
+
+class PaintedWidget(QWidget):
+
+    @Metrics.timed(MetricStage.PAINT)
+    def paintEvent(self, event):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.enabled = Tracer.enabled
+        Tracer.reset()
+        Tracer.set_enabled(True)
+
+    def tearDown(self) -> None:
+        Tracer.set_enabled(self.enabled)
+        Tracer.reset()
+
+    def test_trace_from_request_to_paint(self):
+        plugin = EchoPlugin()
+        widget = PaintedWidget()
+        widget.resize(20, 20)
+        widget.show()
+        received = []
+
+        def data_ready(data):
+            received.append(data)
+            Tracer.request_paint()
+            widget.repaint()
+
+        plugin.new_data_available.connect(data_ready)
+        plugin.update_async('week 1')
+        end = time.time() + 5
+        while not received and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(received, ['week 1'])
+
+        base_path = PathManager.__BASE_PATH__
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            PathManager.__BASE_PATH__ = tmp_dir
+            try:
+                with open(Tracer.export('trace_test')) as f:
+                    events = json.load(f)['traceEvents']
+            finally:
+                PathManager.__BASE_PATH__ = base_path
+        spans = {e['name']: e for e in events if e['ph'] == 'X'}
+        trace_ids = {spans[name]['args'].get('trace_id') for name in
+                     ['EchoPlugin.update_async', 'EchoPlugin.update_sync', 'deliver',
+                      'EchoPlugin.new_data_available', 'PaintedWidget.paint']}
+        self.assertEqual(len(trace_ids), 1)
+        self.assertIsNotNone(trace_ids.pop())
+        self.assertNotEqual(spans['EchoPlugin.update_sync']['tid'], spans['EchoPlugin.update_async']['tid'])
+        self.assertTrue(any(e['ph'] == 's' for e in events))
+        widget.close()
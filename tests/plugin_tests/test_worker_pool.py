@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+
+from helpers.worker_pool import WorkerPool, TaskPriority, CancellationToken
+from tests.widget_tests import base
+
+
+class TestWorkerPool(unittest.TestCase):
+    app = base.papp
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_priorities_and_delivery(self):
+        pool = WorkerPool(max_workers=1)
+        gate = threading.Event()
+        order = []
+        delivered = []
+        pool.submit(gate.wait)
+        for name, priority in [('background', TaskPriority.BACKGROUND), ('default', TaskPriority.DEFAULT),
+                               ('visible', TaskPriority.UI_VISIBLE)]:
+            task = pool.submit(lambda n=name: order.append(n) or n, priority=priority)
+            task.finished.connect(lambda result: delivered.append((result, threading.current_thread())))
+        gate.set()
+        self.wait_for(lambda: len(delivered) == 3)
+        self.assertEqual(order, ['visible', 'default', 'background'])
+        self.assertTrue(all(thread is threading.main_thread() for _, thread in delivered))
+
+    def test_owner_limit_and_cancellation(self):
+        pool = WorkerPool(max_workers=4)
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def work():
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return WorkerPool.current_token().cancelled
+
+        results = []
+        token = CancellationToken()
+        for _ in range(6):
+            pool.submit(work, owner='plugin', owner_limit=2).finished.connect(results.append)
+        cancelled = pool.submit(work, owner='plugin', owner_limit=2, token=token)
+        cancelled.finished.connect(lambda _: results.append('cancelled'))
+        token.cancel()
+        self.wait_for(lambda: len(results) == 6 and pool.pending() == 0)
+        self.app.processEvents()
+        self.assertEqual(running[1], 2)
+        self.assertNotIn('cancelled', results)
@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+
+class ClimacellResponseGenerator:
+    """
+    generates random responses in the shape of the climacell v4 timelines endpoint
+    """
+    WEATHER_CODES = [1000, 1100, 1101, 1102, 1001, 2000, 2100, 4000, 4200, 4001, 4201, 5000, 5100, 8000, 6000]
+
+    @staticmethod
+    def _timestamp(time: datetime) -> str:
+        return time.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def generate_values(time: datetime, rnd: random.Random) -> dict:
+        values = {
+            'temperature': round(rnd.uniform(-10, 30), 2),
+            'precipitationType': rnd.choice([0, 1, 2, 3, 4]),
+            'precipitationProbability': rnd.choice([0, 5, 25, 50, 100]),
+            'precipitationIntensity': round(rnd.uniform(0, 8), 4),
+            'windSpeed': round(rnd.uniform(0, 20), 2),
+            'windGust': round(rnd.uniform(0, 30), 2),
+            'cloudCover': rnd.choice([0, 12.5, 50, 100]),
+            'weatherCode': rnd.choice(ClimacellResponseGenerator.WEATHER_CODES),
+        }
+        if rnd.random() < 0.1:
+            # the api omits values it has no data for
+            del values['windGust']
+        if time.hour == 0:
+            values['sunriseTime'] = ClimacellResponseGenerator._timestamp(time.replace(hour=6, second=23))
+            values['sunsetTime'] = ClimacellResponseGenerator._timestamp(time.replace(hour=18, second=47))
+        return values
+
+    @staticmethod
+    def generate_timeline(timestep: str, step: timedelta, count: int, start: datetime, rnd: random.Random) -> dict:
+        intervals = []
+        for i in range(count):
+            time = start + i * step
+            intervals.append({'startTime': ClimacellResponseGenerator._timestamp(time),
+                              'values': ClimacellResponseGenerator.generate_values(time, rnd)})
+        return {'timestep': timestep,
+                'startTime': intervals[0]['startTime'],
+                'endTime': intervals[-1]['startTime'],
+                'intervals': intervals}
+
+    @staticmethod
+    def generate_response(seed: int = 0, start: datetime = None) -> dict:
+        rnd = random.Random(seed)
+        if start is None:
+            start = datetime(2021, 3, 5, 0, 0, tzinfo=timezone.utc)
+        return {'data': {'timelines': [
+            ClimacellResponseGenerator.generate_timeline('5m', timedelta(minutes=5), 72, start, rnd),
+            ClimacellResponseGenerator.generate_timeline('1h', timedelta(hours=1), 108, start, rnd),
+            ClimacellResponseGenerator.generate_timeline('1d', timedelta(days=1), 15,
+                                                         start.replace(hour=0), rnd),
+        ]}}
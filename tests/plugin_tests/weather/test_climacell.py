@@ -0,0 +1,84 @@
+import logging
+import time
+import unittest
+from collections import OrderedDict, defaultdict
+
+import dateutil.parser
+from dateutil.tz import tzlocal
+
+from plugins.climacell.climacell import ClimacellPlugin, parse_timestamp_v4
+from plugins.weather.weather_data_types import SingleReport, PrecipitationType
+from tests.plugin_tests.weather.data_generator import ClimacellResponseGenerator
+
+
+def legacy_get_reports_v4(data, interval_name):
+    """ the per-interval decoding the plugin used before, kept as reference """
+    conversions = {
+        'precipitationType': lambda v: defaultdict(lambda: PrecipitationType.NONE,
+                                                   ClimacellPlugin.PRECIPITATION_TYPES_v4)[v],
+        'weatherCode': lambda v: ClimacellPlugin.WEATHER_CODES_v4.get(v, v),
+        'sunriseTime': lambda v: dateutil.parser.parse(v).astimezone(tzlocal()).replace(microsecond=0, second=0),
+        'sunsetTime': lambda v: dateutil.parser.parse(v).astimezone(tzlocal()).replace(microsecond=0, second=0),
+    }
+    data_input = [timeline for timeline in data if timeline['timestep'] == interval_name][0]
+    reports = OrderedDict()
+    for row in data_input['intervals']:
+        timestamp = dateutil.parser.parse(row['startTime']).astimezone(tzlocal()).replace(microsecond=0, second=0)
+        object_map = defaultdict(dict)
+        for key, value in row['values'].items():
+            if key in ClimacellPlugin.MAPPING_v4:
+                param_type = ClimacellPlugin.MAPPING_v4[key]
+                value = conversions.get(key, lambda v: v)(value)
+                object_map[param_type.__OBJ_CLASS__][param_type.name] = {'value': value}
+        reports[timestamp] = SingleReport(timestamp, {k: k(**v) for k, v in object_map.items()})
+    return reports
+
+
+class TestClimacellDecoding(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.plugin = ClimacellPlugin()
+        self.timelines = ClimacellResponseGenerator.generate_response()['data']['timelines']
+
+    def test_timestamp_parsing(self):
+        for time_str in ['2021-03-05T14:05:00Z', '2021-03-05T14:05:59Z', '2021-12-31T23:59:00Z',
+                         '2021-03-05T14:05:00+01:00', '2021-03-05T14:05:00.123Z']:
+            expected = dateutil.parser.parse(time_str).astimezone(tzlocal()).replace(microsecond=0, second=0)
+            self.assertEqual(parse_timestamp_v4(time_str), expected)
+        self.assertIsNone(parse_timestamp_v4(None))
+
+    def test_code_lookup(self):
+        conversions = ClimacellPlugin.CONVERSION_FUNCTIONS_v4
+        for code, weather_code in ClimacellPlugin.WEATHER_CODES_v4.items():
+            self.assertEqual(conversions[ClimacellPlugin.MAPPING_v4['weatherCode']](code), weather_code)
+        self.assertEqual(conversions[ClimacellPlugin.MAPPING_v4['weatherCode']](3000), 3000)
+        self.assertIsNone(conversions[ClimacellPlugin.MAPPING_v4['weatherCode']](None))
+        self.assertEqual(conversions[ClimacellPlugin.MAPPING_v4['precipitationType']](None), PrecipitationType.NONE)
+        self.assertEqual(conversions[ClimacellPlugin.MAPPING_v4['precipitationType']](17), PrecipitationType.NONE)
+
+    def test_matches_legacy_decoding(self):
+        for interval in ['5m', '1h', '1d']:
+            expected = legacy_get_reports_v4(self.timelines, interval)
+            decoded = self.plugin._get_reports_v4(self.timelines, interval)
+            self.assertEqual(list(decoded.keys()), list(expected.keys()))
+            for report, expected_report in zip(decoded.values(), expected.values()):
+                self.assertEqual(report.timestamp, expected_report.timestamp)
+                self.assertEqual(set(report.data.keys()), set(expected_report.data.keys()))
+                for obj_class, obj in report.data.items():
+                    self.assertEqual(obj.__dict__, expected_report.data[obj_class].__dict__)
+
+    def test_decoding_benchmark(self):
+        repetitions = 20
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            for interval in ['5m', '1h', '1d']:
+                legacy_get_reports_v4(self.timelines, interval)
+        legacy = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            for interval in ['5m', '1h', '1d']:
+                self.plugin._get_reports_v4(self.timelines, interval)
+        bulk = time.perf_counter() - start
+        # timings depend on the machine, they are only reported
+        logging.getLogger(self.__class__.__name__).log(
+            logging.INFO, f'decoding {repetitions} responses: legacy {legacy * 1000:.1f} ms, bulk {bulk * 1000:.1f} ms')
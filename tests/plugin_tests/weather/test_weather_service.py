@@ -0,0 +1,82 @@
+import time
+import unittest
+
+from plugins.weather.weather_plugin import WeatherPlugin
+from plugins.weather.weather_service import WeatherService, SharedWeatherPlugin
+from tests.widget_tests import base
+
+
+class CountingBackend(WeatherPlugin):
+    """ delivers no weather, but remembers which instances were quit """
+    quit_locations = []
+
+    def __init__(self):
+        super().__init__()
+        self.location = None
+
+    def setup(self):
+        pass
+
+    def set_location(self, location):
+        self.location = location
+
+    def update_synchronously(self, *args, **kwargs):
+        return None
+
+    def quit(self):
+        CountingBackend.quit_locations.append(WeatherService.location_key(self.location))
+
+
+class TestWeatherService(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.interval = WeatherService.BATCH_REQUEST_INTERVAL_SECONDS
+        WeatherService.BATCH_REQUEST_INTERVAL_SECONDS = 0
+        CountingBackend.quit_locations = []
+        self.service = WeatherService(CountingBackend)
+
+    def tearDown(self) -> None:
+        WeatherService.BATCH_REQUEST_INTERVAL_SECONDS = self.interval
+
+    def wait(self, seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_cells_leaving_the_window_are_released(self):
+        hamburg, berlin, bremen = {'lat': 53.55, 'long': 10.0}, {'lat': 52.52, 'long': 13.4}, {'lat': 53.08, 'long': 8.8}
+        subscriber = SharedWeatherPlugin()
+        subscriber.service = self.service
+        subscriber.set_location(bremen)
+
+        self.service.update_locations([hamburg, berlin], owner='window')
+        self.service.update_locations([berlin, bremen], owner='window')
+        self.wait(0.1)
+        self.assertEqual(set(self.service._locations), {(52.52, 13.4), (53.08, 8.8)})
+        self.assertEqual(CountingBackend.quit_locations, [(53.55, 10.0)])
+
+        # the subscriber still needs its own location
+        self.service.release_window('window')
+        self.assertEqual(set(self.service._locations), {(53.08, 8.8)})
+        subscriber.quit()
+        self.assertEqual(self.service._locations, {})
+        self.assertEqual(len(self.service._backends), 0)
+
+    def test_failed_first_update_keeps_last_update(self):
+        subscriber = SharedWeatherPlugin()
+        subscriber.service = self.service
+        subscriber.set_location({'lat': 53.55, 'long': 10.0})
+        started = subscriber.last_update
+        received = []
+        subscriber.new_data_available.connect(received.append)
+        # the backend delivers None, like a climacell update without a connection
+        subscriber.update_async()
+        end = time.time() + 5
+        while not received and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(received, [None])
+        self.assertEqual(subscriber.last_update, started)
+        subscriber.quit()
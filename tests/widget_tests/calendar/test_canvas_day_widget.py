@@ -0,0 +1,73 @@
+import unittest
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QPoint, QPointF, QEvent
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+from tests.plugin_tests.calendar.data_generator import CalendarPluginDataGenerator
+from tests.widget_tests import base
+from widgets.calendar.calendar_event import CalendarEventWidget
+from widgets.calendar.canvas_day_widget import CanvasDayWidget, CanvasEvent
+
+
+class TestCanvasDayWidget(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.wid = CanvasDayWidget(datetime.now().date(), 0, 24)
+        self.wid.resize(200, 480)
+        self.wid.show()
+        base._processPendingEvents(self.app)
+        today = datetime.now()
+        self.events = [CalendarPluginDataGenerator.generate_event(start=today.replace(hour=h, minute=0),
+                                                                 end=today.replace(hour=h + 2, minute=0))
+                       for h in (8, 9, 14)]
+        for event, (begin, end) in zip(self.events, [(8, 10), (9, 11), (14, 16)]):
+            self.wid.add_event(event, begin, end)
+
+    def tearDown(self) -> None:
+        self.wid.close()
+
+    def test_events_are_laid_out_without_widgets(self):
+        items = self.wid.collect_event_widgets()
+        self.assertTrue(all(isinstance(item, CanvasEvent) for item in items))
+        self.assertEqual(self.wid.findChildren(CalendarEventWidget), [])
+        self.assertEqual([item.geometry().getRect() for item in items],
+                         [(0, 160, 99, 40), (100, 180, 99, 40), (0, 280, 199, 40)])
+        self.assertIs(self.wid.item_at(QPoint(150, 190)), items[1])
+        self.assertIsNone(self.wid.item_at(QPoint(150, 100)))
+        self.wid.repaint()
+
+    def test_requests(self):
+        edits, moves, removed = [], [], []
+        self.wid.event_edit_request.connect(edits.append)
+        self.wid.event_time_change_request.connect(lambda item, start, end: moves.append((item, start, end)))
+        self.wid.event_removed.connect(lambda event_id, _: removed.append(event_id))
+        item = self.wid.collect_event_widgets()[2]
+
+        item.edit_event()
+        self.assertEqual(edits, [item])
+
+        QTest.mousePress(self.wid, Qt.LeftButton, Qt.NoModifier, QPoint(50, 300))
+        # QTest.mouseMove only moves the cursor, which does not reach an offscreen widget
+        QApplication.sendEvent(self.wid, QMouseEvent(QEvent.MouseMove, QPointF(50, 340), Qt.NoButton,
+                                                     Qt.LeftButton, Qt.NoModifier))
+        QTest.mouseRelease(self.wid, Qt.LeftButton, Qt.NoModifier, QPoint(50, 340))
+        self.assertEqual(len(moves), 1)
+        self.assertIs(moves[0][0], item)
+        self.assertEqual((moves[0][1].hour, moves[0][2].hour), (16, 18))
+
+        item.delete_signal.emit(self.events[2].id, None)
+        self.assertEqual(removed, [self.events[2].id])
+
+    def test_box_is_rendered_once(self):
+        item = self.wid.collect_event_widgets()[0]
+        pixmap = item.box_pixmap(item.rect.size(), 1.0)
+        self.assertIs(item.box_pixmap(item.rect.size(), 1.0), pixmap)
+        self.assertIsNot(item.box_pixmap(item.rect.size(), 2.0), pixmap)
+        resized = item.box_pixmap(item.rect.size() + item.rect.size(), 2.0)
+        self.assertEqual(resized.size(), (item.rect.size() + item.rect.size()) * 2)
+        item.event_instance().mark_desynchronized()
+        self.assertIsNot(item.box_pixmap(item.rect.size() + item.rect.size(), 2.0), resized)
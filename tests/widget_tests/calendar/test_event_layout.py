@@ -0,0 +1,122 @@
+import logging
+import random
+import time
+import unittest
+
+from PyQt5.QtCore import QRect, Qt
+
+from helpers.event_layout import EventLayout, ColumnLayout
+
+
+class Box:
+    def __init__(self, begin, end):
+        self.begin = begin
+        self.end = end
+
+    def __repr__(self):
+        return f'Box({self.begin}, {self.end})'
+
+
+def column_scan_layout(events):
+    """ the former quadratic column scan of CalendarHelper, as (column, span, columns) per event """
+    def collides(a, b):
+        return a.end > b.begin and a.begin < b.end
+
+    result = {}
+
+    def pack(columns):
+        for i, column in enumerate(columns):
+            for event in column:
+                span = 0
+                for other_column in columns[i:]:
+                    if any(other is not event and collides(event, other) for other in other_column):
+                        break
+                    span += 1
+                result[id(event)] = (i, span, len(columns))
+
+    columns, last_ending = [], None
+    for event in sorted(events, key=lambda x: (x.begin, x.end)):
+        if last_ending is not None and event.begin >= last_ending:
+            pack(columns)
+            columns, last_ending = [], None
+        for column in columns:
+            if not collides(column[-1], event):
+                column.append(event)
+                break
+        else:
+            columns.append([event])
+        if last_ending is None or event.end > last_ending:
+            last_ending = event.end
+    pack(columns)
+    return result
+
+
+def dense_day(n, seed=0):
+    rnd = random.Random(seed)
+    boxes = []
+    for _ in range(n):
+        begin = rnd.randrange(7 * 4, 19 * 4) / 4
+        boxes.append(Box(begin, begin + rnd.randrange(1, 12) / 4))
+    return boxes
+
+
+class TestEventLayout(unittest.TestCase):
+
+    def test_matches_column_scan(self):
+        for seed in range(30):
+            boxes = dense_day(random.Random(seed).randrange(1, 60), seed)
+            expected = column_scan_layout(boxes)
+            layout = {id(s.item): (s.column, s.span, g.columns) for g in EventLayout.groups(boxes) for s in g.slots}
+            self.assertEqual(layout, expected, f'seed {seed}')
+
+    def test_geometry(self):
+        first, second, later = Box(8, 10), Box(9, 11), Box(12, 13)
+        rects = dict((box, rect) for box, rect in EventLayout.rects([later, second, first], 200, 240, 0, 24))
+        self.assertEqual(rects[first], QRect(0, 80, 99, 20))
+        self.assertEqual(rects[second], QRect(100, 90, 99, 20))
+        self.assertEqual(rects[later], QRect(0, 120, 199, 10))
+
+        def unscaled(box):
+            return QRect(box.begin * 10, 0, (box.end - box.begin) * 10, 50)
+        all_day = [Box(0, 2), Box(1, 3), Box(3, 4)]
+        rects = [rect for _, rect in EventLayout.rects(all_day, 100, 50, 0, 24, Qt.Horizontal, rect_func=unscaled)]
+        self.assertEqual(rects, [QRect(0, 0, 20, 24), QRect(10, 25, 20, 24), QRect(30, 0, 10, 49)])
+
+    def test_moving_relays_out_touched_groups_only(self):
+        boxes = dense_day(20, 3) + [Box(20, 21), Box(20.5, 22), Box(23, 24)]
+        layout = ColumnLayout()
+        groups = layout.groups(boxes)
+        self.assertEqual(len(layout.changed), len(groups))
+        self.assertEqual(layout.groups(boxes), groups)
+        self.assertEqual(layout.changed, [])
+
+        # drag the late event into the evening group
+        moved = {boxes[-1]: (21.5, 22.5)}
+        dragged = layout.groups(boxes, moved)
+        self.assertEqual(len(layout.changed), 1)
+        self.assertEqual(len(dragged), len(groups) - 1)
+        self.assertEqual({s.item for s in layout.changed[0].slots}, set(boxes[-3:]))
+        expected = [[(s.item, s.begin, s.end, s.column, s.span) for s in g.slots]
+                    for g in EventLayout.groups(boxes, moved)]
+        self.assertEqual([[(s.item, s.begin, s.end, s.column, s.span) for s in g.slots] for g in dragged], expected)
+
+    def test_benchmark_dense_days(self):
+        # layout time per day column, the old column scan is quadratic in the events per day
+        timings = {}
+        for n in (40, 400, 4000):
+            boxes = dense_day(n)
+            start = time.perf_counter()
+            EventLayout.rects(boxes, 200, 1000, 0, 24)
+            timings[n] = time.perf_counter() - start
+        # timings depend on the machine, they are only reported
+        log = logging.getLogger(self.__class__.__name__)
+        log.log(logging.INFO, 'layout ms per day: ' + ', '.join(f'{n} events {t * 1000:.2f}' for n, t in timings.items()))
+
+        # dragging one event of a day with 400 events
+        boxes = dense_day(400)
+        layout = ColumnLayout()
+        layout.groups(boxes)
+        start = time.perf_counter()
+        for step in range(60):
+            layout.groups(boxes, {boxes[0]: (boxes[0].begin + step / 60, boxes[0].end + step / 60)})
+        log.log(logging.INFO, f'drag step over 400 events: {(time.perf_counter() - start) / 60 * 1000:.2f} ms')
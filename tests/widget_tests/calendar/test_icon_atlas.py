@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from helpers.icon_atlas import IconAtlas
+from helpers.tools import PathManager
+from plugins.weather.iconsets import IconSet
+from tests.widget_tests import base
+
+ICON_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                                           'resources', 'weather_icons', IconSet.WEATHER_UNDERGOUND['folder']))
+
+
+class TestIconAtlas(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.base_path = PathManager.__BASE_PATH__
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        PathManager.__BASE_PATH__ = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        PathManager.__BASE_PATH__ = self.base_path
+        self.tmp_dir.cleanup()
+
+    def test_persistent_atlas(self):
+        names = sorted(name for name in set(IconSet.WEATHER_UNDERGOUND['data'].values())
+                       if os.path.exists(os.path.join(ICON_FOLDER, f'{name}.svg')))
+        atlas = IconAtlas('test_icon_atlas')
+        uris = {}
+        for name in names:
+            path = os.path.join(ICON_FOLDER, f'{name}.svg')
+            self.assertEqual(atlas.image(path, 20).size().width(), 20)
+            self.assertEqual(atlas.pixmap(path, 32, 2.0).width(), 64)
+            uris[name] = atlas.data_uri(path, 20)
+            self.assertTrue(uris[name].startswith('data:image/png;base64,'))
+        self.assertEqual(atlas.rasterized, 2 * len(names))
+        self.assertIsNone(atlas.data_uri(os.path.join(ICON_FOLDER, 'does_not_exist.svg'), 20))
+        # nothing is written until the deferred save runs
+        self.assertFalse(os.path.exists(PathManager.join_path('storage', 'test_icon_atlas.pickle')))
+        self.assertTrue(atlas._deferred_save.pending)
+        atlas._deferred_save.flush()
+        self.assertFalse(atlas._deferred_save.pending)
+
+        # a new atlas serves everything from the storage without rasterizing again
+        atlas = IconAtlas('test_icon_atlas')
+        for name in names:
+            path = os.path.join(ICON_FOLDER, f'{name}.svg')
+            self.assertEqual(atlas.data_uri(path, 20), uris[name])
+            self.assertFalse(atlas.pixmap(path, 32, 2.0).isNull())
+        self.assertEqual(atlas.rasterized, 0)
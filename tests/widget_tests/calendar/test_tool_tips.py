@@ -0,0 +1,73 @@
+import time
+import unittest
+from datetime import datetime
+
+from plugins.weather.weather_plugin import WeatherReport
+from tests.plugin_tests.calendar.data_generator import CalendarPluginDataGenerator
+from tests.widget_tests import base
+from widgets.calendar.calendar_event import EventPresentation
+from widgets.calendar.day_widget import DayWidget
+
+
+class TestToolTips(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        EventPresentation.__TOOL_TIPS__.clear()
+        today = datetime.now()
+        self.event = CalendarPluginDataGenerator.generate_event(start=today.replace(hour=8, minute=0),
+                                                                end=today.replace(hour=9, minute=0))
+        self.days = []
+        for _ in range(2):
+            day = DayWidget(today.date(), 0, 24)
+            day.resize(200, 480)
+            day.show()
+            for hour in (8, 12, 16):
+                event = self.event if hour == 8 else CalendarPluginDataGenerator.generate_event(
+                    start=today.replace(hour=hour, minute=0), end=today.replace(hour=hour + 1, minute=0))
+                day.add_event(event, hour, hour + 1)
+            self.days.append(day)
+
+    def tearDown(self) -> None:
+        for day in self.days:
+            day.close()
+
+    def wait_for(self, condition):
+        end = time.time() + 5
+        while not condition() and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_built_on_hover_only(self):
+        widgets = sorted(self.days[0].collect_event_widgets(), key=lambda w: w.begin)
+        self.assertTrue(all(w.tooltip_task is None and not w.tooltip_data for w in widgets))
+
+        widgets[0].request_tool_tip()
+        self.days[0].prefetch_tool_tips(widgets[0])
+        # the html is set in the worker, the widget gets it once the task is delivered
+        self.wait_for(lambda: widgets[0].tooltip_task is None and widgets[1].tooltip_task is None)
+        self.assertIn(widgets[0].summary, widgets[0].toolTip())
+        self.assertTrue(widgets[1].tooltip_data)
+        # only the direct neighbour is prefetched
+        self.assertFalse(widgets[2].tooltip_data)
+        self.assertIsNone(widgets[2].tooltip_task)
+
+        widgets[0].refresh_tool_tip()
+        self.assertEqual(widgets[0].toolTip(), '')
+
+    def test_equal_content_is_built_once(self):
+        first, second = [next(w for w in day.collect_event_widgets() if w.event is self.event) for day in self.days]
+        built = []
+        for widget in (first, second):
+            build = widget.build_tool_tip
+            widget.build_tool_tip = lambda weather, build=build: built.append(1) or build(weather)
+            widget.request_tool_tip()
+            self.wait_for(lambda: widget.tooltip_task is None)
+        self.assertEqual(first.tooltip_data, second.tooltip_data)
+        self.assertEqual(len(built), 1)
+
+    def test_new_weather_gives_a_new_tool_tip(self):
+        widget = next(w for w in self.days[0].collect_event_widgets() if w.event is self.event)
+        first, second = WeatherReport(), WeatherReport()
+        self.assertEqual(widget.tool_tip_key(first), widget.tool_tip_key(first))
+        self.assertNotEqual(widget.tool_tip_key(first), widget.tool_tip_key(second))
@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from helpers.tools import PathManager
+from plugins.calendarplugin.calendar_plugin import CalendarData
+from tests.plugin_tests.calendar.data_generator import CalendarPluginDataGenerator
+from tests.widget_tests import base
+from widgets.calendar.calendar_widget import CalendarWidget
+
+
+class TestViewSnapshot(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.base_path = PathManager.__BASE_PATH__
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        PathManager.__BASE_PATH__ = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        PathManager.__BASE_PATH__ = self.base_path
+        self.tmp_dir.cleanup()
+
+    def test_snapshot_keeps_displayed_days(self):
+        now = datetime.now()
+        visible = CalendarPluginDataGenerator.generate_event(start=now)
+        past = CalendarPluginDataGenerator.generate_event(start=now - timedelta(days=30))
+        calendar = visible.calendar
+        widget = CalendarWidget()
+        widget.calendar_data['CalDavPlugin'] = CalendarData(calendars={calendar.id: calendar},
+                                                             events={visible.id: visible, past.id: past},
+                                                             colors={})
+        widget.save_view_snapshot()
+
+        restored = CalendarWidget()
+        self.assertTrue(restored.restore_view_snapshot())
+        self.assertEqual(list(restored.calendar_data['CalDavPlugin'].events.keys()), [visible.id])
+        self.assertEqual(restored.snapshot_plugins, {'CalDavPlugin'})
+        # a restored view is never saved back over the snapshot
+        restored.calendar_data['CalDavPlugin'].events = {}
+        restored.save_view_snapshot()
+        self.assertTrue(CalendarWidget().restore_view_snapshot())
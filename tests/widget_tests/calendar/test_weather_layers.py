@@ -0,0 +1,66 @@
+import pickle
+import time
+import unittest
+from datetime import date
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPixmap
+
+from plugins.weather.weather_plugin import WeatherReport
+from tests.widget_tests import base
+from widgets.calendar.multi_day_view import MultiDayView
+
+
+class TestWeatherLayers(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.view = MultiDayView()
+        self.view.refresh(3, date.today(), 0, 24)
+        self.view.resize(600, 600)
+        self.view.show()
+        self.wait(0.1)
+        self.rendered = []
+        self.view.render_weather_layers = self.render_weather_layers
+
+    def tearDown(self) -> None:
+        self.view.close()
+
+    def wait(self, seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def render_weather_layers(self, weather_report, dpr):
+        """ one empty layer per day column """
+        self.rendered.append(weather_report)
+        layers = []
+        for day_widget in self.view.day_widgets:
+            pixmap = QPixmap(day_widget.size())
+            pixmap.fill(Qt.transparent)
+            layers.append((day_widget.geometry(), pixmap))
+        return layers
+
+    def test_layers_are_rendered_once_per_report(self):
+        first = WeatherReport()
+        self.view._get_weather_layers(first)
+        self.view._get_weather_layers(first)
+        self.assertEqual(self.rendered, [first])
+
+        # a new report is rendered again, however equal it looks
+        second = WeatherReport()
+        self.view._get_weather_layers(second)
+        self.assertEqual(self.rendered[1:], [second])
+        self.assertEqual(pickle.loads(pickle.dumps(second)).version, second.version)
+
+    def test_strip_update_skips_other_columns(self):
+        self.view.set_weather(WeatherReport())
+        self.view.grab()
+        self.assertEqual(len(self.rendered), 1)
+        self.assertEqual(self.view.skipped_weather_layers, 0)
+
+        # a now-line sized strip inside the first column
+        first = self.view.day_widgets[0].geometry()
+        self.view.grab(QRect(first.x(), first.center().y(), first.width(), 7))
+        self.assertEqual(self.view.skipped_weather_layers, len(self.view.day_widgets) - 1)
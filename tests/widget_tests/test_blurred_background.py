@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from PyQt5.QtCore import QPoint
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QWidget
+
+from tests.widget_tests import base
+from widgets.base import BlurredBackground
+
+
+class MainWidget(QWidget):
+    border_margin = 7
+    border_color = QColor(255, 255, 255, 50)
+    background_color = QColor(0, 0, 0, 190)
+
+
+class TestBlurredBackground(unittest.TestCase):
+    app = base.papp
+
+    def wait(self, seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_captures_only_where_the_widget_came_to_rest(self):
+        main_widget = MainWidget()
+        main_widget.resize(200, 100)
+        background = BlurredBackground(main_widget)
+        background.resize(200, 100)
+        captures = []
+        background.timer.timeout.connect(lambda: captures.append(background._captured))
+        main_widget.show()
+        self.wait(BlurredBackground.CAPTURE_DELAY_MS / 1000 * 2)
+        self.assertEqual(len(captures), 1)
+        self.assertEqual(background.bg.size(), background.capture_rect().size())
+
+        # idle, nothing is captured again
+        self.wait(BlurredBackground.CAPTURE_DELAY_MS / 1000 * 2)
+        self.assertEqual(len(captures), 1)
+
+        for x in range(10):
+            main_widget.move(QPoint(10 * x, 5))
+            self.app.processEvents()
+        self.wait(BlurredBackground.CAPTURE_DELAY_MS / 1000 * 2)
+        self.assertEqual(len(captures), 2)
+        self.assertEqual(background._captured[1], background.capture_rect())
+
+        BlurredBackground.wallpaper_changed()
+        self.wait(BlurredBackground.CAPTURE_DELAY_MS / 1000 * 2)
+        self.assertEqual(len(captures), 3)
+        main_widget.close()
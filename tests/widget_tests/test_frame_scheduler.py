@@ -0,0 +1,106 @@
+import time
+import unittest
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtWidgets import QWidget
+
+from helpers.frame_scheduler import FrameScheduler
+from tests.widget_tests import base
+from widgets.clock import ClockWidget
+
+
+class PaintCounter(QWidget):
+
+    def __init__(self):
+        super().__init__()
+        self.painted = []
+
+    def paintEvent(self, event):
+        self.painted.append(event.rect())
+
+
+class TestFrameScheduler(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        self.scheduler = FrameScheduler()
+
+    def wait(self, seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def shown_widget(self) -> PaintCounter:
+        widget = PaintCounter()
+        widget.resize(200, 200)
+        widget.show()
+        self.wait(0.1)
+        widget.painted.clear()
+        return widget
+
+    def test_dirty_rects_are_painted_together(self):
+        widget = self.shown_widget()
+        self.scheduler.request_update(widget, QRect(0, 10, 200, 7))
+        self.scheduler.request_update(widget, QRect(0, 30, 200, 7))
+        self.wait(0.1)
+        self.assertEqual(len(widget.painted), 1)
+        self.assertEqual(widget.painted[0], QRect(0, 10, 200, 27))
+
+        widget.hide()
+        self.scheduler.request_update(widget)
+        self.wait(0.1)
+        self.assertEqual(widget.painted, [QRect(0, 10, 200, 27)])
+        self.assertEqual(self.scheduler.skipped, 1)
+        widget.close()
+
+    def test_hidden_widgets_do_not_tick(self):
+        visible, hidden = self.shown_widget(), self.shown_widget()
+        hidden.hide()
+        ticks = {visible: 0, hidden: 0}
+
+        def counter(widget):
+            def tick():
+                ticks[widget] += 1
+            return tick
+        self.scheduler.add_ticker(visible, 20, counter(visible))
+        self.scheduler.add_ticker(hidden, 20, counter(hidden))
+        self.wait(0.25)
+        self.assertGreater(ticks[visible], 3)
+        self.assertEqual(ticks[hidden], 0)
+
+        self.scheduler.remove_ticker(visible)
+        self.scheduler.remove_ticker(hidden)
+        ticked = ticks[visible]
+        self.wait(0.1)
+        self.assertEqual(ticks[visible], ticked)
+        self.assertFalse(self.scheduler._tick_timer.isActive())
+        visible.close()
+
+    def test_ticks_are_aligned_and_suspended(self):
+        widget = self.shown_widget()
+        ticks = []
+        self.scheduler.add_ticker(widget, 100, lambda: ticks.append(time.time()))
+        self.scheduler.add_ticker(widget, 200, lambda: ticks.append(time.time()))
+        self.wait(0.45)
+        # both run on the same wall-clock boundaries, a 200 ms tick never needs a wakeup of its own
+        self.assertGreaterEqual(len(ticks), 5)
+        for tick in ticks:
+            self.assertLess(abs(tick - round(tick * 10) / 10), 0.03)
+
+        self.scheduler.suspend('locked')
+        self.assertFalse(self.scheduler._tick_timer.isActive())
+        ticked = len(ticks)
+        self.wait(0.25)
+        self.assertEqual(len(ticks), ticked)
+        self.scheduler.resume('locked')
+        self.wait(0.05)
+        self.assertGreater(len(ticks), ticked)
+        self.scheduler.remove_ticker(widget)
+        widget.close()
+
+    def test_closed_widgets_lose_their_tickers(self):
+        clock = ClockWidget()
+        self.assertIn(clock, [t.widget for t in FrameScheduler.shared()._tickers])
+        clock.close()
+        self.assertNotIn(clock, [t.widget for t in FrameScheduler.shared()._tickers])
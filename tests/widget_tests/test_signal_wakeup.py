@@ -0,0 +1,30 @@
+import os
+import signal
+import threading
+import time
+import unittest
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from helpers.signal_wakeup import SignalWakeup
+from tests.widget_tests import base
+
+
+@unittest.skipUnless(hasattr(signal, 'SIGUSR1'), 'needs posix signals')
+class TestSignalWakeup(unittest.TestCase):
+    app = base.papp
+
+    def test_signal_wakes_the_event_loop(self):
+        loop = QEventLoop()
+        previous = signal.signal(signal.SIGUSR1, lambda *args: loop.quit())
+        SignalWakeup.install()
+        # the fallback timer only fires if the signal did not reach python
+        QTimer.singleShot(3000, loop.quit)
+        try:
+            threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGUSR1)).start()
+            start = time.time()
+            loop.exec_()
+            self.assertLess(time.time() - start, 1.0)
+        finally:
+            SignalWakeup.uninstall()
+            signal.signal(signal.SIGUSR1, previous)
@@ -0,0 +1,52 @@
+import unittest
+
+from PyQt5.QtCore import QSize, Qt, QRectF, QPointF, QSizeF
+from PyQt5.QtGui import QFont, QFontMetricsF
+from PyQt5.QtWidgets import QWidget
+
+from helpers.widget_helpers import TextSizeHelper, TextLabel
+from tests.widget_tests import base
+
+
+class TestTextSizeHelper(unittest.TestCase):
+    app = base.papp
+
+    def setUp(self) -> None:
+        TextSizeHelper.cache.clear()
+
+    def test_fitted_text_fits(self):
+        font = QFont('Calibri', 40)
+        # multiples of the bucket, other sizes are fitted to the bucket below
+        for size in (QSize(32, 16), QSize(200, 40), QSize(88, 80)):
+            point_size = TextSizeHelper.fit_point_size(font, 'Wednesday', size, Qt.AlignCenter)
+            font.setPointSizeF(point_size)
+            rect = QFontMetricsF(font).boundingRect(QRectF(QPointF(0, 0), QSizeF(size)), Qt.AlignCenter, 'Wednesday')
+            self.assertLessEqual(rect.width(), size.width())
+            self.assertLessEqual(rect.height(), size.height())
+            # a notch larger would not fit anymore
+            font.setPointSizeF(point_size + 2 * TextSizeHelper.PRECISION + 1)
+            rect = QFontMetricsF(font).boundingRect(QRectF(QPointF(0, 0), QSizeF(size)), Qt.AlignCenter, 'Wednesday')
+            self.assertTrue(rect.width() > size.width() or rect.height() > size.height() or point_size == 40)
+            font.setPointSizeF(40)
+
+    def test_small_resizes_hit_the_cache(self):
+        font = QFont('Calibri', 40)
+        first = TextSizeHelper.fit_point_size(font, '12°', QSize(64, 32))
+        self.assertEqual(len(TextSizeHelper.cache), 1)
+        for width in range(64, 64 + TextSizeHelper.SIZE_BUCKET):
+            self.assertEqual(TextSizeHelper.fit_point_size(font, '12°', QSize(width, 33)), first)
+        self.assertEqual(len(TextSizeHelper.cache), 1)
+
+    def test_labels_are_fitted_in_one_batch(self):
+        view = QWidget()
+        view.resize(200, 40)
+        labels = [TextLabel(text, view) for text in ('Mon', '12°', '3 mm')]
+        view.show()
+        for label in labels:
+            label.resize(60, 30)
+        self.assertTrue(all(label.fitted_font is None for label in labels))
+        # the first paint fits every label that is waiting
+        labels[0].grab()
+        self.assertTrue(all(label.fitted_font is not None for label in labels))
+        self.assertEqual(TextSizeHelper.__PENDING__, [])
+        view.close()
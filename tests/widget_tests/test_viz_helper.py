@@ -0,0 +1,86 @@
+import math
+import random
+import unittest
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QColor
+
+from helpers.viz_helper import ValueVisualization, TemperatureGradient
+
+
+class TestDecimation(unittest.TestCase):
+    # the day column runs top to bottom: y is the time, x the value
+    RECT = QRect(10, 20, 100, 60)
+
+    def points(self, count):
+        rnd = random.Random(count)
+        return [(rnd.uniform(10, 110), 20 + i * 60 / count, i) for i in range(count)]
+
+    def test_sparse_points_pass_through(self):
+        points = self.points(self.RECT.height() // ValueVisualization.LOD_BUCKET_PIXELS)
+        self.assertIs(ValueVisualization.decimate(points, self.RECT), points)
+
+    def test_extremes_per_bucket_are_kept(self):
+        points = self.points(3000)
+        decimated = ValueVisualization.decimate(points, self.RECT)
+        buckets = math.ceil(self.RECT.height() / ValueVisualization.LOD_BUCKET_PIXELS)
+        self.assertLessEqual(len(decimated), 2 * buckets + 2)
+        self.assertEqual((decimated[0], decimated[-1]), (points[0], points[-1]))
+        self.assertEqual(decimated, sorted(decimated, key=lambda p: p[2]))
+
+        grouped = {}
+        for point in points:
+            grouped.setdefault(int((point[1] - self.RECT.y()) // ValueVisualization.LOD_BUCKET_PIXELS), []).append(point)
+        for bucket in grouped.values():
+            self.assertIn(min(bucket, key=lambda p: p[0]), decimated)
+            self.assertIn(max(bucket, key=lambda p: p[0]), decimated)
+
+
+def legacy_color_for_temperature(temp: float) -> QColor:
+    """ the per-value interpolation the lookup table replaced """
+    temp = int(temp)
+    min_temp = min(TemperatureGradient.TEMP_COLORS.keys())
+    max_temp = max(TemperatureGradient.TEMP_COLORS.keys())
+    for t, color in TemperatureGradient.TEMP_COLORS.items():
+        if temp >= t > min_temp:
+            min_temp = t
+        if temp <= t < max_temp:
+            max_temp = t
+    diff = max_temp - min_temp
+    if diff == 0:
+        return TemperatureGradient.TEMP_COLORS[min_temp]
+    perc = (temp - min_temp) / diff
+    min_col = TemperatureGradient.TEMP_COLORS[min_temp]
+    max_col = TemperatureGradient.TEMP_COLORS[max_temp]
+    return QColor(*[int(perc * (getattr(max_col, c)() - getattr(min_col, c)()) + getattr(min_col, c)())
+                    for c in ['red', 'green', 'blue']])
+
+
+class TestTemperatureColorLUT(unittest.TestCase):
+
+    def test_matches_legacy_colors(self):
+        lut = TemperatureGradient.LUT
+        edges = sorted(TemperatureGradient.TEMP_COLORS.keys())
+        for temp in range(edges[0], edges[-1] + 1):
+            self.assertEqual(lut.color(temp).getRgb(), legacy_color_for_temperature(temp).getRgb(), temp)
+        for edge in edges:
+            self.assertEqual(lut.color(edge).getRgb(), TemperatureGradient.TEMP_COLORS[edge].getRgb())
+
+    def test_clamped_outside_the_table(self):
+        lut = TemperatureGradient.LUT
+        self.assertEqual(lut.rgba(-60), lut.rgba(lut.min_temp))
+        self.assertEqual(lut.rgba(lut.min_temp - 0.04), lut.rgba(lut.min_temp))
+        self.assertEqual(lut.rgba(99.5), lut.rgba(lut.max_temp))
+        self.assertEqual(lut.color(45).getRgb(), TemperatureGradient.TEMP_COLORS[40].getRgb())
+        # between two entries the nearest one is used
+        self.assertEqual(lut.rgba(12.96), lut.rgba(13))
+        self.assertEqual(lut.rgba(12.94), lut.rgba(12.9))
+
+    def test_column_lookup(self):
+        lut = TemperatureGradient.LUT
+        column = [-60, -20, -3.33, 0, 12.94, 12.96, 21.5, 40, 45, 99.5]
+        colors = lut.colors_for(column)
+        self.assertEqual(colors.typecode, 'I')
+        self.assertEqual(list(colors), [lut.rgba(temp) for temp in column])
+        self.assertEqual([QColor.fromRgba(c).getRgb() for c in colors], [lut.color(temp).getRgb() for temp in column])
+        self.assertEqual(len(lut.colors_for([])), 0)
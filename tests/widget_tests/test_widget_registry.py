@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from helpers.startup_profiler import StartupProfiler
+from widgets.base import BaseWidget
+from widgets.registry import WidgetRegistry
+
+
+class TestWidgetRegistry(unittest.TestCase):
+
+    def test_widgets_are_imported_on_demand(self):
+        # runs in a fresh interpreter, this one has imported everything already
+        script = ('import sys\n'
+                  'import desktop_widgets_core\n'
+                  # shared gl contexts are set up instead, QtWebEngine comes with the first widget needing it
+                  'assert "PyQt5.QtWebEngineWidgets" not in sys.modules\n'
+                  'from widgets.registry import WidgetRegistry\n'
+                  'heavy = ["caldav", "icalendar", "vobject", "psutil", "mutagen", "widgets.calendar.calendar_widget"]\n'
+                  'assert not [m for m in heavy if m in sys.modules], [m for m in heavy if m in sys.modules]\n'
+                  'WidgetRegistry.load("CalendarWidget")\n'
+                  'assert "widgets.calendar.calendar_widget" in sys.modules\n'
+                  'assert "caldav" not in sys.modules\n')
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        env = dict(os.environ, PYTHONPATH=root, QT_QPA_PLATFORM='offscreen')
+        result = subprocess.run([sys.executable, '-c', script], cwd=root, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr.decode()[-2000:])
+
+    def test_load_and_profile(self):
+        enabled = StartupProfiler.enabled
+        StartupProfiler.enabled = True
+        try:
+            widget_class = WidgetRegistry.load('ClockWidget')
+            StartupProfiler.mark_once('first paint ClockWidget')
+            StartupProfiler.mark_once('first paint ClockWidget')
+        finally:
+            StartupProfiler.enabled = enabled
+        self.assertTrue(issubclass(widget_class, BaseWidget))
+        report = StartupProfiler.report()
+        self.assertIn('import ClockWidget', report)
+        self.assertEqual(report.count('first paint ClockWidget'), 1)
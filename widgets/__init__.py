@@ -1,3 +0,0 @@
-from widgets.calendar.calendar_widget import CalendarWidget
-from widgets.network import NetworkWidget
-from widgets.music import MusicWidget
@@ -3,7 +3,8 @@ import logging
 import sys
 from inspect import signature
 from threading import Lock
-from typing import Type, Union
+from typing import Type, Union, Tuple
+from weakref import WeakSet
 
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -13,9 +14,13 @@ from termcolor import colored
 
 from credentials import NoCredentialsSetException, CredentialsNotValidException, CredentialType
 from helpers import styles
-from helpers.tools import PathManager
+from helpers.frame_scheduler import FrameScheduler
+from helpers.metrics import Metrics, MetricStage
+from helpers.startup_profiler import StartupProfiler
+from helpers.tracing import Tracer
+from helpers.tools import PathManager, import_class
 from helpers.settings_storage import SettingsStorage
-from plugins.base import BasePlugin, APIDeprecatedException, APILimitExceededException
+from plugins.base import BasePlugin, APIDeprecatedException, APILimitExceededException, DataDelta
 from helpers.widget_helpers import ResizeHelper
 
 
@@ -168,9 +173,16 @@ class BaseWidget(QWidget, object):
         else:
             self.show()
 
-    def _received_new_data(self, data: object):
-        # noinspection PyTypeChecker
-        self.received_new_data(self.sender(), data)
+    def _received_data_change(self, delta: DataDelta):
+        StartupProfiler.mark_once(f'first data {self.__class__.__name__} <- {self.sender().__class__.__name__}')
+        with Tracer.span(f'{self.__class__.__name__}.received_new_data', 'widget', version=delta.version):
+            # noinspection PyTypeChecker
+            self.received_data_change(self.sender(), delta)
+            Tracer.request_paint()
+
+    def received_data_change(self, plugin: BasePlugin, delta: DataDelta):
+        """ widgets that can apply the changed keys of a delta override this, all others get the snapshot """
+        self.received_new_data(plugin, delta.snapshot)
 
     def received_new_data(self, plugin: BasePlugin, data: object):
         raise NotImplementedError(f'{self.__class__.__name__} must implement this method!')
@@ -196,32 +208,32 @@ class BaseWidget(QWidget, object):
                                                 f'Would you like to set them?')
             if reply == QMessageBox.Yes:
                 if not ncse.enter_credentials(self, plugin):
-                    plugin.new_data_available.emit(None)
+                    plugin.publish(None)
             else:
-                plugin.new_data_available.emit(None)
+                plugin.publish(None)
         except CredentialsNotValidException as cnve:
             reply = self._question_mbox(title='Invalid Credentials!',
                                         msg=f'Your {plugin.__class__.__name__} reported invalid credentials. '
                                             f'Would you like to set them again?')
             if reply == QMessageBox.Yes:
                 if not cnve.reenter_credentials(self, plugin):
-                    plugin.new_data_available.emit(None)
+                    plugin.publish(None)
             else:
-                plugin.new_data_available.emit(None)
+                plugin.publish(None)
         except APIDeprecatedException as ade:
             QMessageBox.warning(self, 'API Deprecated',
                                 f'{self.__class__.__name__} uses a deprecated API '
                                 f'in {plugin.__class__.__name__}.\n\n'
                                 f'{ade}.\n\n'
                                 )
-            plugin.new_data_available.emit(None)
+            plugin.publish(None)
         except APILimitExceededException as arle:
             QMessageBox.warning(self, 'API Rate-Limit exceeded',
                                 f'{self.__class__.__name__} exceeded API-Rate-Limit '
                                 f'in {plugin.__class__.__name__}.\n\n'
                                 f'{arle}.\n\n'
                                 )
-            plugin.new_data_available.emit(None)
+            plugin.publish(None)
         # except SSLNoVerifyException as sslnve:
         #     ...
         except Exception as e:
@@ -240,11 +252,13 @@ class BaseWidget(QWidget, object):
                              )
         raise NotImplementedError(f'{self.__class__.__name__} must implement this method!')
 
-    def register_plugin(self, plugin_class: Type[BasePlugin], attr):
-        plugin_class = getattr(importlib.import_module(plugin_class.__module__), plugin_class.__name__)
-        plugin = plugin_class()  # type: BasePlugin
+    def register_plugin(self, plugin_class: Union[Type[BasePlugin], str], attr):
+        # plugins can be given by their dotted path, their modules are imported only here
+        path = plugin_class if isinstance(plugin_class, str) else f'{plugin_class.__module__}.{plugin_class.__name__}'
+        with StartupProfiler.measure(f'load {path.rsplit(".", 1)[1]} for {self.__class__.__name__}'):
+            plugin = import_class(path)()  # type: BasePlugin
         plugin.plugin_log.connect(self.widget_debug)
-        plugin.new_data_available.connect(self._received_new_data)
+        plugin.data_changed.connect(self._received_data_change)
         plugin.threaded_exception.connect(self._received_plugin_exception)
         setattr(self, attr, plugin)
         self.plugins.append(plugin)
@@ -253,7 +267,7 @@ class BaseWidget(QWidget, object):
 
     def deregister_plugin(self, plugin, attr):
         plugin.plugin_log.disconnect(self.widget_debug)
-        plugin.new_data_available.disconnect(self._received_new_data)
+        plugin.data_changed.disconnect(self._received_data_change)
         plugin.threaded_exception.disconnect(self._received_plugin_exception)
         plugin.quit()
         self.plugins.remove(plugin)
@@ -312,6 +326,7 @@ class BaseWidget(QWidget, object):
         if self.timer.isActive():
             self.timer.stop()
             self.timer.disconnect()
+        FrameScheduler.shared().remove_ticker(self)
         for plugin in self.plugins:
             plugin.quit()
             self.log(' >> reloading %s ...' % plugin.__class__.__name__)
@@ -321,6 +336,7 @@ class BaseWidget(QWidget, object):
     def font_changed(self):
         pass
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, event):
         painter = QPainter(self)
         pen = QPen(self.border_color)
@@ -345,6 +361,8 @@ class BaseWidget(QWidget, object):
 
     def close(self):
         super(BaseWidget, self).close()
+        # the scheduler holds the widget and its callbacks, run_hidden tickers would keep running forever
+        FrameScheduler.shared().remove_ticker(self)
         for plugin in self.plugins:
             plugin.quit()
         self.widget_closed.emit()
@@ -520,43 +538,99 @@ class BaseWidget(QWidget, object):
 
 
 class BlurredBackground(QWidget):
+    """
+    blurred copy of the desktop behind the main widget. the screen is only captured when the widget
+    moved or was resized, the screens changed or the wallpaper_changed() was announced
+    (by the 'Refresh Backgrounds' tray action and when the session is unlocked).
+    each capture is blurred once, painting only draws the cached image.
+    """
+    BLUR_RADIUS = 5
+    CAPTURE_DELAY_MS = 300
+    __INSTANCES__ = None  # type: Union[None, WeakSet]
+
     def __init__(self, parent=None):
         super(BlurredBackground, self).__init__(parent)
-        blur = QGraphicsBlurEffect()
-        blur.setBlurRadius(5)
-        self.setGraphicsEffect(blur)
-
         self.main_widget = parent
         self.bg = QImage()
         self.margin = self.main_widget.border_margin
+        self._captured = None  # type: Union[None, Tuple[str, QRect]]
         self.timer = QTimer()
-        self.timer.setInterval(100)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(BlurredBackground.CAPTURE_DELAY_MS)
         self.timer.timeout.connect(self.retake_screen)
+        self.main_widget.installEventFilter(self)
+        QGuiApplication.instance().screenAdded.connect(self._screens_changed)
+        QGuiApplication.instance().screenRemoved.connect(self._screens_changed)
+        for screen in QGuiApplication.screens():
+            screen.geometryChanged.connect(self._screens_changed)
+        BlurredBackground.instances().add(self)
         self.timer.start()
 
-    def retake_screen(self):
+    @classmethod
+    def instances(cls) -> WeakSet:
+        if cls.__INSTANCES__ is None:
+            cls.__INSTANCES__ = WeakSet()
+        return cls.__INSTANCES__
+
+    @classmethod
+    def wallpaper_changed(cls):
+        for background in list(cls.instances()):
+            background.request_capture(force=True)
+
+    def _screens_changed(self, *args):
+        if isinstance(args[0] if args else None, QScreen) and args[0] in QGuiApplication.screens():
+            args[0].geometryChanged.connect(self._screens_changed)
+        self.request_capture(force=True)
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:
+        if obj is self.main_widget and event.type() in (QEvent.Move, QEvent.Resize):
+            self.request_capture()
+        return False
+
+    def request_capture(self, force: bool = False):
+        if force:
+            self._captured = None
+        # moving and resizing come in bursts, only capture where the widget came to rest
+        self.timer.start()
+
+    def capture_rect(self) -> QRect:
         origin = self.mapToGlobal(QPoint(0, 0))
-        logging.getLogger(self.__class__.__name__).log(logging.DEBUG,
-                                                       f'{self.main_widget.__class__.__name__}, {origin.x()}, {origin.y()}'
-                                                       f'{QGuiApplication.screens()[0].size()},'
-                                                       f'{QGuiApplication.screens()[1].size()}')
+        return QRect(origin.x() + self.margin, origin.y() + self.margin,
+                     self.width() - self.margin * 2, self.height() - self.margin * 2)
 
-        if origin.x() > QGuiApplication.screens()[0].size().width():
-            screen = QGuiApplication.screens()[0]
-        else:
-            screen = QGuiApplication.screens()[1]
+    def retake_screen(self):
+        rect = self.capture_rect()
+        screen = QGuiApplication.screenAt(rect.center()) or QGuiApplication.primaryScreen()
+        if screen is None or rect.isEmpty() or self._captured == (screen.name(), rect):
+            return
+        logging.getLogger(self.__class__.__name__).log(logging.DEBUG,
+                                                       f'{self.main_widget.__class__.__name__}, {rect}, '
+                                                       f'{screen.name()}')
         self.main_widget.hide()
-        shot = screen.grabWindow(0,
-                                 origin.x() + self.margin,
-                                 origin.y() + self.margin,
-                                 self.width() - self.margin * 2,
-                                 self.height() - self.margin * 2)
-
-        self.bg = QImage(shot)
+        shot = screen.grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
         self.main_widget.show()
-
-        self.timer.setInterval(10000)
-
+        with Metrics.measure(self.__class__.__name__, MetricStage.RENDER):
+            self.bg = BlurredBackground.blurred(shot.toImage(), BlurredBackground.BLUR_RADIUS)
+        self._captured = (screen.name(), rect)
+        self.update()
+
+    @staticmethod
+    def blurred(image: QImage, radius: float) -> QImage:
+        """ renders the image once through a blur effect """
+        scene = QGraphicsScene()
+        item = QGraphicsPixmapItem(QPixmap.fromImage(image))
+        blur = QGraphicsBlurEffect()
+        blur.setBlurRadius(radius)
+        item.setGraphicsEffect(blur)
+        scene.addItem(item)
+        result = QImage(image.size(), QImage.Format_ARGB32_Premultiplied)
+        result.fill(Qt.transparent)
+        painter = QPainter(result)
+        scene.render(painter, QRectF(result.rect()), QRectF(image.rect()))
+        painter.end()
+        return result
+
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, event):
         painter = QPainter(self)
         pen = QPen(self.main_widget.border_color)
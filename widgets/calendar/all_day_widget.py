@@ -11,11 +11,12 @@ from PyQt5.QtWidgets import QWidget, QHBoxLayout
 from plugins.calendarplugin.calendar_plugin import Event, EventInstance
 from widgets.calendar.calendar_event import CalendarEventWidget
 from widgets.calendar.timeline_widget import TimelineWidget
+from helpers.metrics import Metrics, MetricStage
 from helpers.widget_helpers import CalendarHelper
 
 
 class AllDayWidget(TimelineWidget):
-    event_date_change_request = pyqtSignal(CalendarEventWidget, date, date)
+    event_date_change_request = pyqtSignal(object, date, date)
 
     def __init__(self):
         super().__init__()
@@ -75,14 +76,16 @@ class AllDayWidget(TimelineWidget):
             CalendarHelper.scale_events([c for c in event_widgets if c.isVisible()],
                                         self.width(), self.height() - (self._upper_margin+self._lower_margin),
                                         0, 24, Qt.Horizontal,
-                                        rect_func=self.unscaled_rect, col_rescale_func=self.rescale_height)
+                                        rect_func=self.unscaled_rect, col_rescale_func=self.rescale_height,
+                                        layout=self.column_layout)
 
-    def delete_event_callback(self):
-        super().delete_event_callback()
+    def delete_event_callback(self, event_widget):
+        super().delete_event_callback(event_widget)
         self._h = 25
         CalendarHelper.scale_events([c for c in self.collect_event_widgets() if c.isVisible()], self.width(),
                                     self.height() - (self._upper_margin+self._lower_margin), 0, 24, Qt.Horizontal,
-                                    rect_func=self.unscaled_rect, col_rescale_func=self.rescale_height)
+                                    rect_func=self.unscaled_rect, col_rescale_func=self.rescale_height,
+                                    layout=self.column_layout)
 
     def add_event(self, event: Union[Event, EventInstance], begin, end):
         self._h = 25
@@ -99,6 +102,19 @@ class AllDayWidget(TimelineWidget):
     def _event_got_moved(self, event: CalendarEventWidget, new_pos):
         new_pos.setY(event.y())
         new_pos.setX(min(max(new_pos.x(), 0), self.width()-5))
+        if self.days:
+            # stack the dragged event into the days it would land on, the other groups stay untouched
+            length = max(1, event.end - event.begin)
+            begin = min(max(0, math.floor((new_pos.x() / self.width()) * self.days)), max(0, self.days - length))
+            rect = CalendarHelper.scale_moved_event(self.column_layout,
+                                                    [c for c in self.collect_event_widgets() if c.isVisible()],
+                                                    event, begin, min(self.days, begin + length),
+                                                    self.width(), self.height() - (self._upper_margin+self._lower_margin),
+                                                    0, 24, Qt.Horizontal,
+                                                    rect_func=self.unscaled_rect, col_rescale_func=self.rescale_height)
+            if rect is not None:
+                new_pos.setY(rect.y())
+                event.resize(event.width(), rect.height())
         event.move(new_pos)
 
     def _event_got_moved_end(self, event: CalendarEventWidget, new_pos):
@@ -109,6 +125,7 @@ class AllDayWidget(TimelineWidget):
                                             event.event.end + timedelta(days=day_offset)
                                             )
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, event: QPaintEvent) -> None:
         if self.days is None:
             return
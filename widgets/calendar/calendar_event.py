@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import math
 import re
@@ -5,14 +6,19 @@ import textwrap
 import webbrowser
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Union
+from threading import Lock
+from typing import Union, Dict, Tuple
 
-from PyQt5.QtCore import pyqtSignal, Qt, QRect
-from PyQt5.QtGui import QIcon, QPainter, QPen, QFont, QResizeEvent
-from PyQt5.QtWidgets import QWidget, QMenu, QAction, QGraphicsDropShadowEffect, QLabel, QVBoxLayout
+from PyQt5 import sip
+from PyQt5.QtCore import pyqtSignal, Qt, QRect, QSize, QPoint, QEvent
+from PyQt5.QtGui import QIcon, QPainter, QPen, QFont, QResizeEvent, QStaticText, QPixmap, QColor, QCursor
+from PyQt5.QtWidgets import QWidget, QMenu, QAction, QGraphicsDropShadowEffect, QLabel, QVBoxLayout, QToolTip
 
+from helpers.icon_atlas import IconAtlas
+from helpers.metrics import Metrics, MetricStage
 from helpers.rrule_helper import get_recurrence_text
-from helpers.tools import ImageTools, PathManager, SignalingThread
+from helpers.tools import ImageTools, PathManager, LRUCache
+from helpers.worker_pool import WorkerPool, TaskPriority, WorkerTask
 from plugins.calendarplugin.calendar_plugin import Event, CalendarAccessRole, EventInstance
 from plugins.weather.iconsets import IconSet
 from plugins.weather.weather_data_types import Temperature, WeatherDescription, Wind
@@ -22,79 +28,37 @@ from widgets.tool_widgets import EmojiPicker
 from widgets.tool_widgets.widget import Widget
 
 
-class CalendarEventWidget(Widget):
-    delete_signal = pyqtSignal(str, object)  # id, updated Event
+class EventPresentation:
+    """
+    what an event shows and how it is edited, independent of how it is put on screen.
+    shared by the CalendarEventWidget and the events a CanvasDayWidget paints itself.
+    expects 'event' to be set and 'parent()' to return the timeline the event lives in.
+    """
+    __ICONS__ = {}  # type: Dict[str, QIcon]
+    # tooltip html by content hash, filled from the worker threads
+    __TOOL_TIPS__ = LRUCache(max_len=500)
+    __TOOL_TIPS_LOCK__ = Lock()
 
-    edit_request_signal = pyqtSignal()
-    delete_request_signal = pyqtSignal()
-
-    time_change_request = pyqtSignal(datetime, datetime)
-    date_change_request = pyqtSignal(date, date)
-
-    __ICONS__ = {}
-    __MAP_IMAGES__ = {}
+    MAX_PARALLEL_TOOLTIPS = 2
 
     @classmethod
     def get_icon_base_64(cls, path: str, size: int, fallback: str = '') -> str:
-        if path in CalendarEventWidget.__ICONS__.keys():
-            if size in CalendarEventWidget.__ICONS__[path].keys():
-                return CalendarEventWidget.__ICONS__[path][size]
-        else:
-            CalendarEventWidget.__ICONS__[path] = {}
-        try:
-            CalendarEventWidget.__ICONS__[path][size] = ImageTools.pixmap_to_base64(
-                    QIcon(path).pixmap(size, size))
-            return CalendarEventWidget.__ICONS__[path][size]
-        except ValueError:
+        data_uri = IconAtlas.shared().data_uri(path, size)
+        if data_uri is None:
             return fallback
+        return f"<img src='{data_uri}'>"
 
-    def __init__(self, parent, event: Union[Event, EventInstance], begin, end):
-        super(CalendarEventWidget, self).__init__(parent=parent)
-        self.__mousePressPos = None
-        self.__mouseMovePos = None
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setBlurRadius(5)
-        self.shadow.setXOffset(-3)
-        self.shadow.setYOffset(3)
-        self.setGraphicsEffect(self.shadow)
-        self.begin = begin
-        self.end = end
-        self.setMinimumHeight(5)
-        self.event = event
-        self.tooltip_data = ''
-        self.tooltip_thread = SignalingThread(target=self.create_tool_tip)
-        self.tooltip_thread.finished.connect(self.update_tooltip_data)
-        self.tooltip_thread.setDaemon(True)
-        self.tooltip_widget = QWidget(self)
-        self.tooltip_widget.setStyleSheet('background-color: red')
-        self.tooltip_widget.hide()
-        self.tooltip_widget_label = QLabel('')
-        self.tooltip_widget_label.setWordWrap(True)
-        self.tooltip_widget.setLayout(QVBoxLayout())
-        self.tooltip_widget.layout().setContentsMargins(0, 0, 0, 0)
-        self.tooltip_widget.layout().addWidget(self.tooltip_widget_label)
-
-        self.setWindowFlag(Qt.SubWindow)
-        if self.root_event().calendar.access_role == CalendarAccessRole.OWNER:
-            if not self.event_instance().all_day:
-                self.top_grip = SideGrip(self, Qt.TopEdge)
-                self.bottom_grip = SideGrip(self, Qt.BottomEdge)
-                self.top_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.TopEdge))
-                self.bottom_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.BottomEdge))
-                self.top_grip.resizing.connect(self.show_time_tooltip)
-                self.bottom_grip.resizing.connect(self.show_time_tooltip)
-                self.top_grip.resizing_end.connect(self.tooltip_widget.hide)
-                self.bottom_grip.resizing_end.connect(self.tooltip_widget.hide)
-            else:
-                self.left_grip = SideGrip(self, Qt.LeftEdge)
-                self.right_grip = SideGrip(self, Qt.RightEdge)
-                self.left_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.LeftEdge))
-                self.right_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.RightEdge))
-                self.left_grip.resizing.connect(lambda r: self.show_time_tooltip(r, Qt.Horizontal))
-                self.right_grip.resizing.connect(lambda r: self.show_time_tooltip(r, Qt.Horizontal))
-                self.left_grip.resizing_end.connect(self.tooltip_widget.hide)
-                self.right_grip.resizing_end.connect(self.tooltip_widget.hide)
-
+    @classmethod
+    def cached_icon(cls, name: str) -> QIcon:
+        if name not in cls.__ICONS__:
+            cls.__ICONS__[name] = QIcon(PathManager.get_icon_path(name))
+        return cls.__ICONS__[name]
+
+    def load_presentation(self):
+        """ time, summary, icon and links of the event """
+        self._box_key = None
+        self._box_pixmap = None  # type: Union[None, QPixmap]
+        self._icon_key = None
         if not self.event_instance().all_day:
             if not self.event_instance().start.date() != self.event_instance().end.date() :
                 start_time_format = '%a %d.%m. %H:%M'
@@ -121,11 +85,13 @@ class CalendarEventWidget(Widget):
             self.summary = summary
             if icon:
                 self.icon = EmojiPicker.get_emoji_icon_from_unicode(icon, 32)
+                self._icon_key = icon
             else:
                 cal_icon = Path(PathManager.
                                 get_calendar_default_icons_path(f'{self.event_instance().calendar.name}.png'))
                 if cal_icon.exists():
                     self.icon = QIcon(str(cal_icon.absolute()))
+                    self._icon_key = str(cal_icon)
                 else:
                     self.icon = None
         except KeyError:
@@ -146,64 +112,18 @@ class CalendarEventWidget(Widget):
             self.urls = re.findall(r"(?P<url>https?://[^\s]+)", self.event_instance().description)
         except KeyError:
             self.description = None
-        self.tooltip_thread.start()
-        self.show()
-        self.setStyleSheet('QToolTip {background-color: rgb(30, 30, 30); '
-                           'color: white; '
-                           'border: 1.5px solid gray;'
-                           'padding: 5px;border-radius: 2px;}')
+            self.urls = []
+        self.recurring = self.event_instance().is_recurring()
 
-        self.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.show_context_menu)
+    def display_summary(self) -> str:
+        # leaves room for the icon in the first line
+        return '      ' + self.summary if self.icon is not None else self.summary
 
-        self.context_menu = QMenu('context menu')
-        # self.context_menu.setStyleSheet('background-color: rgb(50,50,50)')
+    def is_movable(self) -> bool:
+        return self.event_instance().calendar.access_role in [CalendarAccessRole.OWNER, CalendarAccessRole.WRITER]
 
-        self.context_menu.setStyleSheet('QMenu{ background-color: rgb(255,255, 255); color: rgb(0,0,0); '
-                                        '       icon-size: 20px;} '
-                                        'QMenu::item{ background: transparent;} '
-                                        'QMenu::item:selected { background-color: rgb(196,233,251);}')
-        self.edit_action = QAction(QIcon(PathManager.get_icon_path('edit_event.png')),
-                                   'Edit event', self)
-
-        self.context_menu.addAction(self.edit_action)
-        if self.event_instance().calendar.access_role != CalendarAccessRole.OWNER:
-            self.edit_action.setDisabled(True)
-            self.edit_action.setText('Edit (read-only)')
-            self.edit_action.setIcon(QIcon(PathManager.get_icon_path('lock_event.png')))
-        else:
-
-            self.edit_action.triggered.connect(self.edit_event)
-
-            if self.event_instance().is_recurring():
-                rec_id = self.event_instance().recurring_event_id
-                # self.edit_action.setText('Edit recurring event')
-                self.recurring = True
-                # cal_plugin.get_rec_event(self.event)
-                if self.root_event().exdates:
-                    self.restore_exdates_menu = QMenu('Restore removed instances', self)
-                    self.exdate_restore_actions = {}
-                    for exdate in self.root_event().exdates:
-                        self.exdate_restore_actions[exdate] = QAction(f'Restore {exdate}', self)
-                        self.restore_exdates_menu.addAction(self.exdate_restore_actions[exdate])
-                    self.context_menu.addMenu(self.restore_exdates_menu)
-
-            else:
-                self.recurring = False
-            self.delete_action = QAction(QIcon(PathManager.get_icon_path('delete_event.png')),
-                                         'Delete event', self)
-            self.delete_action.triggered.connect(self.delete_event)
-            self.context_menu.addAction(self.delete_action)
-        self.url_actions = []
-        for url in self.urls:
-            url_action = QAction(QIcon(PathManager.get_icon_path('link.png')),
-                                 f'Go to {url}', self)
-            url_action.triggered.connect(lambda: webbrowser.open(url))
-            self.url_actions.append(url_action)
-            self.context_menu.addAction(url_action)
-
-    def update_tooltip_data(self):
-        self.setToolTip(self.tooltip_data)
+    def is_resizable(self) -> bool:
+        return self.root_event().calendar.access_role == CalendarAccessRole.OWNER
 
     def root_event(self) -> Event:
         if isinstance(self.event, Event):
@@ -217,7 +137,62 @@ class CalendarEventWidget(Widget):
         elif isinstance(self.event, EventInstance):
             return self.event.instance
 
+    def request_tool_tip(self, priority: int = TaskPriority.UI_VISIBLE):
+        """ builds the tooltip in the worker pool unless it is there already, tool_tip_ready() is called after """
+        if self.tooltip_data or self.tooltip_task is not None:
+            return
+        self.tooltip_task = WorkerPool.shared().submit(self.create_tool_tip, priority=priority,
+                                                       owner=EventPresentation,
+                                                       owner_limit=EventPresentation.MAX_PARALLEL_TOOLTIPS)
+        self.tooltip_task.finished.connect(self._tool_tip_task_done)
+        self.tooltip_task.failed.connect(self._tool_tip_task_done)
+
+    def _tool_tip_task_done(self, *args):
+        self.tooltip_task = None
+        self.tool_tip_ready()
+
+    def tool_tip_ready(self):
+        pass
+
+    def refresh_tool_tip(self):
+        """ drops the tooltip, it is built again on the next hover """
+        if self.tooltip_task is not None:
+            self.tooltip_task.cancel()
+            self.tooltip_task = None
+        self.tooltip_data = ''
+
+    def weather_for_tool_tip(self) -> Union[None, WeatherReport]:
+        try:
+            view = self.parent().parent()
+            return view.get_weather_for_location(self.location) if hasattr(view, 'get_weather_for_location') else None
+        except RuntimeError:
+            return None
+
+    def tool_tip_key(self, weather_data: Union[None, WeatherReport]) -> str:
+        """ hash of everything the tooltip shows, events with equal content share one tooltip """
+        event = self.event_instance()
+        content = (self._icon_key, self.summary, self.time, self.location, self.description,
+                   # built again once the map arrived
+                   bool(self.location) and (self.location, 250, 10) in MapImageHelper.shared().cache,
+                   event.alarm.alarm_time.strftime('%H:%M') if event.alarm else None,
+                   str(self.root_event().recurrence) if self.root_event().recurrence else None,
+                   event.calendar.name,
+                   # the report is replaced on every weather update
+                   (weather_data.version, event.start, event.end) if weather_data else None)
+        return hashlib.sha1(repr(content).encode()).hexdigest()
+
     def create_tool_tip(self):
+        weather_data = self.weather_for_tool_tip()
+        key = self.tool_tip_key(weather_data)
+        with EventPresentation.__TOOL_TIPS_LOCK__:
+            tooltip = EventPresentation.__TOOL_TIPS__.get(key)
+        if tooltip is None:
+            tooltip = self.build_tool_tip(weather_data)
+            with EventPresentation.__TOOL_TIPS_LOCK__:
+                EventPresentation.__TOOL_TIPS__[key] = tooltip
+        self.tooltip_data = tooltip
+
+    def build_tool_tip(self, weather_data: Union[None, WeatherReport]) -> str:
         if self.icon is not None:
             img = ImageTools.pixmap_to_base64(self.icon.pixmap(28, 28))
         else:
@@ -226,7 +201,7 @@ class CalendarEventWidget(Widget):
                    f"</td><td>{self.time}</td></tr>" if self.time else ''
         loc_str = f"<tr><td>{self.get_icon_base_64(PathManager.get_icon_path('location.png'), 10, '<b>Location:</b>')} " \
                   f"</td><td>{self.location}</td></tr>  <tr><td></td><td>" \
-                  f"{MapImageHelper.get_map_image_base_64(self.location)}</td></tr>" if self.location else ''
+                  f"{MapImageHelper.shared().get_map_image_base_64(self.location)}</td></tr>" if self.location else ''
         desc_str = f"<tr><td>{self.get_icon_base_64(PathManager.get_icon_path('description.png'), 10, '<b>Description:</b>')} " \
                    f"</td><td>{textwrap.shorten(self.description, 2000)}</td></tr>" if self.description else ''
         alarm_str = f"<tr><td>{self.get_icon_base_64(PathManager.get_icon_path('bell.png'), 10, '<b>Alarm:</b>')} " \
@@ -236,8 +211,7 @@ class CalendarEventWidget(Widget):
         weather = ''
 
         try:
-            if hasattr(self.parent().parent(), 'weather_data') and self.parent().parent().weather_data:
-                weather_data: WeatherReport = self.parent().parent().weather_data
+            if weather_data:
                 report = weather_data.get_report_from(self.event_instance().start, self.event_instance().end)
                 if report:
                     temps = [dp.data.get(Temperature).get_temperature()['value'] for dp in report.values()]
@@ -263,7 +237,7 @@ class CalendarEventWidget(Widget):
                               f"<tr><td>{wind_icon}</td><td>{wind}</td></tr> "
         except RuntimeError as e:
             print('RTE', e)
-        self.tooltip_data = f'<h2>{img}<b> {self.summary}</b></h2>' \
+        return f'<h2>{img}<b> {self.summary}</b></h2>' \
                         f'<hr/>' \
                         f'<table>' \
                         f'{time_str}' \
@@ -276,8 +250,53 @@ class CalendarEventWidget(Widget):
                         f"{self.get_icon_base_64(PathManager.get_icon_path('cal.png'), 10, '<i>Calendar:</i>')}" \
                         f" <i>{self.event_instance().calendar.name}</i>" \
 
-    def show_context_menu(self, pos):
-        self.context_menu.exec(self.mapToGlobal(pos))
+    def create_context_menu(self, parent: QWidget) -> QMenu:
+        context_menu = QMenu('context menu')
+        # context_menu.setStyleSheet('background-color: rgb(50,50,50)')
+
+        context_menu.setStyleSheet('QMenu{ background-color: rgb(255,255, 255); color: rgb(0,0,0); '
+                                   '       icon-size: 20px;} '
+                                   'QMenu::item{ background: transparent;} '
+                                   'QMenu::item:selected { background-color: rgb(196,233,251);}')
+        self.edit_action = QAction(QIcon(PathManager.get_icon_path('edit_event.png')),
+                                   'Edit event', parent)
+
+        context_menu.addAction(self.edit_action)
+        if self.event_instance().calendar.access_role != CalendarAccessRole.OWNER:
+            self.edit_action.setDisabled(True)
+            self.edit_action.setText('Edit (read-only)')
+            self.edit_action.setIcon(QIcon(PathManager.get_icon_path('lock_event.png')))
+        else:
+
+            self.edit_action.triggered.connect(self.edit_event)
+
+            if self.event_instance().is_recurring():
+                rec_id = self.event_instance().recurring_event_id
+                # self.edit_action.setText('Edit recurring event')
+                self.recurring = True
+                # cal_plugin.get_rec_event(self.event)
+                if self.root_event().exdates:
+                    self.restore_exdates_menu = QMenu('Restore removed instances', parent)
+                    self.exdate_restore_actions = {}
+                    for exdate in self.root_event().exdates:
+                        self.exdate_restore_actions[exdate] = QAction(f'Restore {exdate}', parent)
+                        self.restore_exdates_menu.addAction(self.exdate_restore_actions[exdate])
+                    context_menu.addMenu(self.restore_exdates_menu)
+
+            else:
+                self.recurring = False
+            self.delete_action = QAction(QIcon(PathManager.get_icon_path('delete_event.png')),
+                                    'Delete event', parent)
+            self.delete_action.triggered.connect(self.delete_event)
+            context_menu.addAction(self.delete_action)
+        self.url_actions = []
+        for url in self.urls:
+            url_action = QAction(QIcon(PathManager.get_icon_path('link.png')),
+                                 f'Go to {url}', parent)
+            url_action.triggered.connect(lambda: webbrowser.open(url))
+            self.url_actions.append(url_action)
+            context_menu.addAction(url_action)
+        return context_menu
 
     def edit_event(self):
         self.edit_request_signal.emit()
@@ -318,8 +337,8 @@ class CalendarEventWidget(Widget):
         end_day = math.floor(percentage_end * self.parent().days)
         return start_day, end_day
 
-    def request_dragged_time_update(self, rect: QRect, resized_from: Qt.Edge):
-        self.tooltip_widget.hide()
+    def times_for_rect(self, rect: QRect, resized_from: Qt.Edge) -> Tuple[datetime, datetime]:
+        """ start and end of the event when resized from an edge to rect """
         if resized_from in [Qt.TopEdge, Qt.BottomEdge]:
             start_hour = self.parent().start_hour
             end_hour = self.parent().end_hour
@@ -335,13 +354,183 @@ class CalendarEventWidget(Widget):
                 else:
                     new_end = self.event_instance().end.replace(hour=e_h, minute=e_m)
 
-            self.time_change_request.emit(new_start, new_end)
         else:
             start_day, end_day = self.rect_to_days(rect)
             new_start = self.parent().start_date + timedelta(days=start_day)
             new_end = self.parent().start_date + timedelta(days=end_day)
             new_start = datetime.combine(new_start, datetime.min.time())
             new_end = datetime.combine(new_end, datetime.min.time())
+        return new_start, new_end
+
+    def content_key(self) -> tuple:
+        """ everything paint_box depends on, besides the size """
+        instance = self.event_instance()
+        return (self.display_summary(), self.icon.cacheKey() if self.icon is not None else None,
+                QColor(instance.calendar.bg_color).rgba(), QColor(instance.get_bg_color()).rgba(),
+                QColor(instance.get_fg_color()).rgba(), bool(instance.alarm), bool(self.root_event().recurrence),
+                instance.is_synchronized())
+
+    def box_pixmap(self, size: QSize, dpr: float, text: QStaticText = None) -> QPixmap:
+        """ the painted box, rendered again only when size, pixel ratio or content changed """
+        key = (size.width(), size.height(), dpr, self.content_key())
+        if key != self._box_key:
+            with Metrics.measure(self.__class__.__name__, MetricStage.RENDER):
+                pixmap = QPixmap(max(1, math.ceil(size.width() * dpr)), max(1, math.ceil(size.height() * dpr)))
+                pixmap.setDevicePixelRatio(dpr)
+                pixmap.fill(Qt.transparent)
+                painter = QPainter(pixmap)
+                self.paint_box(painter, QRect(QPoint(0, 0), size), text)
+                painter.end()
+            self._box_pixmap, self._box_key = pixmap, key
+        return self._box_pixmap
+
+    def paint_box(self, painter: QPainter, rect: QRect, text: QStaticText = None):
+        """ paints the event into rect. the text may come as a prepared QStaticText """
+        painter.save()
+        painter.translate(rect.topLeft())
+        painter.setBrush(self.event_instance().calendar.bg_color)
+        painter.setPen(Qt.NoPen)
+        # painter.pen().setJoinStyle(Qt.BevelJoin)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.drawRoundedRect(QRect(0, 0, rect.width(), rect.height()), 4.0, 4.0)
+        if self.event_instance().bg_color is not None:
+            painter.setBrush(self.event_instance().get_bg_color())
+            painter.drawRoundedRect(QRect(2, 0, rect.width()-2, rect.height()), 4.0, 4.0)
+        pen = QPen(self.event_instance().get_fg_color())
+        stroke = 1
+        pen.setWidth(stroke)
+        painter.setPen(pen)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(self.event_instance().get_fg_color())
+        painter.setFont(QFont('Calibri', 10))
+        if self.icon is not None:
+            self.icon.paint(painter, QRect(2, 2, 15, 15))
+        if text is not None:
+            painter.setClipRect(QRect(0, 0, rect.width(), rect.height()))
+            painter.drawStaticText(0, 0, text)
+            painter.setClipping(False)
+        else:
+            painter.drawText(QRect(0, 0, rect.width(), rect.height()), Qt.TextWordWrap, self.display_summary())
+
+        icon_size = 15
+        icon_margin = 2
+        alarm_icon_pos = rect.width() - (icon_size + icon_margin), icon_margin
+        rec_icon_pos = rect.width() - (icon_size + icon_margin), rect.height() - (icon_size + icon_margin)
+        sync_icon_pos = rec_icon_pos
+
+        if self.event_instance().alarm:
+            self.cached_icon('bell.png').paint(painter, QRect(*alarm_icon_pos, icon_size, icon_size))
+
+        if self.root_event().recurrence:
+            self.cached_icon('recurring.png').paint(painter, QRect(*rec_icon_pos, icon_size, icon_size))
+
+        if not self.event_instance().is_synchronized():
+            if self.root_event().recurrence:  # if rec_icon also present, shift sync icon to the left
+                sync_icon_pos = (sync_icon_pos[0]-(icon_size + icon_margin), sync_icon_pos[1])
+            self.cached_icon('cloud-fail.png').paint(painter, QRect(*sync_icon_pos, icon_size, icon_size))
+        painter.restore()
+
+
+class CalendarEventWidget(Widget, EventPresentation):
+    delete_signal = pyqtSignal(str, object)  # id, updated Event
+
+    edit_request_signal = pyqtSignal()
+    delete_request_signal = pyqtSignal()
+
+    time_change_request = pyqtSignal(datetime, datetime)
+    date_change_request = pyqtSignal(date, date)
+
+    def __init__(self, parent, event: Union[Event, EventInstance], begin, end):
+        super(CalendarEventWidget, self).__init__(parent=parent)
+        self.__mousePressPos = None
+        self.__mouseMovePos = None
+        self.shadow = QGraphicsDropShadowEffect()
+        self.shadow.setBlurRadius(5)
+        self.shadow.setXOffset(-3)
+        self.shadow.setYOffset(3)
+        self.setGraphicsEffect(self.shadow)
+        self.begin = begin
+        self.end = end
+        self.setMinimumHeight(5)
+        self.event = event
+        self.tooltip_data = ''
+        self.tooltip_task = None  # type: Union[None, WorkerTask]
+        self.tooltip_widget = QWidget(self)
+        self.tooltip_widget.setStyleSheet('background-color: red')
+        self.tooltip_widget.hide()
+        self.tooltip_widget_label = QLabel('')
+        self.tooltip_widget_label.setWordWrap(True)
+        self.tooltip_widget.setLayout(QVBoxLayout())
+        self.tooltip_widget.layout().setContentsMargins(0, 0, 0, 0)
+        self.tooltip_widget.layout().addWidget(self.tooltip_widget_label)
+
+        self.setWindowFlag(Qt.SubWindow)
+        if self.root_event().calendar.access_role == CalendarAccessRole.OWNER:
+            if not self.event_instance().all_day:
+                self.top_grip = SideGrip(self, Qt.TopEdge)
+                self.bottom_grip = SideGrip(self, Qt.BottomEdge)
+                self.top_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.TopEdge))
+                self.bottom_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.BottomEdge))
+                self.top_grip.resizing.connect(self.show_time_tooltip)
+                self.bottom_grip.resizing.connect(self.show_time_tooltip)
+                self.top_grip.resizing_end.connect(self.tooltip_widget.hide)
+                self.bottom_grip.resizing_end.connect(self.tooltip_widget.hide)
+            else:
+                self.left_grip = SideGrip(self, Qt.LeftEdge)
+                self.right_grip = SideGrip(self, Qt.RightEdge)
+                self.left_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.LeftEdge))
+                self.right_grip.resized.connect(lambda r: self.request_dragged_time_update(r, Qt.RightEdge))
+                self.left_grip.resizing.connect(lambda r: self.show_time_tooltip(r, Qt.Horizontal))
+                self.right_grip.resizing.connect(lambda r: self.show_time_tooltip(r, Qt.Horizontal))
+                self.left_grip.resizing_end.connect(self.tooltip_widget.hide)
+                self.right_grip.resizing_end.connect(self.tooltip_widget.hide)
+
+        self.load_presentation()
+        self.show()
+        self.setStyleSheet('QToolTip {background-color: rgb(30, 30, 30); '
+                           'color: white; '
+                           'border: 1.5px solid gray;'
+                           'padding: 5px;border-radius: 2px;}')
+
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
+        self.context_menu = self.create_context_menu(self)
+
+    def refresh_tool_tip(self):
+        super().refresh_tool_tip()
+        self.setToolTip('')
+
+    def tool_tip_ready(self):
+        if sip.isdeleted(self):
+            return
+        self.setToolTip(self.tooltip_data)
+        if self.tooltip_data and self.underMouse():
+            QToolTip.showText(QCursor.pos(), self.tooltip_data, self)
+
+    def enterEvent(self, event: QEvent) -> None:
+        # starts building while qt waits to show the tooltip
+        self.request_tool_tip()
+        if hasattr(self.parent(), 'prefetch_tool_tips'):
+            self.parent().prefetch_tool_tips(self)
+        super().enterEvent(event)
+
+    def event(self, event: QEvent) -> bool:
+        if event.type() == QEvent.ToolTip and not self.tooltip_data:
+            # shown by tool_tip_ready()
+            self.request_tool_tip()
+            return True
+        return super().event(event)
+
+    def show_context_menu(self, pos):
+        self.context_menu.exec(self.mapToGlobal(pos))
+
+    def request_dragged_time_update(self, rect: QRect, resized_from: Qt.Edge):
+        self.tooltip_widget.hide()
+        new_start, new_end = self.times_for_rect(rect, resized_from)
+        if resized_from in [Qt.TopEdge, Qt.BottomEdge]:
+            self.time_change_request.emit(new_start, new_end)
+        else:
             self.date_change_request.emit(new_start, new_end)
 
     def reset_size_to_original(self):
@@ -415,45 +604,7 @@ class CalendarEventWidget(Widget):
 
         super().mouseReleaseEvent(event)
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, paint_event):
         painter = QPainter(self)
-        painter.setBrush(self.event_instance().calendar.bg_color)
-        painter.setPen(Qt.NoPen)
-        # painter.pen().setJoinStyle(Qt.BevelJoin)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.drawRoundedRect(QRect(0, 0, self.width(), self.height()), 4.0, 4.0)
-        if self.event_instance().bg_color is not None:
-            painter.setBrush(self.event_instance().get_bg_color())
-            painter.drawRoundedRect(QRect(2, 0, self.width()-2, self.height()), 4.0, 4.0)
-        pen = QPen(self.event_instance().get_fg_color())
-        stroke = 1
-        pen.setWidth(stroke)
-        painter.setPen(pen)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(self.event_instance().get_fg_color())
-        painter.setFont(QFont('Calibri', 10))
-        if self.icon is not None:
-            self.icon.paint(painter, QRect(2, 2, 15, 15))
-            painter.drawText(QRect(0, 0, self.width(), self.height()), Qt.TextWordWrap, '      '+self.summary)
-        else:
-            painter.drawText(QRect(0, 0, self.width(), self.height()), Qt.TextWordWrap, self.summary)
-
-        icon_size = 15
-        icon_margin = 2
-        alarm_icon_pos = self.width() - (icon_size + icon_margin), icon_margin
-        rec_icon_pos = self.width() - (icon_size + icon_margin), self.height() - (icon_size + icon_margin)
-        sync_icon_pos = rec_icon_pos
-
-        if self.event_instance().alarm:
-            alarm_icon = QIcon(PathManager.get_icon_path('bell.png'))
-            alarm_icon.paint(painter, QRect(*alarm_icon_pos, icon_size, icon_size))
-
-        if self.root_event().recurrence:
-            rec_icon = QIcon(PathManager.get_icon_path('recurring.png'))
-            rec_icon.paint(painter, QRect(*rec_icon_pos, icon_size, icon_size))
-
-        if not self.event_instance().is_synchronized():
-            if self.root_event().recurrence:  # if rec_icon also present, shift sync icon to the left
-                sync_icon_pos = (sync_icon_pos[0]-(icon_size + icon_margin), sync_icon_pos[1])
-            sync_icon = QIcon(PathManager.get_icon_path('cloud-fail.png'))
-            sync_icon.paint(painter, QRect(*sync_icon_pos, icon_size, icon_size))
+        painter.drawPixmap(0, 0, self.box_pixmap(self.size(), self.devicePixelRatioF()))
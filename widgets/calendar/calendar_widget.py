@@ -3,28 +3,32 @@ import copy
 import logging
 import math
 from datetime import datetime, date, timedelta
-from typing import Union, List
+from typing import Union, List, Dict
 
 from dateutil.tz import tzlocal
 
 from credentials import NoCredentialsSetException
-from plugins.base import BasePlugin
-from plugins.calendarplugin.caldav.cal_dav import CalDavPlugin
+from plugins.base import BasePlugin, DataDelta, KeyChanges
 from plugins.calendarplugin.calendar_plugin import CalendarPlugin, Event, CalendarData, Calendar, EventInstance
 # from plugins.calendarplugin.web_cal.web_cal import WebCalPlugin
-from plugins.climacell.climacell import ClimacellPlugin
 from plugins.location.location_plugin import LocationPlugin
-from plugins.location.mapquest_location_plugin import MapQuestLocationPlugin
+from plugins.weather.event_weather import EventLocationWeather
 from plugins.weather.weather_plugin import WeatherPlugin, WeatherReport
+from plugins.weather.weather_service import SharedWeatherPlugin
 from widgets.base import BaseWidget
 from PyQt5.QtGui import QColor, QIcon, QResizeEvent, QMouseEvent, QPainter, QBrush, QPen
-from PyQt5.QtCore import Qt, QDateTime
-from PyQt5.QtWidgets import QHBoxLayout, QAction, QMessageBox, QLabel, QMenu
+from PyQt5.QtCore import Qt, QDateTime, QTimer
+from PyQt5.QtWidgets import QHBoxLayout, QAction, QMessageBox, QLabel, QMenu, QApplication
 
 from widgets.calendar.calendar_event import CalendarEventWidget
 from widgets.calendar.event_editor import EventEditor
 from widgets.calendar.multi_day_view import MultiDayView
-from helpers.tools import PathManager
+from helpers.frame_scheduler import FrameScheduler
+from helpers.metrics import Metrics, MetricStage
+from helpers.settings_storage import SettingsStorage
+from helpers.startup_profiler import StartupProfiler
+from helpers.tools import PathManager, import_class
+from helpers.widget_helpers import MapImageHelper
 from widgets.tool_widgets import LocationPicker, QSpinBoxAction, ListSelectAction, CustomMessageBox
 from widgets.tool_widgets.toaster import QToaster
 from widgets.tool_widgets.widget_actions import QHourRangeAction
@@ -32,10 +36,12 @@ from widgets.tool_widgets.widget_actions import QHourRangeAction
 
 class CalendarWidget(BaseWidget):
     DEFAULT_PLUGINS = {
-        CalendarPlugin: CalDavPlugin,
-        WeatherPlugin: ClimacellPlugin,
-        LocationPlugin: MapQuestLocationPlugin
+        CalendarPlugin: 'plugins.calendarplugin.caldav.cal_dav.CalDavPlugin',
+        WeatherPlugin: 'plugins.climacell.climacell.ClimacellPlugin',
+        LocationPlugin: 'plugins.location.mapquest_location_plugin.MapQuestLocationPlugin'
     }
+    VIEW_SNAPSHOT_VERSION = 1
+    VIEW_SNAPSHOT_DELAY_MS = 3000
 
     def __init__(self):
         super().__init__()
@@ -57,11 +63,23 @@ class CalendarWidget(BaseWidget):
         self.settings_switcher['days'] = (setattr, ['self', 'key', 'value'], int)
         self.settings_switcher['start_hour'] = (setattr, ['self', 'key', 'value'], int)
         self.settings_switcher['end_hour'] = (setattr, ['self', 'key', 'value'], int)
+        self.settings_switcher['calendar_worker_process'] = (self.set_calendar_worker_process, ['value'],
+                                                             lambda val: val in ['true', 'True', True])
+        self.settings_switcher['canvas_rendering'] = (self.set_canvas_rendering, ['value'],
+                                                      lambda val: val in ['true', 'True', True])
 
         self.cal_plugins = {}  # type: Dict[str, Union[None, CalendarPlugin]]
         self.cal_plugin = None  # type:  Union[None, CalendarPlugin]
-        self.weather_plugin = None  # type: Union[None, WeatherPlugin]
+        self.weather_plugin = None  # type: Union[None, SharedWeatherPlugin]
         self.location_plugin = None  # type: Union[None, LocationPlugin]
+        self.event_weather = None  # type: Union[None, EventLocationWeather]
+        self.calendar_worker_process = False
+        self.canvas_rendering = False
+        self.snapshot_plugins = set()
+        self._view_snapshot_timer = QTimer()
+        self._view_snapshot_timer.setSingleShot(True)
+        self._view_snapshot_timer.setInterval(CalendarWidget.VIEW_SNAPSHOT_DELAY_MS)
+        self._view_snapshot_timer.timeout.connect(self.save_view_snapshot)
         self.updating_calendars = False
         self.updating_weather = False
         self.visibility_lock = False
@@ -80,6 +98,10 @@ class CalendarWidget(BaseWidget):
 
         self.refresh_weather_action = QAction(QIcon(PathManager.get_icon_path('cloud-sync-icon.png')),
                                               'Refresh Weather', self)
+        self.worker_process_action = QAction('Parse Calendars in Separate Process', self)
+        self.worker_process_action.setCheckable(True)
+        self.canvas_rendering_action = QAction('Paint Events on One Canvas per Day', self)
+        self.canvas_rendering_action.setCheckable(True)
         self.new_event_action = QAction(QIcon(PathManager.get_icon_path('new_event.png')),
                                         'New Event', self)
         self.day_num_select_menu = QMenu('Set Number of Days')
@@ -131,6 +153,8 @@ class CalendarWidget(BaseWidget):
         self.context_menu.addAction(self.refresh_calendar_action)
 
         self.context_menu.addAction(self.refresh_weather_action)
+        self.context_menu.addAction(self.worker_process_action)
+        self.context_menu.addAction(self.canvas_rendering_action)
 
         self.context_menu.addAction(self.new_event_action)
         self.day_num_select_menu.setIcon(QIcon(PathManager.get_icon_path('calendar_time.png')))
@@ -147,10 +171,6 @@ class CalendarWidget(BaseWidget):
 
         self.context_menu.addAction(self.pick_location_action)
 
-        self.timer.setInterval(15000)  # 15s
-        self.timer.timeout.connect(self.check_update)
-        self.timer.start()
-
     def forward(self):
         self.start_date += timedelta(days=self.days)
         self.async_update_calendars(cache_mode=CalendarPlugin.CacheMode.ALLOW_CACHE)
@@ -197,7 +217,8 @@ class CalendarWidget(BaseWidget):
             if self.weather_plugin.last_update + timedelta(hours=1) < now:
                 self.async_update_weather()
         self.check_notifications()
-        self.update()
+        # nothing else changes with the time, only the marker moves
+        self.view.update_now_line()
 
     def check_notifications(self):
         now = datetime.now().astimezone(tzlocal())
@@ -280,18 +301,37 @@ class CalendarWidget(BaseWidget):
 
         self.register_plugin(CalendarWidget.DEFAULT_PLUGINS[CalendarPlugin], 'cal_plugin')
         # self.register_plugin(WebCalPlugin, 'web_cal_plugin')
-        self.register_plugin(CalendarWidget.DEFAULT_PLUGINS[WeatherPlugin], 'weather_plugin')
+        # weather is shared with all other widgets showing the same location
+        self.register_plugin(SharedWeatherPlugin, 'weather_plugin')
         self.register_plugin(CalendarWidget.DEFAULT_PLUGINS[LocationPlugin], 'location_plugin')
         self.cal_plugins[self.cal_plugin.__class__.__name__] = self.cal_plugin
+        self.set_calendar_worker_process(self.calendar_worker_process)
+        self.worker_process_action.setChecked(self.calendar_worker_process)
+        self.worker_process_action.toggled.connect(self.toggle_calendar_worker_process)
+        self.set_canvas_rendering(self.canvas_rendering)
+        self.canvas_rendering_action.setChecked(self.canvas_rendering)
+        self.canvas_rendering_action.toggled.connect(self.toggle_canvas_rendering)
         # self.cal_plugins[self.web_cal_plugin.__class__.__name__] = self.web_cal_plugin
         if self.location:
             self.weather_plugin.set_location(self.location)
+        weather_backend = import_class(CalendarWidget.DEFAULT_PLUGINS[WeatherPlugin])
+        self.weather_plugin.set_backend(weather_backend)
+        self.event_weather = EventLocationWeather(weather_backend)
+        self.event_weather.set_home_location(self.location)
+        self.event_weather.weather_updated.connect(self.update_event_weather)
+        self.view.event_weather = self.event_weather
         self.view.refresh(self.days, self.start_date, self.start_hour, self.end_hour)
         self.view.set_filter(self.calendar_filter)
 
+        # show what was on screen last time until the plugins delivered
+        with StartupProfiler.measure(f'restore view snapshot {self.__class__.__name__}'):
+            self.restore_view_snapshot()
+        QApplication.instance().aboutToQuit.connect(self.save_view_snapshot)
         self.update_view()
         self.async_update_calendars(cache_mode=CalendarPlugin.CacheMode.REFRESH_LATER)
         self.async_update_weather()
+        # keeps running while hidden, plugins are updated and notifications sent anyway
+        FrameScheduler.shared().add_ticker(self, 15000, self.check_update, run_hidden=True)
 
         self.try_to_apply_cache()
 
@@ -370,6 +410,27 @@ class CalendarWidget(BaseWidget):
         except KeyError as e:
             self.log_warn('no event cache yet. might get initialized in the future...', e)
 
+    def set_calendar_worker_process(self, enabled: bool):
+        self.calendar_worker_process = enabled
+        if self.cal_plugin is not None:
+            self.cal_plugin.set_worker_process_enabled(enabled)
+
+    def toggle_calendar_worker_process(self, enabled: bool):
+        self.set_calendar_worker_process(enabled)
+        self.widget_updated.emit('calendar_worker_process', self.calendar_worker_process)
+
+    def set_canvas_rendering(self, enabled: bool):
+        self.canvas_rendering = enabled
+        if self.view is not None:
+            self.view.set_canvas_rendering(enabled)
+
+    def toggle_canvas_rendering(self, enabled: bool):
+        self.set_canvas_rendering(enabled)
+        self.widget_updated.emit('canvas_rendering', self.canvas_rendering)
+        self.view.refresh(self.days, self.start_date, self.start_hour, self.end_hour)
+        self.view.set_filter(self.calendar_filter)
+        self.update_view()
+
     def update_calendar_filter(self, calendars):
         self.calendar_filter = []
         for name, enabled in calendars.items():
@@ -384,9 +445,26 @@ class CalendarWidget(BaseWidget):
         self.updating_weather = False
         self.update()
 
+    def update_location_window(self):
+        """ weather and maps for the locations of the shown events """
+        locations = self.view.get_event_locations()
+        if self.event_weather is not None:
+            self.event_weather.update_window(locations)
+        MapImageHelper.shared().prefetch(locations)
+
+    def close(self):
+        if self.event_weather is not None:
+            self.event_weather.quit()
+        super(CalendarWidget, self).close()
+
+    def update_event_weather(self):
+        self.view.refresh_tool_tips([location for location in self.view.get_event_locations()
+                                     if self.event_weather.cell_for(location) is not None])
+
     def change_num_days(self, days):
         self.days = days
         self.widget_updated.emit('days', self.days)
+        self.async_update_calendars(cache_mode=CalendarPlugin.CacheMode.ALLOW_CACHE)
         self.view.refresh(self.days, self.start_date, self.start_hour, self.end_hour)
         self.view.set_filter(self.calendar_filter)
         self.update_view()
@@ -414,33 +492,121 @@ class CalendarWidget(BaseWidget):
         if isinstance(plugin, CalendarPlugin):
             if data is not None:
                 self.calendar_data[plugin.__class__.__name__] = data
+                self.snapshot_plugins.discard(plugin.__class__.__name__)
             self.update_view()
             self.try_to_apply_cache()
             self.check_notifications()
 
+    def received_data_change(self, plugin: BasePlugin, delta: DataDelta):
+        name = plugin.__class__.__name__
+        if not isinstance(plugin, CalendarPlugin) or delta.is_full or name not in self.calendar_data:
+            return super().received_data_change(plugin, delta)
+        self.log(f'received {delta} from {name}', level=logging.INFO)
+        previous = self.calendar_data[name].events
+        self.calendar_data[name] = delta.snapshot
+        if not delta.changes.is_empty():
+            with Metrics.measure(self.__class__.__name__, MetricStage.DIFF):
+                self.apply_event_changes(previous, delta.snapshot.events, delta.changes)
+            self.update_location_window()
+        self.refresh_calendar_action.setEnabled(True)
+        self.updating_calendars = False
+        self._view_snapshot_timer.start()
+        self.try_to_apply_cache()
+        self.check_notifications()
+        # nothing else changes with the time, only the marker moves
+        self.view.update_now_line()
+
+    def apply_event_changes(self, previous: dict, events: dict, changes: KeyChanges):
+        for event_id in changes.removed | changes.changed | changes.added:
+            if event_id not in events:
+                if event_id in previous:
+                    self.view.remove_event(event_id)
+            elif event_id in previous:
+                self.view.remove_event(event_id, events[event_id])
+            else:
+                self.view.add_events({event_id: events[event_id]})
+
     def update_view(self):
         self.view.remove_all()
         if self.calendar_data is not None:
             cal_actions = []
             for account, cal_data in self.calendar_data.items():
                 self.view.add_events(cal_data.events)
+                Metrics.gauge(account, 'events', len(cal_data.events))
                 cal_actions.extend([(c.name, c.name not in self.calendar_filter)
                                     for c_id, c in cal_data.calendars.items()])
             self.select_calendars_action.set_list(cal_actions)
 
         self.update_weather()
+        self.update_location_window()
         self.refresh_calendar_action.setEnabled(True)
         self.updating_calendars = False
+        self._view_snapshot_timer.start()
         self.update()
 
+    def view_snapshot_name(self) -> str:
+        return f'{self.__class__.__name__}_view'
+
+    def windowed_events(self, events: Dict[str, Union[Event, List[EventInstance]]]) -> \
+            Dict[str, Union[Event, List[EventInstance]]]:
+        """ the events touching the displayed days """
+        first_day, last_day = self.start_date, self.start_date + timedelta(days=self.days)
+
+        def visible(event: Event) -> bool:
+            start = event.start.date() if isinstance(event.start, datetime) else event.start
+            end = event.end.date() if isinstance(event.end, datetime) else event.end
+            return start <= last_day and end >= first_day
+
+        windowed = {}
+        for event_id, event in events.items():
+            if isinstance(event, list):
+                instances = [i for i in event if visible(i.instance)]
+                if instances:
+                    windowed[event_id] = instances
+            elif visible(event):
+                windowed[event_id] = event
+        return windowed
+
+    def save_view_snapshot(self):
+        """ keeps the calendars of the displayed days, so the next start can show them right away """
+        self._view_snapshot_timer.stop()
+        if self.snapshot_plugins or not self.calendar_data:
+            # the snapshot is only replaced by what the plugins delivered
+            return
+        snapshot = {'version': CalendarWidget.VIEW_SNAPSHOT_VERSION,
+                    'start_date': self.start_date,
+                    'days': self.days,
+                    'calendars': {name: CalendarData(calendars=data.calendars, colors=data.colors,
+                                                     account_name=data.account_name,
+                                                     events=self.windowed_events(data.events))
+                                  for name, data in self.calendar_data.items() if data is not None}}
+        SettingsStorage.save(snapshot, self.view_snapshot_name())
+
+    def restore_view_snapshot(self) -> bool:
+        try:
+            snapshot = SettingsStorage.load_or_default(self.view_snapshot_name(), None)
+        except Exception as e:
+            self.log_warn(f'could not load view snapshot: {e}')
+            return False
+        if not snapshot or snapshot.get('version') != CalendarWidget.VIEW_SNAPSHOT_VERSION:
+            return False
+        snapshot_end = snapshot['start_date'] + timedelta(days=snapshot['days'])
+        if snapshot_end < self.start_date or snapshot['start_date'] > self.start_date + timedelta(days=self.days):
+            return False
+        restored = {name: data for name, data in snapshot['calendars'].items() if name not in self.calendar_data}
+        self.calendar_data.update(restored)
+        self.snapshot_plugins.update(restored.keys())
+        self.log_info(f'restored view snapshot of {list(restored.keys())}')
+        return bool(restored)
+
     def async_update_calendars(self, cache_mode=CalendarPlugin.CacheMode.FORCE_REFRESH):
-        if not self.updating_calendars:
-            self.updating_calendars = True
-            self.refresh_calendar_action.setEnabled(False)
-            for cal_plugin in self.cal_plugins.values():
-                cal_plugin.update_async(days_in_future=self.get_display_days_in_future(),
-                                        days_in_past=self.get_display_days_in_past(),
-                                        cache_mode=cache_mode)
+        # the plugins join requests for the same window and drop the results of superseded ones
+        self.updating_calendars = True
+        self.refresh_calendar_action.setEnabled(False)
+        for cal_plugin in self.cal_plugins.values():
+            cal_plugin.update_async(days_in_future=self.get_display_days_in_future(),
+                                    days_in_past=self.get_display_days_in_past(),
+                                    cache_mode=cache_mode)
 
     def async_update_weather(self):
         if not self.updating_weather:
@@ -707,6 +873,7 @@ class CalendarWidget(BaseWidget):
                 self.location = loc
                 self.widget_updated.emit('location', self.location)
                 self.weather_plugin.set_location(self.location)
+                self.event_weather.set_home_location(self.location)
                 self.async_update_weather()
 
         try:
@@ -748,6 +915,7 @@ class CalendarWidget(BaseWidget):
                 self.mouse_cur_loc = None
                 self.repaint()
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, event):
         super().paintEvent(event)
         if self.mouse_down_loc is not None and self.mouse_cur_loc is not None \
@@ -0,0 +1,253 @@
+import logging
+from typing import Union, List, Tuple
+
+from PyQt5.QtCore import Qt, QRect, QPoint, QEvent
+from PyQt5.QtGui import QPainter, QStaticText, QTextOption, QFont, QColor, QPaintEvent, QMouseEvent, \
+    QContextMenuEvent
+from PyQt5.QtWidgets import QToolTip, QMenu
+
+from helpers.metrics import Metrics, MetricStage
+from helpers.tools import SignalWrapper
+from helpers.worker_pool import WorkerTask
+from plugins.calendarplugin.calendar_plugin import Event, EventInstance
+from widgets.calendar.calendar_event import EventPresentation
+from widgets.calendar.day_widget import DayWidget
+from widgets.calendar.timeline_widget import TimelineWidget
+
+
+class CanvasEvent(EventPresentation):
+    """
+    an event painted by its CanvasDayWidget. keeps the geometry-api of the CalendarEventWidget
+    the layout and the calendar need, but is only a plain object with a prepared text.
+    """
+    GRIP_SIZE = 3
+
+    def __init__(self, canvas: 'CanvasDayWidget', event: Union[Event, EventInstance], begin, end):
+        self.canvas = canvas
+        self.event = event
+        self.begin = begin
+        self.end = end
+        self.rect = QRect()
+        self.visible = True
+        self.properties = {}
+        self.tooltip_data = ''
+        self.tooltip_task = None  # type: Union[None, WorkerTask]
+        self.context_menu = None  # type: Union[None, QMenu]
+        self.delete_signal = SignalWrapper(str, object)  # id, updated Event
+        self.edit_request_signal = SignalWrapper()
+        self.delete_request_signal = SignalWrapper()
+        self._text = None  # type: Union[None, QStaticText]
+        self.load_presentation()
+
+    def parent(self) -> 'CanvasDayWidget':
+        return self.canvas
+
+    def geometry(self) -> QRect:
+        return QRect(self.rect)
+
+    def setGeometry(self, *rect):
+        rect = rect[0] if len(rect) == 1 else QRect(*rect)
+        if rect != self.rect:
+            self.canvas.update(self.rect.united(rect).adjusted(-4, -4, 4, 4))
+            self.rect = QRect(rect)
+
+    def x(self) -> int:
+        return self.rect.x()
+
+    def y(self) -> int:
+        return self.rect.y()
+
+    def width(self) -> int:
+        return self.rect.width()
+
+    def height(self) -> int:
+        return self.rect.height()
+
+    def pos(self) -> QPoint:
+        return self.rect.topLeft()
+
+    def move(self, pos: QPoint):
+        self.setGeometry(QRect(pos, self.rect.size()))
+
+    def resize(self, width: int, height: int):
+        self.setGeometry(QRect(self.rect.x(), self.rect.y(), width, height))
+
+    def isVisible(self) -> bool:
+        return self.visible
+
+    def setVisible(self, visible: bool):
+        if visible != self.visible:
+            self.visible = visible
+            self.canvas.update(self.rect.adjusted(-4, -4, 4, 4))
+
+    def property(self, name: str):
+        return self.properties.get(name)
+
+    def setProperty(self, name: str, value):
+        self.properties[name] = value
+
+    def deleteLater(self):
+        if self.tooltip_task is not None:
+            self.tooltip_task.cancel()
+        self.visible = False
+        self.canvas.update(self.rect.adjusted(-4, -4, 4, 4))
+
+    def log_debug(self, debug_msg, *args):
+        logging.getLogger(self.__class__.__name__).debug(' '.join(str(a) for a in (debug_msg, *args)))
+
+    def static_text(self) -> QStaticText:
+        """ the word-wrapped summary, laid out again only when the width changed """
+        if self._text is None or self._text.textWidth() != self.rect.width():
+            self._text = QStaticText(self.display_summary())
+            self._text.setTextFormat(Qt.PlainText)
+            self._text.setTextOption(QTextOption(Qt.AlignLeft | Qt.AlignTop))
+            self._text.setTextWidth(self.rect.width())
+            self._text.prepare(font=CanvasDayWidget.event_font())
+        return self._text
+
+    def tool_tip_ready(self):
+        self.canvas.tool_tip_ready(self)
+
+
+class CanvasDayWidget(DayWidget):
+    """
+    day column painting all its events on itself, from the geometry the layout assigned.
+    hover, drag, resize and context menu are hit-tested here instead of one widget per event.
+    """
+    SHADOW_COLOR = QColor(0, 0, 0, 90)
+    __FONT__ = None  # type: Union[None, QFont]
+
+    def __init__(self, day, start_hour: int, end_hour: int):
+        super(CanvasDayWidget, self).__init__(day, start_hour, end_hour)
+        self.setMouseTracking(True)
+        self.setAttribute(Qt.WA_AlwaysShowToolTips)
+        self._drag = None  # type: Union[None, Tuple[CanvasEvent, Qt.Edge, QPoint, QRect]]
+        self._hovered = None  # type: Union[None, CanvasEvent]
+
+    @classmethod
+    def event_font(cls) -> QFont:
+        if cls.__FONT__ is None:
+            cls.__FONT__ = QFont('Calibri', 10)
+        return cls.__FONT__
+
+    def create_event_item(self, event: Union[Event, EventInstance], begin, end):
+        return CanvasEvent(self, event, begin, end)
+
+    def add_event(self, event: Event, begin, end):
+        # the day widget would connect to the signals of an event widget, requests are emitted right here
+        TimelineWidget.add_event(self, event, begin, end)
+
+    def painted_events(self) -> List[CanvasEvent]:
+        return [e for e in self.collect_event_widgets() if e.isVisible() and e.rect.isValid()]
+
+    def item_at(self, pos: QPoint) -> Union[None, CanvasEvent]:
+        # the last painted event is on top
+        for item in reversed(self.painted_events()):
+            if item.rect.contains(pos):
+                return item
+        return None
+
+    def edge_at(self, item: CanvasEvent, pos: QPoint) -> Union[None, Qt.Edge]:
+        if not item.is_resizable():
+            return None
+        if pos.y() - item.rect.top() < CanvasEvent.GRIP_SIZE:
+            return Qt.TopEdge
+        if item.rect.bottom() - pos.y() < CanvasEvent.GRIP_SIZE:
+            return Qt.BottomEdge
+        return None
+
+    @Metrics.timed(MetricStage.PAINT)
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(CanvasDayWidget.event_font())
+        exposed = event.rect()
+        dpr = self.devicePixelRatioF()
+        for item in self.painted_events():
+            if not item.rect.adjusted(-4, -4, 4, 4).intersects(exposed):
+                continue
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(CanvasDayWidget.SHADOW_COLOR)
+            painter.drawRoundedRect(item.rect.translated(-3, 3), 4.0, 4.0)
+            painter.drawPixmap(item.rect.topLeft(), item.box_pixmap(item.rect.size(), dpr, item.static_text()))
+
+    def event(self, event: QEvent) -> bool:
+        if event.type() == QEvent.ToolTip:
+            item = self.item_at(event.pos())
+            if item is None:
+                QToolTip.hideText()
+                event.ignore()
+                return True
+            self._hovered = item
+            if item.tooltip_data:
+                QToolTip.showText(event.globalPos(), item.tooltip_data, self, item.rect)
+            else:
+                item.request_tool_tip()
+            return True
+        return super().event(event)
+
+    def tool_tip_ready(self, item: CanvasEvent):
+        if item is self._hovered and item.tooltip_data and item.rect.contains(self.mapFromGlobal(self.cursor().pos())):
+            QToolTip.showText(self.cursor().pos(), item.tooltip_data, self, item.rect)
+
+    def show_time_tooltip(self, item: CanvasEvent, global_pos: QPoint):
+        s_h, s_m, e_h, e_m = item.rect_to_times(item.rect, self.start_hour, self.end_hour)
+        QToolTip.showText(global_pos, f'{s_h:02d}:{s_m:02d} - {e_h:02d}:{e_m:02d}', self)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        item = self.item_at(event.pos())
+        if item is not None and event.button() == Qt.LeftButton and item.is_movable():
+            self._drag = (item, self.edge_at(item, event.pos()), event.pos(), item.geometry())
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self._drag is None:
+            item = self.item_at(event.pos())
+            if item is not None and item is not self._hovered:
+                # starts building while qt waits to show the tooltip
+                item.request_tool_tip()
+                self.prefetch_tool_tips(item)
+            self._hovered = item
+            if item is not None and self.edge_at(item, event.pos()) is not None:
+                self.setCursor(Qt.SizeVerCursor)
+            else:
+                self.unsetCursor()
+            super().mouseMoveEvent(event)
+            return
+        item, edge, press_pos, start_rect = self._drag
+        delta = event.pos().y() - press_pos.y()
+        if edge is None:
+            self._event_got_moved(item, QPoint(item.x(), start_rect.y() + delta))
+            return
+        rect = QRect(start_rect)
+        if edge == Qt.TopEdge:
+            rect.setTop(max(0, min(start_rect.top() + delta, start_rect.bottom() - 5)))
+        else:
+            rect.setBottom(min(self.height() - 1, max(start_rect.bottom() + delta, start_rect.top() + 5)))
+        item.setGeometry(rect)
+        self.show_time_tooltip(item, event.globalPos())
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if self._drag is None:
+            super().mouseReleaseEvent(event)
+            return
+        item, edge, press_pos, start_rect = self._drag
+        self._drag = None
+        QToolTip.hideText()
+        if item.geometry() == start_rect:
+            return
+        if edge is None:
+            self._event_got_moved_end(item, item.pos())
+        else:
+            new_start, new_end = item.times_for_rect(item.rect, edge)
+            self.event_time_change_request.emit(item, new_start, new_end)
+
+    def contextMenuEvent(self, event: QContextMenuEvent):
+        item = self.item_at(event.pos())
+        if item is None:
+            event.ignore()
+            return
+        if item.context_menu is None:
+            item.context_menu = item.create_context_menu(self)
+        item.context_menu.exec(event.globalPos())
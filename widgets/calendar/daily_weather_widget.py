@@ -1,8 +1,8 @@
 
-from PyQt5.QtCore import QSize
-from PyQt5.QtGui import QFont, QResizeEvent, QIcon
-from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QGridLayout
+from PyQt5.QtGui import QFont, QResizeEvent, QPixmap
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QGridLayout, QApplication
 
+from helpers.icon_atlas import IconAtlas
 from helpers.tools import PathManager
 from plugins.weather.iconsets import IconSet
 from plugins.weather.weather_data_types import WeatherDescription, WeatherCode, Temperature
@@ -14,8 +14,6 @@ from helpers.viz_helper import TemperatureGradient
 
 class DailyWeatherWidget(Widget):
 
-    WEATHER_ICONS = {}
-
     def __init__(self):
         super(DailyWeatherWidget, self).__init__()
         self.start_date = None
@@ -41,17 +39,15 @@ class DailyWeatherWidget(Widget):
 
     @staticmethod
     def get_weather_icon(weather_code: WeatherCode):
-        if weather_code is not None and weather_code not in DailyWeatherWidget.WEATHER_ICONS:
-            DailyWeatherWidget.WEATHER_ICONS[weather_code] = DailyWeatherWidget.create_weather_icon(weather_code)
-        return DailyWeatherWidget.WEATHER_ICONS.get(weather_code, QIcon())
-
+        if weather_code is None:
+            return QPixmap()
+        return DailyWeatherWidget.create_weather_icon(weather_code)
 
     @staticmethod
     def create_weather_icon(weather_code: WeatherCode, icon_set=IconSet.WEATHER_UNDERGOUND):
-        return QIcon(PathManager.get_weather_icon_set_path(
+        return IconAtlas.shared().pixmap(PathManager.get_weather_icon_set_path(
             icon_set['folder'],
-             f"{icon_set['data'][weather_code]}.svg")).\
-            pixmap(QSize(32, 32))
+            f"{icon_set['data'][weather_code]}.svg"), 32, QApplication.instance().devicePixelRatio())
 
     def refresh(self, days, start_date):
         self.days = days
@@ -11,7 +11,7 @@ from helpers.widget_helpers import CalendarHelper
 
 
 class DayWidget(TimelineWidget):
-    event_time_change_request = pyqtSignal(CalendarEventWidget, datetime, datetime)
+    event_time_change_request = pyqtSignal(object, datetime, datetime)
 
     def __init__(self, day: datetime.date, start_hour: int, end_hour: int):
         super(DayWidget, self).__init__()
@@ -78,7 +78,7 @@ class DayWidget(TimelineWidget):
             self.move_event_widget_to_position(ev)
 
         CalendarHelper.scale_events([c for c in event_widgets if c.isVisible()], self.width(), self.height(),
-                                    self.start_hour, self.end_hour)
+                                    self.start_hour, self.end_hour, layout=self.column_layout)
 
     def add_event(self, event: Event, begin, end):
         super().add_event(event, begin, end)
@@ -96,6 +96,15 @@ class DayWidget(TimelineWidget):
 
         new_pos.setX(event_widget.x())
         new_pos.setY(min(max(new_pos.y(), 0), self.height() - 5))
+        # make room for the dragged event where it would land, the rest of the column stays untouched
+        begin = new_pos.y() / self.hour_height() + self.start_hour
+        rect = CalendarHelper.scale_moved_event(self.column_layout,
+                                                [c for c in self.collect_event_widgets() if c.isVisible()],
+                                                event_widget, begin, begin + event_widget.end - event_widget.begin,
+                                                self.width(), self.height(), self.start_hour, self.end_hour)
+        if rect is not None:
+            new_pos.setX(rect.x())
+            event_widget.resize(rect.width(), event_widget.height())
         event_widget.move(new_pos)
 
     def _event_got_moved_end(self, event_widget: CalendarEventWidget, new_pos):
@@ -2,18 +2,21 @@ import logging
 from datetime import datetime, date, timedelta, time as d_time
 import math
 from collections import OrderedDict
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Tuple
 
 from PyQt5.QtCore import Qt, QRect, pyqtSignal, QPoint
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QBrush
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QBrush, QPixmap, QResizeEvent
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QApplication
 
+from helpers.frame_scheduler import FrameScheduler
+from helpers.metrics import Metrics, MetricStage
 from helpers.tools import time_method
 from plugins.calendarplugin.calendar_plugin import Event, EventInstance
-from plugins.weather.weather_data_types import Temperature, Precipitation, SunTime
+from plugins.weather.weather_data_types import Temperature, Precipitation, SunTime, SingleReport
+from plugins.weather.event_weather import EventLocationWeather
 from plugins.weather.weather_plugin import WeatherReport
 from widgets.calendar.all_day_widget import AllDayWidget
-from widgets.calendar.calendar_event import CalendarEventWidget
+from widgets.calendar.canvas_day_widget import CanvasDayWidget
 from widgets.calendar.daily_weather_widget import DailyWeatherWidget
 from widgets.calendar.day_widget import DayWidget
 from widgets.tool_widgets.widget import Widget
@@ -21,10 +24,13 @@ from helpers.viz_helper import PrecipitationVisualization, TemperatureVisualizat
 
 
 class MultiDayView(Widget):
-    event_edit_request = pyqtSignal(CalendarEventWidget)
-    event_delete_request = pyqtSignal(CalendarEventWidget)
-    event_rescale_request = pyqtSignal(CalendarEventWidget, datetime, datetime)
-    event_date_change_request = pyqtSignal(CalendarEventWidget, date, date)
+    NOW_LINE_CIRCLE = 6
+
+    # requests carry the CalendarEventWidget or the CanvasEvent of the event
+    event_edit_request = pyqtSignal(object)
+    event_delete_request = pyqtSignal(object)
+    event_rescale_request = pyqtSignal(object, datetime, datetime)
+    event_date_change_request = pyqtSignal(object, date, date)
 
     def __init__(self):
         super(MultiDayView, self).__init__()
@@ -51,7 +57,13 @@ class MultiDayView(Widget):
         self.layout.addLayout(self.day_layout)
         self.setLayout(self.layout)
         self.day_widgets: List[DayWidget] = []
+        self.day_widget_class = DayWidget
         self.weather_data = None
+        self.event_weather = None  # type: Union[None, EventLocationWeather]
+        self._weather_layer_key = None
+        self._weather_layers = []  # type: List[Tuple[QRect, QPixmap]]
+        self._now_line_rect = None  # type: Union[None, QRect]
+        self.skipped_weather_layers = 0
 
     def hours_displayed(self):
         return self.end_hour - self.start_hour
@@ -61,10 +73,16 @@ class MultiDayView(Widget):
         self.end_hour = end_hour
         for dw in self.day_widgets:
             dw.change_hours(start_hour, end_hour)
+        self.invalidate_weather_layer()
         self.repaint()
 
+    def set_canvas_rendering(self, enabled: bool):
+        """ paint the events of each day on one canvas instead of a widget per event, applies on refresh """
+        self.day_widget_class = CanvasDayWidget if enabled else DayWidget
+
     def refresh(self, days, start_date, start_hour, end_hour):
         self.days = days
+        self.invalidate_weather_layer()
         self.daily_weather_widget.refresh(days, start_date)
         self.all_day_view.refresh(days, start_date)
         for dw in self.day_widgets:
@@ -78,7 +96,7 @@ class MultiDayView(Widget):
         self.start_hour = start_hour
         self.end_hour = end_hour
         for d in range(0, self.days):
-            dw = DayWidget(self.start_date + timedelta(days=d), self.start_hour, self.end_hour)
+            dw = self.day_widget_class(self.start_date + timedelta(days=d), self.start_hour, self.end_hour)
             dw.event_removed.connect(self.remove_event)  # propagate to all day-widgets for multi-day-events
             dw.event_edit_request.connect(self.event_edit_request)
             dw.event_delete_request.connect(self.event_delete_request)
@@ -94,9 +112,35 @@ class MultiDayView(Widget):
 
     def set_weather(self, weather_data):
         self.weather_data = weather_data
+        self.invalidate_weather_layer()
         self.daily_weather_widget.set_weather(weather_data)
         self.update(self.rect())
 
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super(MultiDayView, self).resizeEvent(event)
+        self.invalidate_weather_layer()
+
+    def get_weather_for_location(self, location: Union[None, str]) -> Union[None, WeatherReport]:
+        if location and self.event_weather is not None:
+            report = self.event_weather.report_for(location)
+            if report is not None:
+                return report
+        return self.weather_data
+
+    def get_event_locations(self) -> List[str]:
+        locations = set()
+        for timeline_widget in [self.all_day_view, *self.day_widgets]:
+            for event_widget in timeline_widget.collect_event_widgets():
+                if event_widget.location:
+                    locations.add(event_widget.location)
+        return list(locations)
+
+    def refresh_tool_tips(self, locations: List[str] = None):
+        for timeline_widget in [self.all_day_view, *self.day_widgets]:
+            for event_widget in timeline_widget.collect_event_widgets():
+                if locations is None or event_widget.location in locations:
+                    event_widget.refresh_tool_tip()
+
     def add_event(self, event: Union[Event, EventInstance]):
         today = self.start_date
         event_instance = event if isinstance(event, Event) else event.instance
@@ -232,6 +276,7 @@ class MultiDayView(Widget):
             return start_time, end_time
         return None
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, _paint_event):
         if not self.day_widgets:
             return
@@ -240,6 +285,7 @@ class MultiDayView(Widget):
             self.parent().update()
             return
 
+        exposed = _paint_event.rect()
         painter = QPainter(self)
         painter.setBrush(Qt.NoBrush)
         painter.setPen(QPen(QColor(255, 255, 255, 50)))
@@ -277,49 +323,84 @@ class MultiDayView(Widget):
         painter.setPen(pen)
         painter.setFont(QFont('Calibri', 8))
         for t in range(self.start_hour, self.end_hour+1):
-            painter.drawText(QRect(
+            label_rect = QRect(
                 self.day_widgets[0].geometry().x() - 30,  # TODO:REMOVE MAGIC NUMBER
                 int(self.day_widgets[0].geometry().y() - 7 +
                 (t-self.start_hour) * (self.day_widgets[0].geometry().height() / self.hours_displayed())),
                 30,  # TODO:REMOVE MAGIC NUMBER
-                int(self.day_widgets[0].geometry().height() / self.hours_displayed())), Qt.TextWordWrap, '%02d:00' % t)
+                int(self.day_widgets[0].geometry().height() / self.hours_displayed()))
+            if label_rect.intersects(exposed):
+                painter.drawText(label_rect, Qt.TextWordWrap, '%02d:00' % t)
 
         # draw weather
         if self.weather_data:
-            self.paint_weather(painter, self.weather_data)
+            self.paint_weather(painter, self.weather_data, exposed)
 
         # draw now-line
-        now = datetime.now()
-        start = now.replace(hour=self.start_hour, minute=0, second=0)
-        end = now.replace(hour=23, minute=59, second=59) if self.end_hour == 24 else \
-            now.replace(hour=self.end_hour, minute=0, second=0)
-        if start <= now <= end:
-            hour = now.hour + (now.minute / 60) - self.start_hour
-            _circle_w = 6
-            _x = self.day_widgets[0].geometry().x() - _circle_w
-            _y = int(self.day_widgets[0].geometry().y() + hour * \
-                 (self.day_widgets[0].geometry().height() / self.hours_displayed()))
-            _w = self.day_widgets[0].geometry().width() + _circle_w
+        now_line = self.now_line_rect()
+        if now_line is not None and now_line.intersects(exposed):
+            _circle_w = MultiDayView.NOW_LINE_CIRCLE
+            _x, _y = now_line.x(), now_line.center().y()
             pen = QPen(QColor(255, 0, 0))
             pen.setWidth(1)
             painter.setPen(pen)
-            painter.drawLine(_x, _y, _x + _w, _y)
+            painter.drawLine(_x, _y, _x + now_line.width() - 1, _y)
             painter.setBrush(QColor(255, 0, 0))
             painter.setRenderHint(QPainter.Antialiasing)
             painter.drawEllipse(QRect(_x, int(_y - _circle_w / 2), _circle_w, _circle_w))
 
-    def paint_weather(self, painter: QPainter, weather_report: WeatherReport):
-        visualizations = OrderedDict([
-            (Precipitation, PrecipitationVisualization(self.start_hour, self.end_hour)),
-            (Temperature, TemperatureVisualization(self.start_hour, self.end_hour)),
-        ])
-
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        from plugins.weather.weather_data_types import  PrecipitationType
-        mylist = [p[1].data[Precipitation].get_type()['value'] for p in weather_report.get_merged_report().items() if
-                  p[1].data[Precipitation].get_type()['value'] != PrecipitationType.FREEZING_RAIN]
+    def now_line_rect(self) -> Union[None, QRect]:
+        """ the strip of the current-time marker, None outside of the displayed hours """
+        if not self.day_widgets:
+            return None
+        now = datetime.now()
+        start = now.replace(hour=self.start_hour, minute=0, second=0)
+        end = now.replace(hour=23, minute=59, second=59) if self.end_hour == 24 else \
+            now.replace(hour=self.end_hour, minute=0, second=0)
+        if not start <= now <= end:
+            return None
+        hour = now.hour + (now.minute / 60) - self.start_hour
+        _circle_w = MultiDayView.NOW_LINE_CIRCLE
+        geometry = self.day_widgets[0].geometry()
+        _y = int(geometry.y() + hour * (geometry.height() / self.hours_displayed()))
+        return QRect(geometry.x() - _circle_w, int(_y - _circle_w / 2), geometry.width() + _circle_w + 1,
+                     _circle_w + 1)
+
+    def update_now_line(self):
+        """ repaints the strips the marker left and moved to, nothing if it is still on the same pixel """
+        now_line = self.now_line_rect()
+        if now_line == self._now_line_rect:
+            return
+        for rect in (self._now_line_rect, now_line):
+            if rect is not None:
+                FrameScheduler.shared().request_update(self, rect.adjusted(-1, -1, 1, 1))
+        self._now_line_rect = now_line
+
+    def invalidate_weather_layer(self):
+        self._weather_layer_key = None
+        self._weather_layers.clear()
+
+    def _get_weather_layers(self, weather_report: WeatherReport) -> List[Tuple[QRect, QPixmap]]:
+        dpr = self.devicePixelRatioF()
+        key = (weather_report.version, self.start_date, self.start_hour, self.end_hour, dpr,
+               tuple((dw.x(), dw.y(), dw.width(), dw.height()) for dw in self.day_widgets))
+        if key != self._weather_layer_key:
+            self._weather_layers = self.render_weather_layers(weather_report, dpr)
+            self._weather_layer_key = key
+        return self._weather_layers
+
+    def paint_weather(self, painter: QPainter, weather_report: WeatherReport, exposed: QRect):
+        """ blits the day columns of the weather overlay that intersect the exposed rect """
+        for rect, pixmap in self._get_weather_layers(weather_report):
+            if rect.intersects(exposed):
+                painter.drawPixmap(rect.topLeft(), pixmap)
+            else:
+                self.skipped_weather_layers += 1
 
+    def render_weather_layers(self, weather_report: WeatherReport, dpr: float) -> List[Tuple[QRect, QPixmap]]:
+        """
+        renders sunrise/sunset and the precipitation/temperature paths into one pixmap per day column
+        """
         def get_y(_time: datetime):
 
             _hour = _time.hour + (_time.minute / 60) - self.start_hour
@@ -327,49 +408,60 @@ class MultiDayView(Widget):
             start_y = min(max(0, start_y), self.day_widgets[0].geometry().height())
             return int(self.day_widgets[0].geometry().y() + start_y)
 
-        # visualize sunrise/sunset
+        sun_times = {}  # type: Dict[int, SunTime]
         for time, single_report in weather_report.get_daily_report().items():
             offset = (time.date() - self.start_date).days
-            if offset < 0:
-                continue
-            if offset < len(self.day_widgets):
+            if 0 <= offset < len(self.day_widgets):
                 try:
-                    sun_time = single_report.data[SunTime]
-                    sunset = sun_time.get_sunset()['value']
-                    sunrise = sun_time.get_sunrise()['value']
-                    if sunset is None or sunrise is None:
-                        pass
-                    else:
-                        painter.setPen(Qt.NoPen)
-                        painter.setBrush(QBrush(QColor(215, 230, 0, 50)))
-                        y1 = get_y(sunrise)
-                        y2 = get_y(sunset)
-                        x = self.day_widgets[offset].x()
-                        w = self.day_widgets[offset].width()
-                        painter.drawRect(x, y1, w, y2-y1)
+                    sun_times[offset] = single_report.data[SunTime]
                 except KeyError:
                     logging.getLogger(self.__class__.__name__).log(level=logging.ERROR,
                                                                    msg=f'oh-oh {single_report.data.keys()}')
 
-        offset = 0
+        day_reports = {}  # type: Dict[int, List[Tuple[datetime, SingleReport]]]
         for time, single_report in weather_report.get_merged_report().items():
             if max(self.start_hour - 1, 0) <= time.hour <= min(self.end_hour + 1, 24):
-                new_offset = (time.date() - self.start_date).days
-                if new_offset < 0:
-                    continue
-                if new_offset < len(self.day_widgets):
-                    if new_offset != offset:  # complete old path and create new one
-                        offset = new_offset
-                        for weather_data_type, viz in visualizations.items():
-                            viz.complete_path(painter, self.day_widgets[offset-1].geometry())
-                    y = get_y(time)
-                    for weather_data_type, viz in visualizations.items():
-                        if weather_data_type in single_report.data:
-                            viz.add_data_point(single_report.data[weather_data_type], self.day_widgets[offset].geometry(), y)
-                        else:
-                            self.log_warn(f'{weather_data_type} not found in {single_report.data}')
-        # draw last day
-        for weather_data_type, viz in visualizations.items():
-            viz.complete_path(painter, self.day_widgets[offset].geometry())
+                offset = (time.date() - self.start_date).days
+                if 0 <= offset < len(self.day_widgets):
+                    day_reports.setdefault(offset, []).append((time, single_report))
 
+        visualizations = OrderedDict([
+            (Precipitation, PrecipitationVisualization(self.start_hour, self.end_hour)),
+            (Temperature, TemperatureVisualization(self.start_hour, self.end_hour)),
+        ])
+        layers = []
+        for offset, day_widget in enumerate(self.day_widgets):
+            if offset not in sun_times and offset not in day_reports:
+                continue
+            rect = day_widget.geometry()
+            pixmap = QPixmap(int(math.ceil(rect.width() * dpr)), int(math.ceil(rect.height() * dpr)))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            # keep drawing in view coordinates
+            painter.translate(-rect.x(), -rect.y())
+            painter.setRenderHint(QPainter.Antialiasing)
 
+            # visualize sunrise/sunset
+            if offset in sun_times:
+                sunset = sun_times[offset].get_sunset()['value']
+                sunrise = sun_times[offset].get_sunrise()['value']
+                if sunset is not None and sunrise is not None:
+                    painter.setPen(Qt.NoPen)
+                    painter.setBrush(QBrush(QColor(215, 230, 0, 50)))
+                    y1 = get_y(sunrise)
+                    y2 = get_y(sunset)
+                    painter.drawRect(rect.x(), y1, rect.width(), y2 - y1)
+
+            for time, single_report in day_reports.get(offset, []):
+                y = get_y(time)
+                for weather_data_type, viz in visualizations.items():
+                    if weather_data_type in single_report.data:
+                        viz.add_data_point(single_report.data[weather_data_type], rect, y)
+                    else:
+                        self.log_warn(f'{weather_data_type} not found in {single_report.data}')
+            for weather_data_type, viz in visualizations.items():
+                viz.complete_path(painter, rect)
+            painter.end()
+            layers.append((rect, pixmap))
+        return layers
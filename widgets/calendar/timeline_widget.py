@@ -5,15 +5,20 @@ from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QResizeEvent
 from PyQt5.QtWidgets import QApplication
 
+from helpers.event_layout import ColumnLayout
+from helpers.worker_pool import TaskPriority
 from plugins.calendarplugin.calendar_plugin import Event, EventInstance
 from widgets.calendar.calendar_event import CalendarEventWidget
 from widgets.tool_widgets.widget import Widget
 
 
 class TimelineWidget(Widget):
+    TOOL_TIP_PREFETCH = 1
+
     event_removed = pyqtSignal(str, object)  # id, Event
-    event_edit_request = pyqtSignal(CalendarEventWidget)
-    event_delete_request = pyqtSignal(CalendarEventWidget)
+    # the CalendarEventWidget or, on a canvas, the CanvasEvent the request is about
+    event_edit_request = pyqtSignal(object)
+    event_delete_request = pyqtSignal(object)
 
     def __init__(self):
         super(TimelineWidget, self).__init__()
@@ -21,6 +26,7 @@ class TimelineWidget(Widget):
         self.layout = None
         self.calendar_filter = []
         self.visible = True
+        self.column_layout = ColumnLayout()
 
     def set_filter(self, calender_filter: List[str]):
         self.calendar_filter = calender_filter
@@ -29,11 +35,14 @@ class TimelineWidget(Widget):
                 widget.setVisible(widget.event_instance().calendar.name not in self.calendar_filter)
         QApplication.sendEvent(self, QResizeEvent(self.size(), self.size()))
 
+    def create_event_item(self, event: Union[Event, EventInstance], begin, end):
+        return CalendarEventWidget(parent=self, event=event, begin=begin, end=end)
+
     def add_event(self, event: Union[Event, EventInstance], begin, end):
-        cal_event = CalendarEventWidget(parent=self, event=event, begin=begin, end=end)
+        cal_event = self.create_event_item(event, begin, end)
         cal_event.delete_signal.connect(self.event_removed)
-        cal_event.edit_request_signal.connect(self.edit_event_callback)
-        cal_event.delete_request_signal.connect(self.delete_event_callback)
+        cal_event.edit_request_signal.connect(lambda: self.edit_event_callback(cal_event))
+        cal_event.delete_request_signal.connect(lambda: self.delete_event_callback(cal_event))
         if isinstance(event, EventInstance):
             cal_event.setVisible(event.instance.calendar.name not in self.calendar_filter)
             if event.root_event.id in self.cal_events and isinstance(self.cal_events[event.root_event.id], dict):
@@ -45,11 +54,11 @@ class TimelineWidget(Widget):
             self.cal_events[event.id] = cal_event
         QApplication.sendEvent(self, QResizeEvent(self.size(), self.size()))
 
-    def edit_event_callback(self):
-        self.event_edit_request.emit(self.sender())
+    def edit_event_callback(self, event_widget):
+        self.event_edit_request.emit(event_widget)
 
-    def delete_event_callback(self):
-        self.event_delete_request.emit(self.sender())
+    def delete_event_callback(self, event_widget):
+        self.event_delete_request.emit(event_widget)
 
     def remove_event(self, event_id):
         self.log('trying to delete event', event_id)
@@ -77,6 +86,15 @@ class TimelineWidget(Widget):
         return [v for k, v in self.cal_events.items() if not isinstance(v, dict)] + \
                [v for d in self.cal_events.values() if isinstance(d, dict) for v in d.values()]
 
+    def prefetch_tool_tips(self, item, neighbours: int = TOOL_TIP_PREFETCH):
+        """ the events next to the hovered one are likely hovered next """
+        items = sorted((i for i in self.collect_event_widgets() if i.isVisible()), key=lambda i: (i.begin, i.end))
+        if item not in items:
+            return
+        idx = items.index(item)
+        for neighbour in items[max(0, idx - neighbours):idx] + items[idx + 1:idx + 1 + neighbours]:
+            neighbour.request_tool_tip(TaskPriority.BACKGROUND)
+
     def remove_all(self):
         for i in list(self.cal_events.keys()):
             if isinstance(self.cal_events[i], dict):
@@ -85,6 +103,7 @@ class TimelineWidget(Widget):
                 self.cal_events.pop(i)
             else:
                 self.cal_events.pop(i).deleteLater()
+        self.column_layout.invalidate()
 
     def set_events_visible(self, visible):
         self.visible = visible
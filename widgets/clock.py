@@ -2,18 +2,21 @@ from widgets.base import BaseWidget
 from PyQt5.QtGui import QPen, QPainter, QColor, QFont, QFontMetrics, QResizeEvent
 from PyQt5.QtCore import QTime, QRect
 from PyQt5.QtWidgets import QApplication
+from helpers.frame_scheduler import FrameScheduler
+from helpers.metrics import Metrics, MetricStage
+from helpers.widget_helpers import TextSizeHelper
 
 
 class ClockWidget(BaseWidget):
     def __init__(self):
         super(ClockWidget, self).__init__()
         self.background_color = QColor(255, 0, 0, 190)
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.repaint)
-        self.timer.start()
+        FrameScheduler.shared().add_ticker(self, 1000, self.tick)
         self.color_pick_action.setText('Select Color')
         self.point_size = 1
         self.draw_border = False
+        self.border_shown = False
+        self.shown_time = None
         self.font_rect = QRect(0, 0, 0, 0)
 
         self.font_picker.currentFontChanged.connect(self.preview_font)
@@ -25,35 +28,26 @@ class ClockWidget(BaseWidget):
     def moveEvent(self, event):
         super(ClockWidget, self).moveEvent(event)
         self.draw_border = True
+        FrameScheduler.shared().request_update(self)
+
+    def tick(self):
+        # only minutes are shown, a border drawn while moving disappears with the next tick
+        if self.border_shown or QTime.currentTime().toString()[:-3] != self.shown_time:
+            FrameScheduler.shared().request_update(self)
 
     def resizeEvent(self, event):
         super(ClockWidget, self).resizeEvent(event)
         self.draw_border = True
-        font = self.fg_font
-        font.setPointSize(self.point_size)
+        font = QFont(self.fg_font)
         font.setBold(True)
-        fm = QFontMetrics(font)
-        time_str = '88:88'
         margin = self.border_margin
-
         rect = QRect(margin, margin, self.width() - (margin * 2), self.height() - (margin * 2))
-        font_rect = fm.tightBoundingRect(time_str)
+        self.point_size = max(1, int(TextSizeHelper.fit_point_size(font, '88:88', rect.size(),
+                                                                   max_point_size=max(1, rect.height()),
+                                                                   tight=True)))
+        font.setPointSize(self.point_size)
+        font_rect = QFontMetrics(font).tightBoundingRect('88:88')
         self.font_rect = QRect(7, 7, font_rect.width() + abs(font_rect.x()), font_rect.height())
-        while self.font_rect.width() < rect.width() and self.font_rect.height() <= rect.height():
-            font.setPointSize(font.pointSize() + 1)
-            fm = QFontMetrics(font)
-            font_rect = fm.tightBoundingRect(time_str)
-            self.font_rect = QRect(7, 7, font_rect.width() + abs(font_rect.x()), font_rect.height())
-            # self.debug('%r | %r <-> %r' % (font_rect, self.font_rect, rect))
-            # self.debug('pointsize: %d, fw: %d, rw: %d' % (font.pointSize(), font_rect.width(), rect.width()))
-        while self.font_rect.width() > rect.width() or self.font_rect.height() > rect.height():
-            font.setPointSize(font.pointSize() - 1)
-            fm = QFontMetrics(font)
-            font_rect = fm.tightBoundingRect(time_str)
-            self.font_rect = QRect(7, 7, font_rect.width() + abs(font_rect.x()), font_rect.height())
-            # self.debug('%r | %r <-> %r' % (font_rect, self.font_rect, rect))
-        self.point_size = font.pointSize()
-        # self.debug('set pointsize to %d' % font.pointSize())
 
     def font_changed(self):
         QApplication.sendEvent(self, QResizeEvent(self.size(), self.size()))
@@ -61,6 +55,7 @@ class ClockWidget(BaseWidget):
     def preview_font(self, font):
         self.log('Preview: %r' % font)
 
+    @Metrics.timed(MetricStage.PAINT)
     def paintEvent(self, event):
         painter = QPainter(self)
         pen = QPen(self.background_color)
@@ -75,7 +70,9 @@ class ClockWidget(BaseWidget):
         painter.setFont(font)
         time_str = QTime.currentTime().toString()
         time_str = time_str[:-3]
+        self.shown_time = time_str
         rect = QRect(margin, margin, self.width()-(margin*2), self.height()-(margin*2))
+        self.border_shown = self.draw_border
         if self.draw_border:
             painter.drawRect(rect)
             self.draw_border = False
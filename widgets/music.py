@@ -7,6 +7,7 @@ import math
 from mutagen.id3 import ID3, SYLT
 import importlib
 
+from helpers.frame_scheduler import FrameScheduler
 from helpers.tools import PathManager
 
 
@@ -121,11 +122,10 @@ class MusicWidget(BaseWidget):
         self.lyrics_frame.setWidget(self.lyrics_label)
 
         # TIMER
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.recurring_timer)
         self.counter = 0
         self.last_estimate = QDateTime.currentMSecsSinceEpoch()
-        self.timer.start()
+        # not called while the widget is hidden, song_pos catches up from last_estimate
+        FrameScheduler.shared().add_ticker(self, 100, self.recurring_timer)
 
         # CUSTOM CONFIG-ENTRIES
         self.settings_switcher['player'] = (setattr, ['self', 'key', 'value'], str)
@@ -7,6 +7,7 @@ from PyQt5 import QtCore
 from PyQt5.QtGui import QIcon, QCursor, QColor
 from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem, QVBoxLayout, QHeaderView, QToolTip, QStyle
 
+from helpers.frame_scheduler import FrameScheduler
 from plugins.base import BasePlugin
 from widgets.base import BaseWidget
 import time
@@ -63,8 +64,6 @@ class NetworkWidget(BaseWidget):
             'desktop_widgets': self.style().standardIcon(QStyle.SP_FileDialogListView)
         }
 
-        self.timer.setInterval(1000)
-
         self.collapsed_items = []
         self.settings_switcher['custom_repl'] = (setattr, ['self', 'key', 'value'], list)
         self.settings_switcher['collapsed_items'] = (setattr, ['self', 'key', 'value'], list)
@@ -110,8 +109,7 @@ class NetworkWidget(BaseWidget):
         # t.start()
         # todo: make sure we REALLY DON'T need to join here
         self.net_plugin.found_hostname.connect(self.update_ip_to_hostname)
-        self.timer.timeout.connect(self.update_con)
-        self.timer.start()
+        FrameScheduler.shared().add_ticker(self, 1000, self.update_con)
         self.update_con()
         self.log_info('started')
 
@@ -0,0 +1,27 @@
+from collections import OrderedDict
+from typing import Type, List
+
+from helpers.startup_profiler import StartupProfiler
+from helpers.tools import import_class
+
+
+class WidgetRegistry:
+    """
+    the widgets known by name. their modules, and the plugins those depend on,
+    are only imported once a widget is activated.
+    """
+    WIDGETS = OrderedDict([
+        ('MusicWidget', 'widgets.music.MusicWidget'),
+        ('CalendarWidget', 'widgets.calendar.calendar_widget.CalendarWidget'),
+        ('NetworkWidget', 'widgets.network.NetworkWidget'),
+        ('ClockWidget', 'widgets.clock.ClockWidget'),
+    ])
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return list(cls.WIDGETS.keys())
+
+    @classmethod
+    def load(cls, name: str) -> Type:
+        with StartupProfiler.measure(f'import {name}'):
+            return import_class(cls.WIDGETS[name])
@@ -1,5 +1,12 @@
 from widgets.tool_widgets.dialogs.custom_dialog import CustomMessageBox
 from .emoji_picker import EmojiPicker
 from .filtering_combobox import FilteringComboBox
-from .location_picker import LocationPicker
-from .widget_actions import ListSelectAction, QSpinBoxAction
\ No newline at end of file
+from .widget_actions import ListSelectAction, QSpinBoxAction
+
+
+def __getattr__(name):
+    # the location picker pulls in QtWebEngine, it is only imported once a widget asks for it
+    if name == 'LocationPicker':
+        from .location_picker import LocationPicker
+        return LocationPicker
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
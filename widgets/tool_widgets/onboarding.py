@@ -1,10 +1,10 @@
+from typing import List
 
 from PyQt5.QtCore import Qt, QPropertyAnimation, QRect, QEasingCurve, QPoint, pyqtSignal
 from PyQt5.QtGui import QPaintEvent, QPainter, QColor, QPen, QCloseEvent
 from PyQt5.QtWidgets import QMainWindow, QSystemTrayIcon, QVBoxLayout, QLabel, QFormLayout, QCheckBox, \
     QPushButton
 
-from widgets.base import BaseWidget
 from widgets.tool_widgets.dialogs.custom_dialog import CustomWindow
 
 
@@ -14,7 +14,7 @@ class OnboardingDialog(CustomWindow):
 
     tray_animation = None
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, widget_names: List[str], *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setWindowTitle('Welcome to Desktop Widgets')
         self.tray_icon = None
@@ -26,18 +26,18 @@ class OnboardingDialog(CustomWindow):
         self.activate_button.clicked.connect(self.activate_widgets)
 
         self.checkboxes = {}
-        for widget_class in BaseWidget.__subclasses__():
-            self.checkboxes[widget_class] = QCheckBox()
-            self.form.addRow(widget_class.__name__, self.checkboxes[widget_class])
+        for widget_name in widget_names:
+            self.checkboxes[widget_name] = QCheckBox()
+            self.form.addRow(widget_name, self.checkboxes[widget_name])
 
         self.layout.addLayout(self.form)
         self.layout.addWidget(self.activate_button)
         self.setLayout(self.layout)
 
     def activate_widgets(self):
-        for widget_class, checkbox in self.checkboxes.items():
+        for widget_name, checkbox in self.checkboxes.items():
             if checkbox.isChecked():
-                self.widget_class_activated.emit(widget_class)
+                self.widget_class_activated.emit(widget_name)
         self.close()
 
     @classmethod